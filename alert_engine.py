@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+价格提醒引擎
+价格和预测概率的阈值规则按数值序列分组、按阈值排序存放，
+每次更新只用二分查找取出被穿越的区间，不遍历全部规则
+"""
+
+import bisect
+import itertools
+import json
+import threading
+
+from kivy.logger import Logger
+
+ABOVE = 'above'  # 上穿：数值从阈值以下涨到阈值及以上
+BELOW = 'below'  # 下穿：数值从阈值以上跌到阈值及以下
+CROSS = 'cross'  # 任意方向穿越
+
+UP = 'up'
+DOWN = 'down'
+
+
+def price_key(symbol):
+    """价格序列的键"""
+    return (symbol, 'price')
+
+
+def probability_key(symbol, horizon, side):
+    """预测概率序列的键，如 ('BTCUSDT', 'down', 60)"""
+    return (symbol, side, horizon)
+
+
+class AlertRule:
+    """一条阈值规则"""
+
+    __slots__ = ('id', 'key', 'threshold', 'direction', 'message', 'once')
+
+    def __init__(self, rule_id, key, threshold, direction=CROSS, message=None, once=True):
+        if direction not in (ABOVE, BELOW, CROSS):
+            raise ValueError(f"未知的方向: {direction}")
+        self.id = rule_id
+        self.key = tuple(key)
+        self.threshold = float(threshold)
+        self.direction = direction
+        self.message = message
+        self.once = once
+
+    def to_dict(self):
+        return {
+            'key': list(self.key),
+            'threshold': self.threshold,
+            'direction': self.direction,
+            'message': self.message,
+            'once': self.once,
+        }
+
+
+class ThresholdIndex:
+    """
+    单个数值序列的规则索引
+
+    上穿和下穿规则各自按阈值排序；数值从a变到b时，被穿越的阈值
+    正好是排序列表中的一个连续区间，两次二分即可取出
+    """
+
+    def __init__(self):
+        self._above = ([], [])  # (阈值列表, 规则列表)，按阈值排序
+        self._below = ([], [])
+        self.last = None
+
+    @staticmethod
+    def _insert(side, rule):
+        keys, rules = side
+        i = bisect.bisect_right(keys, rule.threshold)
+        keys.insert(i, rule.threshold)
+        rules.insert(i, rule)
+
+    @staticmethod
+    def _delete(side, rule):
+        keys, rules = side
+        i = bisect.bisect_left(keys, rule.threshold)
+        j = bisect.bisect_right(keys, rule.threshold)
+        for k in range(i, j):
+            if rules[k] is rule:
+                del keys[k]
+                del rules[k]
+                return
+
+    def add(self, rule):
+        if rule.direction in (ABOVE, CROSS):
+            self._insert(self._above, rule)
+        if rule.direction in (BELOW, CROSS):
+            self._insert(self._below, rule)
+
+    def remove(self, rule):
+        if rule.direction in (ABOVE, CROSS):
+            self._delete(self._above, rule)
+        if rule.direction in (BELOW, CROSS):
+            self._delete(self._below, rule)
+
+    def update(self, value):
+        """
+        写入新数值
+
+        Returns:
+            tuple: (穿越方向 ABOVE/BELOW, 被穿越的规则)；首次写入时没有参照值，
+                   不触发，方向为None
+        """
+        last, self.last = self.last, value
+        if last is None or value == last:
+            return None, []
+        if value > last:
+            # 上穿: last < 阈值 <= value
+            keys, rules = self._above
+            return ABOVE, rules[bisect.bisect_right(keys, last):bisect.bisect_right(keys, value)]
+        # 下穿: value <= 阈值 < last
+        keys, rules = self._below
+        return BELOW, rules[bisect.bisect_left(keys, value):bisect.bisect_left(keys, last)]
+
+
+class AlertEngine:
+    """提醒引擎，规则触发后通过通知和提示音提醒用户"""
+
+    def __init__(self, notify=None, play_sound=None):
+        """
+        Args:
+            notify: 通知函数 notify(title, message)，默认用mobile_features.notify
+            play_sound: 提示音函数 play_sound(sound_type)，默认用mobile_features.play_sound
+        """
+        self._notify = notify
+        self._play_sound = play_sound
+        self._indexes = {}  # 序列键 -> ThresholdIndex
+        self._rules = {}  # 规则ID -> AlertRule
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.fired = 0
+
+    def __len__(self):
+        return len(self._rules)
+
+    @property
+    def symbols(self):
+        """有规则的交易对"""
+        return sorted({rule.key[0] for rule in self._rules.values()})
+
+    def add_rule(self, key, threshold, direction=CROSS, message=None, once=True):
+        """
+        添加规则
+
+        Returns:
+            int: 规则ID
+        """
+        with self._lock:
+            rule = AlertRule(next(self._ids), key, threshold, direction, message, once)
+            self._rules[rule.id] = rule
+            self._indexes.setdefault(rule.key, ThresholdIndex()).add(rule)
+        return rule.id
+
+    def add_price_alert(self, symbol, threshold, direction=CROSS, message=None, once=True):
+        """价格提醒，如 add_price_alert('BTCUSDT', 100000)"""
+        return self.add_rule(price_key(symbol), threshold, direction, message, once)
+
+    def add_probability_alert(self, symbol, horizon, side, threshold, direction=ABOVE,
+                              message=None, once=True):
+        """
+        预测概率提醒，如60分钟下跌概率超过70%:
+        add_probability_alert('BTCUSDT', 60, DOWN, 0.7)
+        """
+        if side not in (UP, DOWN):
+            raise ValueError(f"未知的方向: {side}")
+        return self.add_rule(probability_key(symbol, horizon, side), threshold, direction,
+                             message, once)
+
+    def rules(self):
+        """
+        Returns:
+            list: 当前的规则（按添加顺序）
+        """
+        with self._lock:
+            return sorted(self._rules.values(), key=lambda rule: rule.id)
+
+    def remove(self, rule_id):
+        with self._lock:
+            rule = self._rules.pop(rule_id, None)
+            if rule is not None:
+                self._indexes[rule.key].remove(rule)
+        return rule is not None
+
+    def clear(self):
+        with self._lock:
+            self._rules.clear()
+            self._indexes.clear()
+
+    def update(self, key, value):
+        """
+        写入一个数值序列的新值，触发被穿越的规则
+
+        Returns:
+            list: 触发的规则
+        """
+        with self._lock:
+            index = self._indexes.get(tuple(key))
+            if index is None:
+                return []
+            moved, fired = index.update(value)
+            for rule in fired:
+                if rule.once and self._rules.pop(rule.id, None) is not None:
+                    index.remove(rule)
+        for rule in fired:
+            self._fire(rule, value, moved)
+        return fired
+
+    def on_price(self, symbol, price):
+        """价格回调，可直接注册到symbol_registry"""
+        return self.update(price_key(symbol), price)
+
+    def on_prices(self, prices):
+        """批量价格 {交易对: 价格}"""
+        fired = []
+        for symbol, price in prices.items():
+            fired.extend(self.on_price(symbol, price))
+        return fired
+
+    def on_prediction(self, result):
+        """
+        写入一次批量预测结果
+
+        Args:
+            result: PredictionEngine.predict() 的返回值
+        """
+        fired = []
+        for i, symbol in enumerate(result['symbols']):
+            for j, horizon in enumerate(result['horizons']):
+                p_up = float(result['p_up'][i, j])
+                fired.extend(self.update(probability_key(symbol, horizon, UP), p_up))
+                fired.extend(self.update(probability_key(symbol, horizon, DOWN), 1.0 - p_up))
+        return fired
+
+    def _describe(self, rule, value, moved):
+        if rule.message:
+            return rule.message
+        symbol, kind = rule.key[0], rule.key[1]
+        # 按实际变化方向描述，恰好等于阈值时也不会把下穿说成上穿
+        crossed = '上穿' if moved == ABOVE else '下穿'
+        if kind == 'price':
+            return f"{symbol} {crossed} {rule.threshold:g}（当前 {value:g}）"
+        side = '上涨' if kind == UP else '下跌'
+        return f"{symbol} {rule.key[2]}分钟{side}概率{crossed} {rule.threshold:.0%}（当前 {value:.0%}）"
+
+    def _fire(self, rule, value, moved):
+        self.fired += 1
+        message = self._describe(rule, value, moved)
+        Logger.info(f"AlertEngine: 触发提醒 - {message}")
+        notify, play_sound = self._notify, self._play_sound
+        if notify is None or play_sound is None:
+            import mobile_features
+            notify = notify or mobile_features.notify
+            play_sound = play_sound or mobile_features.play_sound
+        try:
+            notify('价格提醒', message)
+            play_sound('warning')
+        except Exception as e:
+            Logger.error(f"AlertEngine: 提醒发送失败 - {e}")
+
+    def load(self, path):
+        """从JSON文件加载规则，文件不存在时忽略"""
+        try:
+            with open(path, encoding='utf-8') as f:
+                items = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            Logger.warning(f"AlertEngine: 读取规则失败 - {e}")
+            return 0
+        count = 0
+        for item in items:
+            try:
+                self.add_rule(item['key'], item['threshold'], item.get('direction', CROSS),
+                              item.get('message'), item.get('once', True))
+                count += 1
+            except (KeyError, TypeError, ValueError) as e:
+                Logger.warning(f"AlertEngine: 忽略无效规则 {item} - {e}")
+        return count
+
+    def save(self, path):
+        """保存规则到JSON文件"""
+        with self._lock:
+            items = [rule.to_dict() for rule in self._rules.values()]
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(items, f, ensure_ascii=False, indent=1)
+        except OSError as e:
+            Logger.warning(f"AlertEngine: 保存规则失败 - {e}")
+
+
+# 全局提醒引擎
+alert_engine = AlertEngine()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+价格提醒设置
+输入交易对、阈值和方向添加价格或预测概率提醒，列出已有规则并可删除；
+改动立即写入规则文件
+"""
+
+from kivy.app import App
+from kivy.metrics import dp
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.button import Button
+from kivy.uix.label import Label
+from kivy.uix.scrollview import ScrollView
+from kivy.uix.screenmanager import Screen
+from kivy.uix.spinner import Spinner
+from kivy.uix.textinput import TextInput
+
+from alert_engine import alert_engine, price_key, ABOVE, BELOW, CROSS, UP, DOWN
+from prediction_engine import HORIZONS
+from symbol_registry import symbol_registry, to_symbol, QUOTE_ASSET
+
+# 提醒类型 -> 概率方向，价格提醒为None
+KINDS = {
+    '价格': None,
+    '上涨概率': UP,
+    '下跌概率': DOWN,
+}
+
+# 方向选项 -> 规则方向
+DIRECTIONS = {
+    '上穿': ABOVE,
+    '下穿': BELOW,
+    '穿越': CROSS,
+}
+DIRECTION_NAMES = {direction: name for name, direction in DIRECTIONS.items()}
+
+
+def describe_rule(rule):
+    """规则的显示文字"""
+    symbol, kind = rule.key[0], rule.key[1]
+    direction = DIRECTION_NAMES.get(rule.direction, rule.direction)
+    if kind == 'price':
+        return f"{symbol} 价格{direction} {rule.threshold:g}"
+    side = '上涨' if kind == UP else '下跌'
+    return f"{symbol} {rule.key[2]}分钟{side}概率{direction} {rule.threshold:.0%}"
+
+
+class AlertScreen(Screen):
+    """价格提醒界面"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.name = 'alerts'
+
+        main_layout = BoxLayout(
+            orientation='vertical',
+            padding=[dp(15), dp(10), dp(15), dp(10)],
+            spacing=dp(8)
+        )
+
+        top_layout = BoxLayout(
+            orientation='horizontal',
+            size_hint_y=None,
+            height=dp(50),
+            spacing=dp(10)
+        )
+        back_btn = Button(
+            text='← 返回',
+            size_hint_x=None,
+            width=dp(70),
+            background_color=(0.6, 0.6, 0.6, 1),
+            font_size=dp(14),
+            font_name='Chinese'
+        )
+        back_btn.bind(on_press=self.go_back)
+        title = Label(
+            text='价格提醒',
+            font_size=dp(18),
+            color=(1, 1, 1, 1),
+            font_name='Chinese'
+        )
+        top_layout.add_widget(back_btn)
+        top_layout.add_widget(title)
+
+        # 输入区第一行：类型、预测周期、方向；第二行：币种、阈值、添加
+        kind_row = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(44), spacing=dp(6))
+        self.kind_spinner = Spinner(
+            text='价格',
+            values=tuple(KINDS),
+            font_size=dp(14),
+            font_name='Chinese'
+        )
+        self.kind_spinner.bind(text=self._on_kind)
+        self.horizon_spinner = Spinner(
+            text=f'{HORIZONS[-1]}分钟',
+            values=tuple(f'{h}分钟' for h in HORIZONS),
+            disabled=True,
+            font_size=dp(14),
+            font_name='Chinese'
+        )
+        self.direction_spinner = Spinner(
+            text='上穿',
+            values=tuple(DIRECTIONS),
+            font_size=dp(14),
+            font_name='Chinese'
+        )
+        kind_row.add_widget(self.kind_spinner)
+        kind_row.add_widget(self.horizon_spinner)
+        kind_row.add_widget(self.direction_spinner)
+
+        form = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(44), spacing=dp(6))
+        self.symbol_input = TextInput(
+            hint_text='币种 如BTC',
+            multiline=False,
+            size_hint_x=0.35,
+            font_size=dp(14),
+            font_name='Chinese'
+        )
+        self.threshold_input = TextInput(
+            hint_text='价格',
+            multiline=False,
+            input_filter='float',
+            size_hint_x=0.4,
+            font_size=dp(14),
+            font_name='Chinese'
+        )
+        add_btn = Button(
+            text='➕ 添加',
+            size_hint_x=0.25,
+            background_color=(0.2, 0.8, 0.2, 1),
+            font_size=dp(14),
+            font_name='Chinese'
+        )
+        add_btn.bind(on_press=self.add_alert)
+        form.add_widget(self.symbol_input)
+        form.add_widget(self.threshold_input)
+        form.add_widget(add_btn)
+
+        self.status_label = Label(
+            size_hint_y=None,
+            height=dp(25),
+            font_size=dp(12),
+            color=(0.8, 0.8, 0.8, 1),
+            font_name='Chinese'
+        )
+
+        scroll = ScrollView(do_scroll_x=False)
+        self.rules_layout = BoxLayout(orientation='vertical', size_hint_y=None, spacing=dp(4))
+        self.rules_layout.bind(minimum_height=self.rules_layout.setter('height'))
+        scroll.add_widget(self.rules_layout)
+
+        main_layout.add_widget(top_layout)
+        main_layout.add_widget(kind_row)
+        main_layout.add_widget(form)
+        main_layout.add_widget(self.status_label)
+        main_layout.add_widget(scroll)
+        self.add_widget(main_layout)
+
+    def on_enter(self, *args):
+        # 一次性规则触发后已被移除，每次进入时重新列出
+        self.refresh()
+
+    def go_back(self, instance):
+        from mobile_features import vibrate
+
+        vibrate(0.05)
+        self.manager.current = 'main'
+
+    def refresh(self):
+        """重新列出规则（规则一般只有几条，直接重建行控件）"""
+        self.rules_layout.clear_widgets()
+        rules = alert_engine.rules()
+        if not rules:
+            self.rules_layout.add_widget(Label(
+                text='暂无提醒',
+                size_hint_y=None,
+                height=dp(40),
+                color=(0.6, 0.6, 0.6, 1),
+                font_size=dp(13),
+                font_name='Chinese'
+            ))
+            return
+        for rule in rules:
+            row = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(40), spacing=dp(6))
+            label = Label(
+                text=describe_rule(rule) + ('' if rule.once else '（重复）'),
+                halign='left',
+                valign='middle',
+                font_size=dp(13),
+                font_name='Chinese'
+            )
+            label.bind(size=label.setter('text_size'))
+            remove_btn = Button(
+                text='删除',
+                size_hint_x=None,
+                width=dp(60),
+                background_color=(0.9, 0.3, 0.3, 1),
+                font_size=dp(13),
+                font_name='Chinese'
+            )
+            remove_btn.bind(on_press=lambda instance, rule=rule: self.remove_alert(rule))
+            row.add_widget(label)
+            row.add_widget(remove_btn)
+            self.rules_layout.add_widget(row)
+
+    def _on_kind(self, spinner, text):
+        # 概率提醒才需要选预测周期，阈值按百分比输入
+        is_price = KINDS[text] is None
+        self.horizon_spinner.disabled = is_price
+        self.threshold_input.hint_text = '价格' if is_price else '概率% 如70'
+
+    def add_alert(self, instance):
+        coin = self.symbol_input.text.strip().upper()
+        if not coin:
+            self.status_label.text = '❌ 请输入币种'
+            return
+        try:
+            threshold = float(self.threshold_input.text)
+        except ValueError:
+            threshold = 0.0
+        side = KINDS[self.kind_spinner.text]
+        if threshold <= 0 or (side is not None and threshold >= 100):
+            self.status_label.text = '❌ 请输入有效价格' if side is None else '❌ 请输入0~100之间的概率'
+            return
+
+        symbol = coin if coin.endswith(QUOTE_ASSET) else to_symbol(coin)
+        direction = DIRECTIONS[self.direction_spinner.text]
+        if side is None:
+            rule_id = alert_engine.add_price_alert(symbol, threshold, direction)
+            # 加入行情推送，价格变化时判断是否触发
+            symbol_registry.register(symbol, alert_engine.on_price)
+        else:
+            # 概率提醒在每次预测完成时判断（见 PredictionScreen._on_computed）
+            horizon = int(self.horizon_spinner.text[:-len('分钟')])
+            rule_id = alert_engine.add_probability_alert(symbol, horizon, side, threshold / 100,
+                                                         direction)
+        self._save()
+        self.threshold_input.text = ''
+        self.status_label.text = f'✅ 已添加 #{rule_id}'
+        self.refresh()
+
+    def remove_alert(self, rule):
+        alert_engine.remove(rule.id)
+        symbol = rule.key[0]
+        if not any(other.key == price_key(symbol) for other in alert_engine.rules()):
+            # 该交易对已没有价格提醒，不再需要价格回调
+            symbol_registry.unregister(symbol, alert_engine.on_price)
+        self._save()
+        self.status_label.text = '🗑 已删除'
+        self.refresh()
+
+    def _save(self):
+        alert_engine.save(App.get_running_app().alerts_path)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回测工具
+用应用内相同的指标、预测和凯莉仓位代码回放历史K线，对整段历史一次向量化评估
+
+用法:
+    python backtest.py --symbol BTCUSDT --candles 5000
+    python backtest.py --synthetic 20000
+"""
+
+import argparse
+import os
+import time
+
+# 命令行工具，不让Kivy解析参数
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+
+import numpy as np
+
+from indicators import IndicatorEngine
+from kelly import position_sizes, DEFAULT_FRACTION, DEFAULT_CAP
+from kline_store import COLUMNS, CLOSE, INTERVAL_MS, decode_klines
+from prediction_engine import (
+    HORIZONS, WARMUP, FEATURE_NAMES, LogisticModel,
+    build_feature_matrix, forward_returns, move_stats,
+)
+
+
+def max_drawdown(equity):
+    """最大回撤（比例）"""
+    if equity.size == 0:
+        return 0.0
+    peak = np.maximum.accumulate(np.concatenate(([1.0], equity)))[1:]
+    return float(np.max(1.0 - equity / peak))
+
+
+def run_backtest(klines, horizons=HORIZONS, train_ratio=0.5, fraction=DEFAULT_FRACTION,
+                 cap=DEFAULT_CAP, fee=0.001):
+    """
+    回测预测 + 凯莉仓位
+
+    前train_ratio部分训练模型并统计涨跌幅，之后的部分样本外评估；
+    每个周期每隔h根K线开一次仓，仓位之间不重叠
+
+    Args:
+        klines: 形状为 (6, n) 的K线数组
+        fee: 单边手续费率，按仓位比例扣除
+
+    Returns:
+        dict: 每个周期的交易数、胜率、收益、最大回撤，以及整体吞吐量
+    """
+    start = time.perf_counter()
+    klines = np.asarray(klines, dtype=np.float64)
+    close = klines[CLOSE]
+    n = close.size
+    max_h = max(horizons)
+    split = int(n * train_ratio)
+    if split - max_h <= WARMUP or n - max_h <= split:
+        raise ValueError(f"K线数量不足: {n}")
+
+    X = build_feature_matrix(IndicatorEngine().series(klines))
+    R = forward_returns(close, horizons)
+    stages = {'features': time.perf_counter() - start}
+
+    t = time.perf_counter()
+    train = slice(WARMUP, split - max_h)
+    model = LogisticModel(len(FEATURE_NAMES), len(horizons))
+    model.fit(X[train], (R[train] > 0).astype(np.float64))
+    up_move, down_move = move_stats(R[train])
+    stages['fit'] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    test = slice(split, n - max_h)
+    P = model.predict_proba(X[test])
+    sizes = position_sizes(P, up_move, down_move, fraction, cap)
+    returns = R[test]
+    stages['predict'] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    report = {}
+    for j, h in enumerate(horizons):
+        size, ret = sizes[::h, j], returns[::h, j]
+        traded = size != 0
+        pnl = size * ret - 2 * fee * np.abs(size)
+        equity = np.cumprod(1.0 + pnl)
+        report[f"{h}m"] = {
+            'signals': int(size.size),
+            'trades': int(traded.sum()),
+            'hit_rate': float(np.mean(np.sign(size[traded]) == np.sign(ret[traded]))) if traded.any() else 0.0,
+            'direction_accuracy': float(np.mean((P[:, j] > 0.5) == (returns[:, j] > 0))),
+            'pnl': float(equity[-1] - 1.0) if equity.size else 0.0,
+            'max_drawdown': max_drawdown(equity),
+            'avg_position': float(np.abs(size[traded]).mean()) if traded.any() else 0.0,
+        }
+    stages['evaluate'] = time.perf_counter() - t
+
+    elapsed = time.perf_counter() - start
+    return {
+        'candles': n,
+        'train': split,
+        'test': n - max_h - split,
+        'horizons': report,
+        'stages_ms': {name: value * 1000 for name, value in stages.items()},
+        'elapsed_ms': elapsed * 1000,
+        'candles_per_sec': n / elapsed if elapsed > 0 else float('inf'),
+    }
+
+
+def download_klines(symbol, interval='1m', total=5000, client=None):
+    """
+    分页下载最近total根K线（每次最多1000根）
+
+    Returns:
+        ndarray: 形状为 (6, n) 的K线数组
+    """
+    if client is None:
+        from binance_client import binance_client as client
+    start_time = int(time.time() * 1000) - total * INTERVAL_MS[interval]
+    chunks = []
+    while True:
+        chunk = decode_klines(client.klines(symbol, interval, limit=1000, start_time=start_time,
+                                            raw=True))
+        if not chunk.shape[1]:
+            break
+        chunks.append(chunk)
+        if chunk.shape[1] < 1000:
+            break
+        start_time = int(chunk[0, -1]) + INTERVAL_MS[interval]
+    if not chunks:
+        return np.empty((len(COLUMNS), 0))
+    return np.concatenate(chunks, axis=1)[:, -total:]
+
+
+def synthetic_klines(n, seed=0, start_price=100000.0):
+    """生成带轻微动量的随机游走K线，用于离线测试"""
+    rng = np.random.default_rng(seed)
+    r = rng.normal(0, 0.001, n)
+    r[1:] += 0.2 * r[:-1]
+    close = start_price * np.exp(np.cumsum(r))
+    open_ = np.concatenate(([start_price], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.0005, n)) * close
+    return np.vstack([
+        np.arange(n) * 60_000.0,
+        open_,
+        np.maximum(open_, close) + spread,
+        np.minimum(open_, close) - spread,
+        close,
+        rng.uniform(1, 100, n),
+    ])
+
+
+def print_report(result):
+    print(f"K线: {result['candles']} 根 (训练 {result['train']} / 测试 {result['test']})")
+    print(f"{'周期':<6}{'交易数':>8}{'胜率':>9}{'方向准确率':>12}{'收益':>10}{'最大回撤':>10}")
+    for name, r in result['horizons'].items():
+        print(f"{name:<6}{r['trades']:>8}{r['hit_rate']:>9.1%}{r['direction_accuracy']:>12.1%}"
+              f"{r['pnl']:>10.2%}{r['max_drawdown']:>10.2%}")
+    stages = ', '.join(f"{k} {v:.1f}ms" for k, v in result['stages_ms'].items())
+    print(f"耗时: {result['elapsed_ms']:.1f}ms ({stages})")
+    print(f"吞吐量: {result['candles_per_sec']:,.0f} 根K线/秒")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='预测 + 凯莉仓位回测')
+    parser.add_argument('--symbol', default='BTCUSDT')
+    parser.add_argument('--interval', default='1m')
+    parser.add_argument('--candles', type=int, default=5000)
+    parser.add_argument('--synthetic', type=int, default=0, help='使用N根模拟K线（离线）')
+    parser.add_argument('--train-ratio', type=float, default=0.5)
+    parser.add_argument('--fraction', type=float, default=DEFAULT_FRACTION)
+    parser.add_argument('--cap', type=float, default=DEFAULT_CAP)
+    parser.add_argument('--fee', type=float, default=0.001)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        klines = synthetic_klines(args.synthetic)
+    else:
+        klines = download_klines(args.symbol, args.interval, args.candles)
+
+    result = run_backtest(klines, train_ratio=args.train_ratio, fraction=args.fraction,
+                          cap=args.cap, fee=args.fee)
+    print_report(result)
+
+
+if __name__ == '__main__':
+    main()
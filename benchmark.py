@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+端到端延迟基准测试
+在本地模拟交易所上无界面运行预测界面的 获取 → 解析 → 计算排队 → 指标 → 预测 →
+结果回到UI线程 → 渲染 全流程（指标和预测与应用一样经compute_engine在计算线程执行），
+统计各阶段 p50/p95/p99，可保存为基准并与之对比
+
+渲染需要OpenGL：有显示器时创建隐藏窗口；没有DISPLAY/WAYLAND_DISPLAY的Linux上
+默认使用SDL的offscreen驱动（需要EGL），两者都不可用时无法运行
+
+用法:
+    python benchmark.py --iterations 200 --latency 0.02
+    python benchmark.py --mode cold --candles 1000 --save-baseline bench.json
+    python benchmark.py --baseline bench.json --threshold 0.15
+"""
+
+import argparse
+import json
+import os
+import platform as host_platform
+import time
+
+# 命令行工具，不让Kivy解析参数；窗口隐藏，只做离屏渲染
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+if (host_platform.system() == 'Linux' and not os.environ.get('DISPLAY')
+        and not os.environ.get('WAYLAND_DISPLAY')):
+    # 没有显示器（服务器、CI）时不连接X11，直接离屏创建GL上下文
+    os.environ.setdefault('SDL_VIDEODRIVER', 'offscreen')
+
+from kivy.config import Config
+Config.set('graphics', 'window_state', 'hidden')
+# 不限帧率，等待计算结果回到UI线程时不会被帧间隔拖慢
+Config.set('graphics', 'maxfps', '0')
+
+from kivy.clock import Clock
+import numpy as np
+
+from kline_store import KlineRingBuffer, decode_klines
+from mock_servers import MockBinanceServer
+
+STAGES = ('fetch', 'parse', 'queue', 'indicators', 'compute', 'deliver', 'render', 'total', 'widgets')
+
+# 低于该耗时差（毫秒）的变化视为噪声，不算回归
+NOISE_FLOOR_MS = 0.05
+
+
+def percentiles(samples):
+    """
+    Returns:
+        dict: p50/p95/p99/mean/max（毫秒）和样本数
+    """
+    from perf_trace import percentile
+
+    if len(samples) == 0:
+        return {'n': 0}
+    # 与诊断界面同一口径（最近秩法），取到的都是实际样本
+    ordered = sorted(samples)
+    p50, p95, p99 = (percentile(ordered, q) for q in (50, 95, 99))
+    samples = np.asarray(samples, dtype=np.float64)
+    return {
+        'n': int(samples.size),
+        'p50': float(p50),
+        'p95': float(p95),
+        'p99': float(p99),
+        'mean': float(samples.mean()),
+        'max': float(samples.max()),
+    }
+
+
+def _setup_window():
+    """创建隐藏窗口；系统没有中文字体时用Kivy自带字体代替，只影响字形不影响流程"""
+    from kivy.base import EventLoop
+    from kivy.core.text import LabelBase
+
+    from crypto_mobile_optimized import setup_chinese_font
+
+    if not setup_chinese_font():
+        LabelBase.register(name='Chinese', fn_regular='data/fonts/Roboto-Regular.ttf')
+    EventLoop.ensure_window()
+    return EventLoop
+
+
+def run_benchmark(server_url, iterations=100, warmup=5, candles=1000, mode='warm',
+                  coin='BTC', widgets=True):
+    """
+    运行基准测试
+
+    Args:
+        server_url: 模拟交易所地址
+        mode: warm 为稳态（增量K线、增量指标），cold 为每轮清空缓冲区和模型的冷启动路径
+        queue为提交到计算线程开始执行的等待，deliver为计算完成到UI线程收到结果
+        widgets: 是否每轮额外测量一次预测界面的构建和首帧
+
+    Returns:
+        dict: config 和各阶段的分位数统计
+    """
+    from binance_client import BinanceClient
+    from compute_engine import compute_engine
+    from crypto_mobile_optimized import PredictionScreen
+    from prediction_engine import prediction_engine
+    from symbol_registry import symbol_registry
+
+    event_loop = _setup_window()
+    window = event_loop.window
+
+    client = BinanceClient(base_url=server_url)
+    client.session.trust_env = False  # 本地服务器不走系统代理
+
+    screen = PredictionScreen(coin)
+    window.add_widget(screen)
+    symbol = screen.symbol
+    buffer = KlineRingBuffer(candles)
+    samples = {stage: [] for stage in STAGES}
+
+    def compute(buffer, price):
+        # 与 PredictionScreen._compute 相同，在计算线程中同步指标并推理
+        started = time.perf_counter()
+        with prediction_engine.lock:
+            prediction_engine.sync(symbol, buffer)
+            t_indicators = time.perf_counter()
+            _, rows, _ = screen._result_rows(price)
+        return rows, (started, t_indicators, time.perf_counter())
+
+    def run_compute(buffer, price):
+        """提交计算并等待结果经Clock回到UI线程"""
+        delivered = []
+        compute_engine.submit(
+            ('benchmark', symbol), compute, buffer, price,
+            on_success=lambda result: delivered.append((result, time.perf_counter())),
+            on_error=lambda e: delivered.append((e, None)),
+            name='benchmark'
+        )
+        # 只执行Clock回调不绘制，等待期间的空帧不计入渲染
+        while not delivered:
+            Clock.tick()
+        result, t_delivered = delivered[0]
+        if t_delivered is None:
+            raise result
+        rows, times = result
+        return rows, times + (t_delivered,)
+
+    for i in range(warmup + iterations):
+        if mode == 'cold' or i == 0:
+            buffer = KlineRingBuffer(candles)
+            prediction_engine.reset()
+
+        start = time.perf_counter()
+        data = client.klines(symbol, '1m', limit=min(candles, 1000), start_time=buffer.last_open_time,
+                             raw=True)
+        price = client.ticker_price(symbol)
+        t_fetch = time.perf_counter()
+
+        buffer.ingest(decode_klines(data))
+        t_parse = time.perf_counter()
+
+        rows, (t_started, t_indicators, t_compute, t_delivered) = run_compute(buffer, price)
+
+        screen._render_results(price, rows)
+        event_loop.idle()
+        t_render = time.perf_counter()
+
+        widget_ms = None
+        if widgets:
+            t = time.perf_counter()
+            extra = PredictionScreen(coin)
+            window.add_widget(extra)
+            event_loop.idle()
+            widget_ms = (time.perf_counter() - t) * 1000
+            window.remove_widget(extra)
+            symbol_registry.unregister(symbol, extra._on_price)
+
+        if i < warmup:
+            continue
+        samples['fetch'].append((t_fetch - start) * 1000)
+        samples['parse'].append((t_parse - t_fetch) * 1000)
+        samples['queue'].append((t_started - t_parse) * 1000)
+        samples['indicators'].append((t_indicators - t_started) * 1000)
+        samples['compute'].append((t_compute - t_indicators) * 1000)
+        samples['deliver'].append((t_delivered - t_compute) * 1000)
+        samples['render'].append((t_render - t_delivered) * 1000)
+        samples['total'].append((t_render - start) * 1000)
+        if widget_ms is not None:
+            samples['widgets'].append(widget_ms)
+
+    window.remove_widget(screen)
+    symbol_registry.unregister(symbol, screen._on_price)
+    return {
+        'config': {
+            'iterations': iterations,
+            'warmup': warmup,
+            'candles': candles,
+            'mode': mode,
+            'symbol': symbol,
+            'python': host_platform.python_version(),
+            'machine': host_platform.machine(),
+        },
+        'stages': {stage: percentiles(values) for stage, values in samples.items() if values},
+    }
+
+
+def compare(result, baseline, threshold=0.1):
+    """
+    与基准对比 p50/p95
+
+    Returns:
+        list: [(阶段, 指标, 基准毫秒, 当前毫秒, 变化比例)]，只包含超过阈值的回归
+    """
+    regressions = []
+    for stage, current in result['stages'].items():
+        base = baseline.get('stages', {}).get(stage)
+        if not base or not current.get('n'):
+            continue
+        for metric in ('p50', 'p95'):
+            old, new = base[metric], current[metric]
+            change = new / old - 1.0 if old > 0 else 0.0
+            if change > threshold and new - old > NOISE_FLOOR_MS:
+                regressions.append((stage, metric, old, new, change))
+    return regressions
+
+
+def print_report(result, baseline=None):
+    config = result['config']
+    print(f"模式: {config['mode']}，K线: {config['candles']}，轮数: {config['iterations']}"
+          f"（预热 {config['warmup']}）")
+    header = f"{'阶段':<12}{'p50':>9}{'p95':>9}{'p99':>9}{'平均':>9}{'最大':>9}"
+    if baseline:
+        header += f"{'基准p50':>10}{'变化':>9}"
+    print(header)
+    for stage, stats in result['stages'].items():
+        line = (f"{stage:<12}{stats['p50']:>9.2f}{stats['p95']:>9.2f}{stats['p99']:>9.2f}"
+                f"{stats['mean']:>9.2f}{stats['max']:>9.2f}")
+        base = (baseline or {}).get('stages', {}).get(stage)
+        if base:
+            change = stats['p50'] / base['p50'] - 1.0 if base['p50'] > 0 else 0.0
+            line += f"{base['p50']:>10.2f}{change:>+9.1%}"
+        print(line)
+    print('单位: 毫秒')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='端到端延迟基准测试（本地模拟交易所）')
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--candles', type=int, default=1000, help='K线缓冲区容量和请求数量')
+    parser.add_argument('--mode', choices=('warm', 'cold'), default='warm')
+    parser.add_argument('--latency', type=float, default=0.0, help='模拟网络延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='额外随机延迟上限（秒）')
+    parser.add_argument('--no-widgets', action='store_true', help='不测量界面构建')
+    parser.add_argument('--save-baseline', help='把结果保存为基准JSON')
+    parser.add_argument('--baseline', help='与基准JSON对比')
+    parser.add_argument('--threshold', type=float, default=0.1, help='回归阈值（比例）')
+    args = parser.parse_args()
+
+    server = MockBinanceServer(latency=args.latency, jitter=args.jitter,
+                               history=max(args.candles, 1000) + 1000).start()
+    try:
+        result = run_benchmark(server.url, args.iterations, args.warmup, args.candles,
+                               args.mode, widgets=not args.no_widgets)
+    finally:
+        server.stop()
+    result['config'].update(latency=args.latency, jitter=args.jitter)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=1)
+        print(f"已保存基准: {args.save_baseline}")
+
+    if baseline:
+        regressions = compare(result, baseline, args.threshold)
+        for stage, metric, old, new, change in regressions:
+            print(f"回归: {stage} {metric} {old:.2f}ms -> {new:.2f}ms ({change:+.1%})")
+        if regressions:
+            raise SystemExit(1)
+        print(f"未发现超过 {args.threshold:.0%} 的回归")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+币安REST客户端
+全局共享一个带连接池的会话，复用TCP/TLS连接，并提供超时、重试、请求权重调度和连接统计
+"""
+
+import json
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from kivy.logger import Logger
+
+from perf_trace import perf_trace
+from rate_governor import RateGovernor, INTERACTIVE
+
+BASE_URL = 'https://api.binance.com'
+
+# 各接口超时（连接超时, 读取超时），单位秒
+ENDPOINT_TIMEOUTS = {
+    '/api/v3/ping': (3, 5),
+    '/api/v3/ticker/price': (5, 10),
+    '/api/v3/klines': (5, 15),
+}
+DEFAULT_TIMEOUT = (5, 10)
+
+# 各接口的请求权重，按参数区分的在 request_weight() 中计算
+ENDPOINT_WEIGHTS = {
+    '/api/v3/ping': 1,
+    '/api/v3/klines': 2,
+}
+
+# 可重试的HTTP状态码（418为封禁，不重试）
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def request_weight(path, params=None):
+    """估算请求权重，与币安现货接口文档一致"""
+    params = params or {}
+    if path == '/api/v3/ticker/price':
+        return 2 if 'symbol' in params else 4
+    if path == '/api/v3/ticker/24hr':
+        if 'symbol' in params:
+            return 2
+        if 'symbols' not in params:
+            return 80
+        count = len(json.loads(params['symbols']))
+        return 2 if count <= 20 else 40 if count <= 100 else 80
+    if path == '/api/v3/depth':
+        limit = int(params.get('limit', 100))
+        if limit <= 100:
+            return 5
+        if limit <= 500:
+            return 25
+        if limit <= 1000:
+            return 50
+        return 250
+    return ENDPOINT_WEIGHTS.get(path, 1)
+
+
+class BinanceAPIError(Exception):
+    """币安接口返回非200状态码"""
+
+    def __init__(self, status_code, message=''):
+        self.status_code = status_code
+        self.message = message
+        super().__init__(f"HTTP {status_code} {message}".strip())
+
+
+class ConnectionStats:
+    """连接统计：请求数、新建连接数、握手耗时"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.connections = 0
+            self.retries = 0
+            self.handshake_total = 0.0
+            self.handshake_max = 0.0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_connect(self, elapsed):
+        """记录一次新建连接（TCP + TLS握手）"""
+        with self._lock:
+            self.connections += 1
+            self.handshake_total += elapsed
+            self.handshake_max = max(self.handshake_max, elapsed)
+
+    def snapshot(self):
+        """
+        获取统计快照
+
+        Returns:
+            dict: reused为复用已有连接的请求数，saved_ms为按平均握手耗时估算节省的时间
+        """
+        with self._lock:
+            reused = max(self.requests - self.connections, 0)
+            avg = self.handshake_total / self.connections if self.connections else 0.0
+            return {
+                'requests': self.requests,
+                'connections': self.connections,
+                'reused': reused,
+                'reuse_rate': reused / self.requests if self.requests else 0.0,
+                'retries': self.retries,
+                'handshake_avg_ms': avg * 1000,
+                'handshake_max_ms': self.handshake_max * 1000,
+                'saved_ms': reused * avg * 1000,
+            }
+
+
+class _PooledAdapter(HTTPAdapter):
+    """为连接池注入计时连接类，统计每次握手耗时"""
+
+    def __init__(self, stats, **kwargs):
+        self._stats = stats
+        self._pool_classes = self._build_pool_classes(stats)
+        super().__init__(**kwargs)
+
+    @staticmethod
+    def _build_pool_classes(stats):
+        def timed(base):
+            class TimedConnection(base):
+                def connect(self):
+                    start = time.perf_counter()
+                    super().connect()
+                    elapsed = time.perf_counter() - start
+                    stats.record_connect(elapsed)
+                    # DNS + TCP + TLS
+                    perf_trace.record('connect', elapsed * 1000, host=self.host)
+            return TimedConnection
+
+        return {
+            'http': type('TimedHTTPConnectionPool', (HTTPConnectionPool,),
+                         {'ConnectionCls': timed(HTTPConnection)}),
+            'https': type('TimedHTTPSConnectionPool', (HTTPSConnectionPool,),
+                          {'ConnectionCls': timed(HTTPSConnection)}),
+        }
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = self._pool_classes
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        if proxy.lower().startswith('http'):
+            manager.pool_classes_by_scheme = self._pool_classes
+        return manager
+
+
+class BinanceClient:
+    """币安REST客户端（线程安全，可在后台线程中并发调用）"""
+
+    def __init__(self, base_url=BASE_URL, max_retries=3, backoff_base=0.3,
+                 backoff_cap=5.0, pool_maxsize=8, governor=None):
+        """
+        Args:
+            governor: 请求权重调度器，默认新建一个（每个接口地址的额度独立计算）
+        """
+        self.base_url = base_url.rstrip('/')
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.stats = ConnectionStats()
+        self.governor = governor or RateGovernor()
+
+        self.session = requests.Session()
+        adapter = _PooledAdapter(self.stats, pool_connections=4, pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _backoff(self, attempt, retry_after=None):
+        """指数退避 + 全抖动"""
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def request(self, path, params=None, timeout=None, priority=INTERACTIVE):
+        """
+        发送GET请求，失败时按抖动退避重试
+
+        发送前向调度器申请请求权重，额度不足时等待；后台请求等待过久直接放弃
+
+        Args:
+            path: 接口路径，如 /api/v3/ping
+            params: 查询参数
+            timeout: 超时，默认按接口配置
+            priority: INTERACTIVE（用户操作）或 BACKGROUND（后台刷新）
+
+        Returns:
+            requests.Response: 状态码为200的响应
+
+        Raises:
+            RateLimitedError: 额度不足或被限流，请求被放弃
+        """
+        timeout = timeout or ENDPOINT_TIMEOUTS.get(path, DEFAULT_TIMEOUT)
+        url = self.base_url + path
+        weight = request_weight(path, params)
+        start = time.perf_counter()
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            self.governor.acquire(weight, priority)
+            self.stats.record_request()
+            try:
+                response = self.session.get(url, params=params, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if last_attempt:
+                    raise
+                delay = self._backoff(attempt)
+                Logger.warning(f"BinanceClient: {path} 连接失败，{delay:.2f}秒后重试 - {e}")
+            else:
+                self.governor.update(response.status_code, response.headers)
+                # 发出请求到收到响应头（网络往返 + 服务器处理）
+                perf_trace.record('server', response.elapsed.total_seconds() * 1000,
+                                  path=path, status=response.status_code)
+                if response.status_code == 200:
+                    perf_trace.record('request', (time.perf_counter() - start) * 1000,
+                                      path=path, attempts=attempt + 1)
+                    return response
+                if response.status_code not in RETRY_STATUS or last_attempt:
+                    raise BinanceAPIError(response.status_code, response.text[:200])
+                if response.status_code == 429:
+                    # Retry-After已交给调度器，下次acquire时等待或放弃
+                    delay = 0.0
+                else:
+                    retry_after = response.headers.get('Retry-After')
+                    delay = self._backoff(attempt, float(retry_after) if retry_after else None)
+                Logger.warning(
+                    f"BinanceClient: {path} HTTP {response.status_code}，{delay:.2f}秒后重试"
+                )
+            self.stats.record_retry()
+            time.sleep(delay)
+
+    def get(self, path, params=None, timeout=None, priority=INTERACTIVE):
+        """发送GET请求并解析JSON"""
+        return self.request(path, params, timeout, priority).json()
+
+    def ping(self):
+        """测试连通性"""
+        self.get('/api/v3/ping')
+        return True
+
+    def ticker_price(self, symbol, priority=INTERACTIVE):
+        """
+        获取单个交易对最新价格
+
+        Args:
+            symbol: 交易对，如 BTCUSDT
+        """
+        data = self.get('/api/v3/ticker/price', {'symbol': symbol}, priority=priority)
+        return float(data['price'])
+
+    def ticker_prices(self, symbols, priority=INTERACTIVE):
+        """
+        一次请求批量获取多个交易对最新价格
+
+        Args:
+            symbols: 交易对列表，如 ['BTCUSDT', 'ETHUSDT']
+
+        Returns:
+            dict: {交易对: 价格}
+        """
+        symbols = list(symbols)
+        if len(symbols) == 1:
+            return {symbols[0]: self.ticker_price(symbols[0], priority)}
+        data = self.get('/api/v3/ticker/price',
+                        {'symbols': json.dumps(symbols, separators=(',', ':'))}, priority=priority)
+        return {item['symbol']: float(item['price']) for item in data}
+
+    def ticker_24hr(self, symbols=None, priority=INTERACTIVE):
+        """
+        批量获取24小时行情（MINI类型，只含价格和成交量）
+
+        Args:
+            symbols: 交易对列表，不指定则返回全部交易对（权重80）
+
+        Returns:
+            dict: {交易对: (最新价, 24小时涨跌幅, 24小时成交额)}
+        """
+        params = {'type': 'MINI'}
+        if symbols is not None:
+            params['symbols'] = json.dumps(list(symbols), separators=(',', ':'))
+        data = self.get('/api/v3/ticker/24hr', params, priority=priority)
+        result = {}
+        for item in data:
+            last, open_ = float(item['lastPrice']), float(item['openPrice'])
+            change = last / open_ - 1.0 if open_ > 0 else 0.0
+            result[item['symbol']] = (last, change, float(item['quoteVolume']))
+        return result
+
+    def depth(self, symbol, limit=100, priority=INTERACTIVE):
+        """
+        获取深度快照
+
+        Args:
+            symbol: 交易对
+            limit: 档位数，权重随档位增加（100档为5）
+
+        Returns:
+            dict: {'lastUpdateId': 序号, 'bids': [[价格, 数量], ...], 'asks': [...]}
+        """
+        return self.get('/api/v3/depth', {'symbol': symbol, 'limit': limit}, priority=priority)
+
+    def klines(self, symbol, interval='1m', limit=500, start_time=None, priority=INTERACTIVE,
+               raw=False):
+        """
+        获取K线
+
+        Args:
+            symbol: 交易对
+            interval: 周期，如 1m、5m、1h
+            limit: 条数（最多1000）
+            start_time: 起始开盘时间（毫秒）
+            raw: 返回未解析的响应体，交给 kline_store.decode_klines 直接解码为数组
+
+        Returns:
+            list: 币安原始K线数组，raw为True时为bytes
+        """
+        params = {'symbol': symbol, 'interval': interval, 'limit': limit}
+        if start_time is not None:
+            params['startTime'] = int(start_time)
+        if raw:
+            return self.request('/api/v3/klines', params, priority=priority).content
+        return self.get('/api/v3/klines', params, priority=priority)
+
+
+# 全局共享客户端
+binance_client = BinanceClient()
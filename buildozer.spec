@@ -15,12 +15,19 @@ source.dir = .
 # (list) Source files to include (let empty to include all the files)
 source.include_exts = py,png,jpg,kv,atlas,ttf
 
+# (list) List of directory to exclude (let empty to not exclude anything)
+source.exclude_dirs = tests
+
+# (list) List of exclusions using pattern matching
+# 模拟服务器、基准测试和回测是开发工具，不打包进APK
+source.exclude_patterns = mock_servers.py,benchmark.py,backtest.py
+
 # (str) Application versioning (method 1)
 version = 1.0
 
 # (list) Application requirements
 # comma separated e.g. requirements = sqlite3,kivy
-requirements = python3,kivy,requests,plyer
+requirements = python3,kivy,requests,plyer,websockets,numpy,sqlite3,sortedcontainers
 
 # (str) Presplash of the application
 #presplash.filename = %(source.dir)s/data/presplash.png
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地K线历史
+用SQLite按 (交易对, 周期, 开盘时间) 持久化K线，启动时只需补齐最新一根之后的数据
+"""
+
+import sqlite3
+import threading
+
+import numpy as np
+
+from kivy.logger import Logger
+
+from kline_store import COLUMNS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candles (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    open_time INTEGER NOT NULL,
+    open REAL NOT NULL,
+    high REAL NOT NULL,
+    low REAL NOT NULL,
+    close REAL NOT NULL,
+    volume REAL NOT NULL,
+    PRIMARY KEY (symbol, interval, open_time)
+) WITHOUT ROWID
+"""
+
+
+class CandleHistory:
+    """
+    K线历史数据库
+
+    主键即 (交易对, 周期, 开盘时间) 的B树索引，读取最近N根只扫描索引末尾，
+    不需要解析整个文件
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: 数据库文件路径，':memory:' 为内存数据库
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def last_open_time(self, symbol, interval='1m'):
+        """已保存的最新K线开盘时间（毫秒），没有数据时返回None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT MAX(open_time) FROM candles WHERE symbol=? AND interval=?',
+                (symbol, interval)
+            ).fetchone()
+        return row[0]
+
+    def save(self, symbol, interval, columns):
+        """
+        保存K线，开盘时间相同的覆盖（未收盘K线的更新）
+
+        Args:
+            columns: 形状为 (6, n) 的数组，按COLUMNS顺序排列
+        """
+        columns = np.asarray(columns, dtype=np.float64)
+        if columns.shape[1] == 0:
+            return
+        rows = zip(
+            (symbol,) * columns.shape[1], (interval,) * columns.shape[1],
+            columns[0].astype(np.int64).tolist(), *(c.tolist() for c in columns[1:])
+        )
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows
+            )
+            self._conn.commit()
+
+    def load_recent(self, symbol, interval='1m', n=1000):
+        """
+        读取最近n根K线
+
+        Returns:
+            ndarray: 形状为 (6, n) 的数组，按时间从旧到新排列
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT open_time, open, high, low, close, volume FROM candles '
+                'WHERE symbol=? AND interval=? ORDER BY open_time DESC LIMIT ?',
+                (symbol, interval, n)
+            ).fetchall()
+        if not rows:
+            return np.empty((len(COLUMNS), 0))
+        return np.array(rows[::-1], dtype=np.float64).T
+
+    def prune(self, symbol, interval='1m', keep=10000):
+        """只保留最近keep根K线"""
+        with self._lock:
+            self._conn.execute(
+                'DELETE FROM candles WHERE symbol=? AND interval=? AND open_time < ('
+                'SELECT open_time FROM candles WHERE symbol=? AND interval=? '
+                'ORDER BY open_time DESC LIMIT 1 OFFSET ?)',
+                (symbol, interval, symbol, interval, keep - 1)
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.close()
+            except sqlite3.Error as e:
+                Logger.warning(f"CandleHistory: 关闭数据库失败 - {e}")
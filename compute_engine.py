@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台计算引擎
+指标同步、模型推理等CPU任务在计算线程中按优先级执行，结果通过Clock交回UI线程；
+任务按键去重，新任务可取代同键的旧任务，已取消或被取代的结果不会回调到界面
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+from kivy.clock import Clock
+from kivy.logger import Logger
+
+from rate_governor import INTERACTIVE
+
+
+class ComputeTask:
+    """计算任务句柄"""
+
+    def __init__(self, key, name, priority):
+        self.key = key
+        self.name = name
+        self.priority = priority
+        self.call = None  # (函数, 位置参数, 关键字参数)
+        self.callbacks = None  # (on_success, on_error)
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+
+    def cancel(self):
+        """
+        取消任务
+
+        尚未开始的任务不再执行；已在执行或已算完尚未回调的任务，结果会被丢弃
+        """
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def done(self):
+        return self._done.is_set()
+
+
+class ComputeEngine:
+    """
+    带优先级的计算线程池
+
+    数值计算大部分时间在NumPy中释放GIL，用线程即可与UI线程并行，
+    且能直接读取K线缓冲区和模型，不需要像进程池那样序列化数据
+    """
+
+    def __init__(self, max_workers=2):
+        self.max_workers = max_workers
+        self._queue = []  # [(优先级, 序号, 任务)]
+        self._seq = itertools.count()
+        self._current = {}  # 键 -> 最新提交且未完成的任务
+        self._cond = threading.Condition()
+        self._workers = []
+        self._running = False
+        self.stats = {'submitted': 0, 'deduped': 0, 'cancelled': 0, 'dropped': 0, 'completed': 0}
+
+    def _start_workers(self):
+        # 在持有 self._cond 时调用
+        if self._running:
+            return
+        self._running = True
+        self._workers = [
+            threading.Thread(target=self._worker, name=f'compute-{i}', daemon=True)
+            for i in range(self.max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, key, func, *args, priority=INTERACTIVE, replace=True,
+               on_success=None, on_error=None, name=None, **kwargs):
+        """
+        提交计算任务
+
+        Args:
+            key: 任务键，如 ('predict', 'BTCUSDT')，同键同时只保留一个任务
+            func: 在计算线程中执行的函数
+            priority: INTERACTIVE（用户操作）优先于 BACKGROUND（后台刷新）
+            replace: 同键已有未完成任务时，True取消旧任务并提交新任务（输入已更新），
+                     False直接返回旧任务（重复提交）
+            on_success: 成功回调 callback(result)，在UI线程执行
+            on_error: 失败回调 callback(exception)，在UI线程执行
+            name: 任务名称（用于日志）
+
+        Returns:
+            ComputeTask: 任务句柄
+        """
+        with self._cond:
+            previous = self._current.get(key)
+            if previous is not None and not previous.done() and not previous.cancelled:
+                if not replace:
+                    self.stats['deduped'] += 1
+                    return previous
+                previous.cancel()
+                self.stats['cancelled'] += 1
+
+            task = ComputeTask(key, name or getattr(func, '__name__', 'compute'), priority)
+            task.call = (func, args, kwargs)
+            task.callbacks = (on_success, on_error)
+            self._current[key] = task
+            heapq.heappush(self._queue, (priority, next(self._seq), task))
+            self.stats['submitted'] += 1
+            self._start_workers()
+            self._cond.notify()
+        return task
+
+    def cancel(self, key):
+        """
+        取消指定键的任务
+
+        Returns:
+            bool: 是否有未完成的任务被取消
+        """
+        with self._cond:
+            task = self._current.pop(key, None)
+            if task is None or task.done() or task.cancelled:
+                return False
+            task.cancel()
+            self.stats['cancelled'] += 1
+            return True
+
+    def cancel_all(self):
+        with self._cond:
+            keys = list(self._current)
+        for key in keys:
+            self.cancel(key)
+
+    @property
+    def pending_count(self):
+        """排队和执行中的任务数量"""
+        with self._cond:
+            return sum(1 for task in self._current.values() if not task.done())
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                _, _, task = heapq.heappop(self._queue)
+            if task.cancelled:
+                self._finish(task)
+                continue
+
+            func, args, kwargs = task.call
+            task.call = None
+            try:
+                result, error = func(*args, **kwargs), None
+            except Exception as e:
+                result, error = None, e
+            self._deliver(task, result, error)
+
+    def _finish(self, task):
+        # 结果交给回调或被丢弃后才算完成，在此之前 cancel() 仍然有效
+        task.call = None
+        with self._cond:
+            task._done.set()
+            if self._current.get(task.key) is task:
+                del self._current[task.key]
+
+    def _deliver(self, task, result, error):
+        """把结果调度回UI线程；被取消或取代的任务结果直接丢弃"""
+        with self._cond:
+            cancelled = task.cancelled
+            self.stats['dropped' if cancelled else 'completed'] += 1
+        if cancelled:
+            self._finish(task)
+            Logger.debug(f"ComputeEngine: 丢弃过期结果 - {task.name}")
+            return
+        on_success, on_error = task.callbacks
+        if error is not None:
+            Logger.warning(f"ComputeEngine: 计算失败 - {task.name}: {error}")
+            callback, value = on_error, error
+        else:
+            callback, value = on_success, result
+        if callback is None:
+            self._finish(task)
+            return
+
+        def deliver(dt):
+            # 回调前再次检查，计算结束到回调之间任务可能已被取消（如离开界面）
+            self._finish(task)
+            if task.cancelled:
+                with self._cond:
+                    self.stats['dropped'] += 1
+                return
+            callback(value)
+
+        Clock.schedule_once(deliver, 0)
+
+    def snapshot(self):
+        with self._cond:
+            stats = dict(self.stats)
+            stats['queued'] = len(self._queue)
+        return stats
+
+    def shutdown(self, timeout=0):
+        """
+        取消所有任务并停止计算线程
+
+        Args:
+            timeout: 等待正在执行的计算结束的最长秒数，0表示不等待
+        """
+        self.cancel_all()
+        with self._cond:
+            self._running = False
+            self._queue.clear()
+            self._cond.notify_all()
+            workers = self._workers
+        if timeout > 0:
+            deadline = time.monotonic() + timeout
+            for worker in workers:
+                worker.join(max(0.0, deadline - time.monotonic()))
+
+
+# 全局计算引擎实例
+compute_engine = ComputeEngine()
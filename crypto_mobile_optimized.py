@@ -5,8 +5,10 @@
 支持弹窗提示和震动功能
 """
 
+from startup_timer import startup_timer
+
 import os
-import requests
+import time
 from datetime import datetime
 
 from kivy.app import App
@@ -14,14 +16,24 @@ from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.label import Label
 from kivy.uix.button import Button
 from kivy.uix.screenmanager import ScreenManager, Screen
-from kivy.uix.gridlayout import GridLayout
-from kivy.uix.scrollview import ScrollView
-from kivy.uix.popup import Popup
 from kivy.clock import Clock
 from kivy.core.text import LabelBase
 from kivy.core.window import Window
 from kivy.metrics import dp
 from kivy.utils import platform
+from kivy.logger import Logger
+
+from fetch_engine import fetch_engine
+from perf_trace import perf_trace
+from ui_scheduler import ui_scheduler
+
+# numpy、requests、websockets及预测相关模块较重，在首次使用时才导入，不占用冷启动时间
+
+# 预测界面对应的币种，界面在首次进入时才创建
+COINS = ('BTC', 'ETH')
+
+# 退出时等待后台请求和计算结束的最长秒数，之后才关闭本地K线数据库
+SHUTDOWN_TIMEOUT = 2.0
 
 # 设置移动端窗口大小和属性
 def setup_mobile_window():
@@ -40,26 +52,17 @@ def setup_mobile_window():
 
 # 震动功能
 def vibrate(duration=0.1):
-    """震动功能"""
-    try:
-        if platform == 'android':
-            from jnius import autoclass
-            PythonActivity = autoclass('org.kivy.android.PythonActivity')
-            Context = autoclass('android.content.Context')
-            activity = PythonActivity.mActivity
-            vibrator = activity.getSystemService(Context.VIBRATOR_SERVICE)
-            vibrator.vibrate(int(duration * 1000))
-        else:
-            # 桌面端模拟震动（打印提示）
-            print(f"📳 震动 {duration}秒")
-    except Exception as e:
-        print(f"震动功能不可用: {e}")
+    """震动功能，由反馈调度器在后台执行并合并连续的震动"""
+    from mobile_features import feedback
+    feedback.vibrate(duration)
 
 # 弹窗提示类
 class CustomPopup:
     @staticmethod
     def show_info(title, message, callback=None):
         """显示信息弹窗"""
+        from kivy.uix.popup import Popup
+
         content = BoxLayout(orientation='vertical', spacing=dp(10), padding=dp(20))
         
         # 消息文本
@@ -104,6 +107,8 @@ class CustomPopup:
     @staticmethod
     def show_confirm(title, message, on_yes=None, on_no=None):
         """显示确认弹窗"""
+        from kivy.uix.popup import Popup
+
         content = BoxLayout(orientation='vertical', spacing=dp(10), padding=dp(20))
         
         # 消息文本
@@ -185,6 +190,10 @@ def setup_chinese_font():
         return False
     return False
 
+def format_price(price):
+    """价格显示格式，高价币不显示小数"""
+    return f"{price:.0f}" if price >= 1000 else f"{price:.2f}"
+
 # 设置代理
 def setup_proxy():
     if 'HTTP_PROXY' not in os.environ:
@@ -256,17 +265,39 @@ class MainScreen(Screen):
             font_name='Chinese'
         )
         eth_btn.bind(on_press=self.go_to_eth)
+
+        # 行情列表按钮
+        watchlist_btn = Button(
+            text='📋 行情列表',
+            size_hint_y=None,
+            height=dp(50),
+            background_color=(0.3, 0.7, 0.5, 1),
+            font_size=dp(14),
+            font_name='Chinese'
+        )
+        watchlist_btn.bind(on_press=self.go_to_watchlist)
+
+        # 价格提醒按钮
+        alerts_btn = Button(
+            text='🔔 价格提醒',
+            size_hint_y=None,
+            height=dp(50),
+            background_color=(0.9, 0.5, 0.3, 1),
+            font_size=dp(14),
+            font_name='Chinese'
+        )
+        alerts_btn.bind(on_press=self.go_to_alerts)
         
-        # 设置按钮
-        settings_btn = Button(
-            text='⚙️ 设置',
+        # 性能诊断按钮
+        diagnostics_btn = Button(
+            text='📊 性能诊断',
             size_hint_y=None,
             height=dp(50),
             background_color=(0.6, 0.6, 0.6, 1),
             font_size=dp(14),
             font_name='Chinese'
         )
-        settings_btn.bind(on_press=self.show_settings)
+        diagnostics_btn.bind(on_press=self.show_diagnostics)
         
         # 测试按钮
         test_btn = Button(
@@ -297,7 +328,9 @@ class MainScreen(Screen):
         # 添加组件到按钮布局
         button_layout.add_widget(btc_btn)
         button_layout.add_widget(eth_btn)
-        button_layout.add_widget(settings_btn)
+        button_layout.add_widget(watchlist_btn)
+        button_layout.add_widget(alerts_btn)
+        button_layout.add_widget(diagnostics_btn)
         button_layout.add_widget(test_btn)
         
         # 添加到主布局
@@ -309,46 +342,90 @@ class MainScreen(Screen):
     
     def go_to_btc(self, instance):
         vibrate(0.05)  # 按钮点击震动
-        self.manager.current = 'btc'
+        App.get_running_app().show_prediction('BTC')
     
     def go_to_eth(self, instance):
         vibrate(0.05)
-        self.manager.current = 'eth'
+        App.get_running_app().show_prediction('ETH')
     
-    def show_settings(self, instance):
+    def go_to_watchlist(self, instance):
         vibrate(0.05)
-        CustomPopup.show_info(
-            "设置", 
-            "设置功能开发中...\n\n当前版本支持:\n• BTC/ETH预测\n• 实时价格获取\n• 凯莉公式建议"
-        )
+        App.get_running_app().show_watchlist()
+
+    def go_to_alerts(self, instance):
+        vibrate(0.05)
+        App.get_running_app().show_alerts()
+
+    def show_diagnostics(self, instance):
+        vibrate(0.05)
+        App.get_running_app().show_diagnostics()
     
     def test_network(self, instance):
+        from binance_client import binance_client
+
         vibrate(0.05)
         self.status_label.text = '🔄 正在测试网络连接...'
-        Clock.schedule_once(self._test_network_async, 0.1)
+        # 在后台线程中请求，避免阻塞UI
+        fetch_engine.submit(
+            binance_client.ping,
+            on_success=self._on_network_result,
+            on_error=self._on_network_error,
+            name='ping'
+        )
     
-    def _test_network_async(self, dt):
-        try:
-            response = requests.get('https://api.binance.com/api/v3/ping', timeout=5)
-            if response.status_code == 200:
-                self.status_label.text = '✅ 网络连接正常！'
-                CustomPopup.show_info("网络测试", "✅ 网络连接正常！\n可以正常获取市场数据")
-                vibrate(0.2)  # 成功震动
-            else:
-                self.status_label.text = f'❌ 网络连接异常: {response.status_code}'
-                CustomPopup.show_info("网络测试", f"❌ 网络连接异常\n状态码: {response.status_code}")
-        except Exception as e:
-            error_msg = str(e)[:50] + "..." if len(str(e)) > 50 else str(e)
-            self.status_label.text = f'❌ 连接失败: {error_msg}'
-            CustomPopup.show_info("网络测试", f"❌ 连接失败\n错误信息: {error_msg}")
-            vibrate(0.3)  # 错误震动
+    def _on_network_result(self, result):
+        from binance_client import binance_client
+
+        stats = binance_client.stats.snapshot()
+        Logger.info(
+            f"BinanceClient: 连接复用 {stats['reused']}/{stats['requests']}，"
+            f"平均握手 {stats['handshake_avg_ms']:.0f}ms"
+        )
+        self.status_label.text = '✅ 网络连接正常！'
+        CustomPopup.show_info("网络测试", "✅ 网络连接正常！\n可以正常获取市场数据")
+        vibrate(0.2)  # 成功震动
+    
+    def _on_network_error(self, e):
+        from binance_client import BinanceAPIError
+
+        if isinstance(e, BinanceAPIError):
+            self.status_label.text = f'❌ 网络连接异常: {e.status_code}'
+            CustomPopup.show_info("网络测试", f"❌ 网络连接异常\n状态码: {e.status_code}")
+            return
+        error_msg = str(e)[:50] + "..." if len(str(e)) > 50 else str(e)
+        self.status_label.text = f'❌ 连接失败: {error_msg}'
+        CustomPopup.show_info("网络测试", f"❌ 连接失败\n错误信息: {error_msg}")
+        vibrate(0.3)  # 错误震动
 
 class PredictionScreen(Screen):
-    def __init__(self, coin_type, **kwargs):
+    def __init__(self, coin_type, keep=True, **kwargs):
+        """
+        Args:
+            coin_type: 币种，如 BTC
+            keep: 离开后是否保留界面；从行情列表打开的其他币种为False，
+                  离开时释放，打开过的交易对不会一直占用推送和控件
+        """
+        from kivy.uix.scrollview import ScrollView
+        from prediction_engine import prediction_engine
+        from result_cards import ResultCards
+        from symbol_registry import symbol_registry, to_symbol
+
         super().__init__(**kwargs)
         self.coin_type = coin_type
         self.name = coin_type.lower()
+        self.symbol = to_symbol(coin_type)
+        self.keep = keep
         self.is_loading = False
+        self.indicators = prediction_engine.indicator(self.symbol)
+        self._kelly_sizes = []
+        self._pending_price = None
+        self._pending_age = None  # 待显示价格来自缓存时的缓存时长
+        self._klines_ready = False
+        self._analysis_digest = None
+        self._quiet = False  # 后台刷新已显示的快照，不显示加载提示和弹窗
+        self._compute_task = None
+        self._book_event = None
+        symbol_registry.register(self.symbol, self._on_price)
 
         # 主布局 - 移动端优化
         main_layout = BoxLayout(
@@ -415,17 +492,15 @@ class PredictionScreen(Screen):
         )
         self.result_layout.bind(minimum_height=self.result_layout.setter('height'))
 
+        # 结果卡片池，刷新时原地更新文字
+        self.cards = ResultCards(self.result_layout)
+
         # 初始提示 - 移动端友好
-        initial_label = Label(
-            text=f'📊 点击"分析"开始{coin_type}预测\n\n功能特色:\n• 10分钟、30分钟、60分钟预测\n• 实时价格数据\n• 凯莉公式仓位建议\n• 智能震动提醒',
-            size_hint_y=None,
-            height=dp(120),
+        self.cards.show_message(
+            f'📊 点击"分析"开始{coin_type}预测\n\n功能特色:\n• 10分钟、30分钟、60分钟预测\n• 实时价格数据\n• 凯莉公式仓位建议\n• 智能震动提醒',
             color=(0.8, 0.8, 0.8, 1),
-            halign='center',
-            font_size=dp(12),
-            font_name='Chinese'
+            height=dp(120)
         )
-        self.result_layout.add_widget(initial_label)
 
         scroll.add_widget(self.result_layout)
 
@@ -435,12 +510,76 @@ class PredictionScreen(Screen):
 
         self.add_widget(main_layout)
 
+        # 有上次的结果时直接显示，不必等待确认和网络请求
+        self._show_snapshot()
+
     def go_back(self, instance):
         vibrate(0.05)
         self.manager.current = 'main'
 
+    def on_enter(self, *args):
+        from order_book import order_books
+
+        # 只在查看时维护订单簿，盘口特征每秒刷新一次
+        order_books.watch(self.symbol)
+        self._refresh_book()
+        self._book_event = Clock.schedule_interval(self._refresh_book, 1.0)
+
+    def _refresh_book(self, *args):
+        from order_book import order_books, format_features
+
+        ui_scheduler.call(('book', self.symbol), self.cards.set_book,
+                          format_features(order_books.features(self.symbol)))
+
+    def on_leave(self, *args):
+        from compute_engine import compute_engine
+        from order_book import order_books
+
+        # 离开界面后不再接收增量深度
+        if self._book_event is not None:
+            self._book_event.cancel()
+            self._book_event = None
+        ui_scheduler.cancel(('book', self.symbol))
+        order_books.unwatch(self.symbol)
+
+        # 离开界面时取消计算和等待中的数据，之后到达的结果不会再写入控件
+        busy = self.is_loading or self._compute_task is not None
+        compute_engine.cancel(('predict', self.symbol))
+        self._compute_task = None
+        self.is_loading = False
+        self._quiet = False
+        self.predict_btn.text = '🔄 分析'
+        self.predict_btn.disabled = False
+        if busy and not self.cards.showing_results:
+            self.cards.show_message('⏹ 已取消\n\n点击"分析"重新开始', color=(0.8, 0.8, 0.8, 1))
+
+        if not self.keep:
+            self.release()
+
+    def release(self):
+        """取消价格监听并移除界面，再次打开时重新创建"""
+        from symbol_registry import symbol_registry
+
+        ui_scheduler.cancel(('price', self.symbol))
+        ui_scheduler.cancel(('analysis', self.symbol))
+        symbol_registry.release(self.symbol, self._on_price)
+        if self.manager is not None:
+            self.manager.remove_widget(self)
+
+    def _show_snapshot(self):
+        """显示上次保存的结果（标记为旧数据），同时在后台刷新"""
+        from result_snapshot import result_snapshot
+
+        snapshot = result_snapshot.get(self.symbol)
+        if snapshot is None:
+            return False
+        price, rows, age = snapshot
+        self._render_results(price, rows, cache_age=age, stale=True)
+        self._start_prediction(quiet=True)
+        return True
+
     def get_prediction(self, instance):
-        if self.is_loading:
+        if self.is_loading or self._compute_task is not None:
             return
 
         # 确认弹窗
@@ -453,218 +592,498 @@ class PredictionScreen(Screen):
             on_yes=start_analysis
         )
 
-    def _start_prediction(self):
+    def _start_prediction(self, quiet=False):
+        """
+        获取价格和K线并计算预测
+
+        Args:
+            quiet: 后台刷新已显示的快照，等价格和K线都更新后直接替换，
+                   不显示加载提示、震动和弹窗
+        """
+        from kline_store import kline_store
+        from price_cache import price_cache, FRESH, STALE
+        from rate_governor import BACKGROUND, INTERACTIVE
+        from symbol_registry import symbol_registry
+
+        # 确认弹窗可能被连续点开，已在分析时不重复开始
+        if self.is_loading or self._compute_task is not None:
+            return
+
+        # 后台同步K线历史，用于计算技术指标
+        self._pending_price = None
+        self._pending_age = None
+        self._klines_ready = False
+        self._quiet = quiet
+        priority = BACKGROUND if quiet else INTERACTIVE
+        kline_store.refresh(self.symbol, on_success=self._on_klines, on_error=self._on_klines_error,
+                            priority=priority)
+
+        price, age, state = price_cache.get(('price', self.symbol))
+        Logger.debug(f"PriceCache: {self.symbol} {state} {price_cache.stats()}")
+        if quiet:
+            self.is_loading = True
+            self.predict_btn.text = '⏳ 刷新'
+            self.predict_btn.disabled = True
+            if state == FRESH:
+                self._pending_price = price
+                self._maybe_display()
+            else:
+                symbol_registry.refresh(on_error=self._on_price_error, priority=BACKGROUND)
+            return
+
+        # 有缓存时不再等待价格，K线补齐后即显示；过期缓存同时在后台刷新
+        if state in (FRESH, STALE):
+            self.is_loading = True
+            self.predict_btn.text = '⏳ 分析中'
+            self.predict_btn.disabled = True
+            self._pending_price = price
+            self._pending_age = age
+            if state == STALE:
+                symbol_registry.refresh(priority=BACKGROUND)
+            self._maybe_display()
+            return
+
         self.is_loading = True
         self.predict_btn.text = '⏳ 分析中'
         self.predict_btn.disabled = True
 
-        # 清空之前的结果
-        self.result_layout.clear_widgets()
-
         # 显示加载状态 - 移动端优化
-        loading_label = Label(
-            text=f'🤖 正在分析{self.coin_type}市场趋势...\n📈 获取实时数据中\n⏰ 请稍候...',
-            size_hint_y=None,
-            height=dp(80),
+        self.cards.show_message(
+            f'🤖 正在分析{self.coin_type}市场趋势...\n📈 获取实时数据中\n⏰ 请稍候...',
             color=(1, 1, 0, 1),
-            halign='center',
-            font_size=dp(14),
-            font_name='Chinese'
+            font_size=dp(14)
         )
-        self.result_layout.add_widget(loading_label)
 
         # 震动提示开始分析
         vibrate(0.15)
 
-        # 异步获取数据
-        Clock.schedule_once(self._get_prediction_async, 1.0)
+        # 批量刷新所有已注册交易对，价格通过监听回调分发到各界面
+        symbol_registry.refresh(on_error=self._on_price_error)
 
-    def _get_prediction_async(self, dt):
-        try:
-            # 获取实时价格
-            symbol = f"{self.coin_type}USDT"
-            response = requests.get(
-                f'https://api.binance.com/api/v3/ticker/price?symbol={symbol}',
-                timeout=10
-            )
+    def _on_price(self, symbol, price):
+        if not self.is_loading:
+            # 其他界面触发的批量刷新，只更新已显示的价格
+            if self.cards.showing_results:
+                # 推送再快，价格标签每帧也只重绘一次
+                ui_scheduler.call(('price', self.symbol), self.cards.set_price,
+                                  f'💰 {self.coin_type}: ${price:.2f}')
+            return
+        self._pending_price = price
+        self._pending_age = None
+        self._maybe_display()
+
+    def _on_klines(self, buffer):
+        # 指标在计算线程中与推理一起同步
+        self._klines_ready = True
+        self._maybe_display()
+
+    def _on_klines_error(self, e):
+        Logger.warning(f"PredictionScreen: {self.symbol} K线获取失败 - {e}")
+        self._klines_ready = True
+        self._maybe_display()
+
+    def _maybe_display(self):
+        """价格和K线都到达后显示结果"""
+        if not self.is_loading or self._pending_price is None or not self._klines_ready:
+            return
+        quiet = self._quiet
+        self._display_results(self._pending_price, cache_age=self._pending_age)
+        if not quiet:
+            # 成功获取数据的震动
+            vibrate(0.2)
 
-            if response.status_code == 200:
-                data = response.json()
-                price = float(data['price'])
-                self._display_results(price)
-                # 成功获取数据的震动
-                vibrate(0.2)
-            else:
-                self.show_error(f"获取价格失败: HTTP {response.status_code}")
+    def _on_price_error(self, e):
+        from binance_client import BinanceAPIError
 
-        except Exception as e:
+        if not self.is_loading:
+            return
+        if isinstance(e, BinanceAPIError):
+            self.show_error(f"获取价格失败: HTTP {e.status_code}")
+        else:
             self.show_error(f"网络错误: {str(e)}")
 
-    def _display_results(self, current_price):
+    def _build_predictions(self, current_price):
+        """
+        所有已注册交易对一次批量推理，取出本交易对的各周期结果
+
+        Returns:
+            tuple: (PredictionEngine.predict() 的结果, [(周期, 上涨概率, 趋势, 理由, 目标区间), ...])
+        """
+        import numpy as np
+
+        from kelly import position_sizes
+        from prediction_engine import prediction_engine
+        from symbol_registry import symbol_registry
+
+        prices = {s: symbol_registry.get_price(s) for s in symbol_registry.symbols}
+        prices[self.symbol] = current_price
+        symbols = [s for s, price in prices.items() if price is not None]
+        result = prediction_engine.predict(symbols, prices)
+        Logger.debug(f"PredictionEngine: {result['timings']}")
+
+        horizons = result['horizons']
+        if self.symbol not in result['symbols']:
+            # 没有K线数据时只显示指标说明
+            self._kelly_sizes = np.zeros(len(horizons))
+            return result, [(f"{h}分钟", 0.5, *self.indicators.describe(h), '--') for h in horizons]
+
+        # 凯莉仓位：所有交易对和周期一次向量化计算
+        sizes = position_sizes(result['p_up'], result['up_move'], result['down_move'])
+        row = result['symbols'].index(self.symbol)
+        self._kelly_sizes = sizes[row]
+        return result, [
+            (f"{h}分钟", result['p_up'][row, j], *self.indicators.describe(h),
+             f"{format_price(result['low'][row, j])}-{format_price(result['high'][row, j])}")
+            for j, h in enumerate(horizons)
+        ]
+
+    def _result_rows(self, current_price):
+        """
+        预测结果：趋势和理由由技术指标生成，概率和目标价由预测引擎批量推理
+
+        Returns:
+            tuple: (各周期上涨概率, 卡片文字 [(周期, 概率, 趋势, 目标, 仓位, 理由), ...],
+                    PredictionEngine.predict() 的结果)
+        """
+        from kelly import format_advice
+
+        with perf_trace.span('compute', symbol=self.symbol):
+            result, predictions = self._build_predictions(current_price)
+            kelly_advice = [format_advice(size) for size in self._kelly_sizes]
+            rows = [
+                (period, f"⬆️{up * 100:.0f}% ⬇️{(1 - up) * 100:.0f}%", trend, target, kelly, reason)
+                for (period, up, trend, reason, target), kelly in zip(predictions, kelly_advice)
+            ]
+        return [up for _, up, _, _, _ in predictions], rows, result
+
+    def _render_results(self, current_price, rows, cache_age=None, stale=False):
+        """
+        显示时间、价格和预测卡片 - 移动端布局
+
+        Args:
+            cache_age: 价格缓存的时长（秒）
+            stale: 上次保存的结果，显示保存时间，cache_age为距保存的秒数
+        """
+        if stale:
+            saved = datetime.fromtimestamp(time.time() - cache_age).strftime("%m-%d %H:%M")
+            current_time = f'{saved} (上次结果)'
+        else:
+            current_time = datetime.now().strftime("%m-%d %H:%M")
+            if cache_age is not None:
+                current_time += f' (缓存 {cache_age:.0f}秒前)'
+        with perf_trace.span('render', symbol=self.symbol):
+            self.cards.show_results(f'📅 {current_time}', f'💰 {self.coin_type}: ${current_price:.2f}', rows)
+
+    def _display_results(self, current_price, cache_age=None):
+        """
+        数据已齐，在计算线程中同步指标并推理，结果回到UI线程后显示
+
+        同一交易对的新计算取代未完成的旧计算，旧结果直接丢弃
+        """
+        from compute_engine import compute_engine
+        from rate_governor import BACKGROUND, INTERACTIVE
+
+        self.is_loading = False
+        self.predict_btn.text = '⏳ 计算中'
+        self.predict_btn.disabled = True
+        quiet, self._quiet = self._quiet, False
+        self._compute_task = compute_engine.submit(
+            ('predict', self.symbol), self._compute, current_price,
+            priority=BACKGROUND if quiet else INTERACTIVE,
+            on_success=lambda result: self._on_computed(current_price, cache_age, quiet, result),
+            on_error=lambda e: self._on_compute_error(quiet, e),
+            name=f'predict:{self.symbol}'
+        )
+
+    def _compute(self, current_price):
+        """同步指标并生成预测结果（在计算线程执行）"""
+        from kline_store import kline_store
+        from prediction_engine import prediction_engine
+
+        buffer = kline_store.buffer(self.symbol)
+        with prediction_engine.lock:
+            if len(buffer):
+                # 首次全量向量化计算，之后只增量更新新收盘的K线
+                with perf_trace.span('indicators', symbol=self.symbol):
+                    prediction_engine.sync(self.symbol, buffer)
+            return self._result_rows(current_price)
+
+    def _on_compute_error(self, quiet, e):
+        self._compute_task = None
+        self._quiet = quiet
+        self.show_error(f"计算失败: {e}")
+
+    def _on_computed(self, current_price, cache_age, quiet, computed):
+        from alert_engine import alert_engine
+        from result_snapshot import result_snapshot
+
         # 重置按钮
+        self._compute_task = None
         self.predict_btn.text = '🔄 分析'
         self.predict_btn.disabled = False
-        self.is_loading = False
 
-        # 清空加载状态
-        self.result_layout.clear_widgets()
+        p_up, rows, prediction = computed
+        # 概率提醒在UI线程判断，通知和提示音不会从计算线程发出
+        alert_engine.on_prediction(prediction)
+        self._render_results(current_price, rows, cache_age)
+        self._request_analysis(p_up)
+        # 保存在内存中，切到后台或退出时写入文件
+        result_snapshot.put(self.symbol, current_price, rows)
 
-        # 显示当前时间和价格 - 移动端布局
-        current_time = datetime.now().strftime("%m-%d %H:%M")
+        if quiet:
+            return
+        # 显示完成提示
+        CustomPopup.show_info("分析完成", f"✅ {self.coin_type}市场分析完成！\n\n已为您生成3个时间段的预测结果和仓位建议")
 
-        # 价格信息卡片
-        price_card = BoxLayout(orientation='vertical', size_hint_y=None, height=dp(80))
+    def _request_analysis(self, p_up):
+        """把行情摘要发给AI，分析文字流式显示在结果下方"""
+        from kline_store import kline_store
+        from llm_client import llm_client, market_summary, window_hash, SUMMARY_WINDOW
+        from prediction_engine import prediction_engine
 
-        time_label = Label(
-            text=f'📅 {current_time}',
-            size_hint_y=None,
-            height=dp(25),
-            font_size=dp(12),
-            color=(0.7, 0.7, 0.7, 1),
-            font_name='Chinese'
-        )
+        if not llm_client.enabled or not self.indicators.values:
+            return
+        closed = kline_store.buffer(self.symbol).snapshot(SUMMARY_WINDOW + 1)[:, :-1]
+        if closed.shape[1] < 16:
+            return
 
-        price_label = Label(
-            text=f'💰 {self.coin_type}: ${current_price:.2f}',
-            size_hint_y=None,
-            height=dp(40),
-            font_size=dp(16),
-            color=(0, 1, 0, 1),
-            font_name='Chinese'
+        # 窗口内没有新收盘K线时命中缓存，相同请求合并
+        digest = window_hash(closed)
+        self._analysis_digest = digest
+        summary = market_summary(self.symbol, closed, self.indicators.values,
+                                 prediction_engine.horizons, p_up)
+        ui_scheduler.cancel(('analysis', self.symbol))
+        self.cards.set_analysis('🤖 AI分析中...')
+        llm_client.analyze(
+            self.symbol, summary, digest,
+            on_token=lambda text: self._on_analysis(digest, text),
+            on_done=lambda text: self._on_analysis(digest, text),
+            on_error=lambda e: self._on_analysis(digest, 'AI分析暂不可用')
         )
 
-        price_card.add_widget(time_label)
-        price_card.add_widget(price_label)
-        self.result_layout.add_widget(price_card)
+    def _on_analysis(self, digest, text):
+        # 忽略已被新请求取代的结果
+        if digest == self._analysis_digest:
+            ui_scheduler.call(('analysis', self.symbol), self.cards.set_analysis, f'🤖 {text}')
 
-        # 分隔线
-        separator = Label(
-            text='━' * 30,
-            size_hint_y=None,
-            height=dp(20),
-            color=(0.5, 0.5, 0.5, 1),
-            font_size=dp(10)
-        )
-        self.result_layout.add_widget(separator)
+    def show_error(self, error_msg):
+        # 重置按钮
+        self.predict_btn.text = '🔄 分析'
+        self.predict_btn.disabled = False
+        self.is_loading = False
+        if self._quiet:
+            # 后台刷新失败时保留已显示的快照
+            self._quiet = False
+            Logger.warning(f"PredictionScreen: {self.symbol} 后台刷新失败 - {error_msg}")
+            return
 
-        # 预测结果标题
-        title_label = Label(
-            text='🤖 AI预测结果',
-            size_hint_y=None,
-            height=dp(35),
-            font_size=dp(16),
-            color=(1, 1, 1, 1),
-            font_name='Chinese'
+        # 显示错误
+        self.cards.show_message(
+            f'❌ {error_msg}\n\n请检查网络连接或稍后重试',
+            color=(1, 0.3, 0.3, 1)
         )
-        self.result_layout.add_widget(title_label)
 
-        # 模拟预测结果 - 移动端优化显示
-        predictions = [
-            ("10分钟", "⬆️65% ⬇️35%", "上升", "95000-96000", "技术指标显示短期看涨"),
-            ("30分钟", "⬆️55% ⬇️45%", "震荡", "94000-97000", "市场情绪谨慎，预期震荡"),
-            ("60分钟", "⬆️45% ⬇️55%", "下跌", "92000-95000", "获利回吐压力增加")
-        ]
+        # 错误震动和弹窗
+        vibrate(0.3)
+        CustomPopup.show_info("分析失败", f"❌ {error_msg}\n\n请检查网络连接后重试")
 
-        kelly_advice = ["做多📈 12.5%", "做多📈 8.5%", "做空📉 6.5%"]
+class DiagnosticsScreen(Screen):
+    """性能诊断：各阶段耗时、缓存命中率、帧耗时分布和内存，显示期间每秒刷新"""
+
+    # 界面显示的阶段及说明，顺序即数据流经的顺序
+    STAGES = (
+        ('connect', '建立连接(DNS+TCP+TLS)'),
+        ('server', '服务器响应'),
+        ('request', '请求总耗时'),
+        ('parse', 'K线解析'),
+        ('indicators', '指标计算'),
+        ('compute', '预测推理'),
+        ('render', '结果渲染'),
+        ('ui_flush', '界面批量更新'),
+        ('screen_build', '界面构建'),
+    )
 
-        for i, ((period, prob, trend, target, reason), kelly) in enumerate(zip(predictions, kelly_advice)):
-            # 预测卡片
-            pred_card = BoxLayout(orientation='vertical', size_hint_y=None, height=dp(100))
+    def __init__(self, **kwargs):
+        from kivy.uix.scrollview import ScrollView
 
-            # 时间段和概率
-            period_label = Label(
-                text=f'{period}: {prob}',
-                size_hint_y=None,
-                height=dp(25),
-                color=(1, 1, 1, 1),
-                font_size=dp(13),
-                font_name='Chinese'
-            )
+        super().__init__(**kwargs)
+        self.name = 'diagnostics'
+        self._refresh_event = None
 
-            # 趋势和目标价
-            trend_label = Label(
-                text=f'趋势: {trend} | 目标: {target}',
-                size_hint_y=None,
-                height=dp(25),
-                color=(0.9, 0.9, 0.9, 1),
-                font_size=dp(12),
-                font_name='Chinese'
-            )
+        main_layout = BoxLayout(
+            orientation='vertical',
+            padding=[dp(15), dp(10), dp(15), dp(10)],
+            spacing=dp(8)
+        )
 
-            # 凯莉建议
-            kelly_label = Label(
-                text=f'仓位建议: {kelly}',
-                size_hint_y=None,
-                height=dp(25),
-                color=(0.8, 1, 0.8, 1),
-                font_size=dp(12),
-                font_name='Chinese'
-            )
+        top_layout = BoxLayout(
+            orientation='horizontal',
+            size_hint_y=None,
+            height=dp(50),
+            spacing=dp(10)
+        )
 
-            # 理由
-            reason_label = Label(
-                text=f'理由: {reason}',
-                size_hint_y=None,
-                height=dp(25),
-                color=(0.8, 0.8, 0.8, 1),
-                font_size=dp(11),
-                font_name='Chinese'
-            )
+        back_btn = Button(
+            text='← 返回',
+            size_hint_x=None,
+            width=dp(70),
+            background_color=(0.6, 0.6, 0.6, 1),
+            font_size=dp(14),
+            font_name='Chinese'
+        )
+        back_btn.bind(on_press=self.go_back)
 
-            pred_card.add_widget(period_label)
-            pred_card.add_widget(trend_label)
-            pred_card.add_widget(kelly_label)
-            pred_card.add_widget(reason_label)
-
-            self.result_layout.add_widget(pred_card)
-
-            # 分隔线
-            if i < len(predictions) - 1:
-                mini_sep = Label(
-                    text='- ' * 15,
-                    size_hint_y=None,
-                    height=dp(15),
-                    color=(0.3, 0.3, 0.3, 1),
-                    font_size=dp(8)
-                )
-                self.result_layout.add_widget(mini_sep)
-
-        # 底部提示
-        footer_label = Label(
-            text='💡 仅供参考，投资有风险，决策需谨慎',
-            size_hint_y=None,
-            height=dp(40),
-            color=(1, 0.8, 0.2, 1),
-            font_size=dp(11),
+        title = Label(
+            text='性能诊断',
+            font_size=dp(18),
+            color=(1, 1, 1, 1),
             font_name='Chinese'
         )
-        self.result_layout.add_widget(footer_label)
 
-        # 显示完成提示
-        CustomPopup.show_info("分析完成", f"✅ {self.coin_type}市场分析完成！\n\n已为您生成3个时间段的预测结果和仓位建议")
+        export_btn = Button(
+            text='💾 导出',
+            size_hint_x=None,
+            width=dp(80),
+            background_color=(0.2, 0.6, 0.9, 1),
+            font_size=dp(14),
+            font_name='Chinese'
+        )
+        export_btn.bind(on_press=self.export_trace)
 
-    def show_error(self, error_msg):
-        # 重置按钮
-        self.predict_btn.text = '🔄 分析'
-        self.predict_btn.disabled = False
-        self.is_loading = False
+        top_layout.add_widget(back_btn)
+        top_layout.add_widget(title)
+        top_layout.add_widget(export_btn)
 
-        # 显示错误
-        self.result_layout.clear_widgets()
-        error_label = Label(
-            text=f'❌ {error_msg}\n\n请检查网络连接或稍后重试',
+        scroll = ScrollView(do_scroll_x=False, do_scroll_y=True, scroll_type=['content'])
+
+        # 统计为纯文本，刷新只替换一个Label的文字
+        self.report_label = Label(
+            text='',
             size_hint_y=None,
-            height=dp(80),
-            color=(1, 0.3, 0.3, 1),
-            halign='center',
+            halign='left',
+            valign='top',
             font_size=dp(12),
+            color=(0.85, 0.85, 0.85, 1),
             font_name='Chinese'
         )
-        self.result_layout.add_widget(error_label)
+        self.report_label.bind(
+            width=lambda label, width: setattr(label, 'text_size', (width, None)),
+            texture_size=lambda label, size: setattr(label, 'height', size[1])
+        )
+        scroll.add_widget(self.report_label)
+
+        main_layout.add_widget(top_layout)
+        main_layout.add_widget(scroll)
+        self.add_widget(main_layout)
+
+    def on_enter(self, *args):
+        self.refresh()
+        self._refresh_event = Clock.schedule_interval(self.refresh, 1.0)
+
+    def on_leave(self, *args):
+        if self._refresh_event is not None:
+            self._refresh_event.cancel()
+            self._refresh_event = None
+
+    def go_back(self, instance):
+        vibrate(0.05)
+        self.manager.current = 'main'
+
+    def refresh(self, *args):
+        self.report_label.text = self.format_report(perf_trace.snapshot())
+
+    def format_report(self, snapshot):
+        """把 perf_trace.snapshot() 整理成显示文字"""
+        stages = snapshot['stages']
+        sources = snapshot['sources']
+        lines = ['⏱ 阶段耗时 (ms)   最近 / p50 / p95 / 最大 / 次数']
+        for stage, label in self.STAGES:
+            stats = stages.get(stage)
+            if stats is None:
+                lines.append(f'{label}: --')
+                continue
+            lines.append(
+                f"{label}: {stats['last']:.1f} / {stats['p50']:.1f} / {stats['p95']:.1f}"
+                f" / {stats['max']:.1f} / {stats['total']}"
+            )
+
+        lines.append('')
+        lines.append('📦 缓存')
+        cache = sources.get('price_cache')
+        if cache:
+            lines.append(
+                f"价格缓存: 命中率 {cache['hit_rate']:.0%}（新鲜 {cache['hits']}，"
+                f"过期 {cache['stale_hits']}，未命中 {cache['misses']}）"
+            )
+        http = sources.get('http')
+        if http:
+            lines.append(f"连接复用: {http['reused']}/{http['requests']}，"
+                         f"平均握手 {http['handshake_avg_ms']:.0f}ms")
+        llm = sources.get('llm')
+        if llm:
+            lookups = llm['hits'] + llm['merged'] + llm['requests']
+            rate = (llm['hits'] + llm['merged']) / lookups if lookups else 0.0
+            lines.append(f"AI分析: 复用率 {rate:.0%}（缓存 {llm['hits']}，合并 {llm['merged']}，"
+                         f"请求 {llm['requests']}，失败 {llm['errors']}）")
+
+        rate = sources.get('rate')
+        if rate:
+            lines.append('')
+            tokens = ' '.join(f'{window} {left:.0f}' for window, left in rate['tokens'].items())
+            lines.append(f"🚦 请求额度: 剩余 {tokens}，已放行 {rate['granted']}，"
+                         f"延后 {rate['delayed']}，放弃 {rate['shed']}")
+        ui = sources.get('ui')
+        if ui:
+            lines.append(f"🖌 界面更新: 登记 {ui['requested']}，合并 {ui['coalesced']}，"
+                         f"写入 {ui['applied']}，顺延 {ui['spilled']}，单帧最长 {ui['max_ms']:.1f}ms")
+        compute = sources.get('compute')
+        if compute:
+            lines.append(f"🧮 计算任务: 完成 {compute['completed']}，取消 {compute['cancelled']}，"
+                         f"丢弃过期结果 {compute['dropped']}，合并 {compute['deduped']}")
+        stream = sources.get('stream')
+        if stream:
+            lines.append(f"📡 行情推送: {'已连接' if stream['connected'] else '未连接'}，"
+                         f"消息 {stream['messages']}，丢弃 {stream['dropped']}，重连 {stream['reconnects']}")
+        book = sources.get('book')
+        if book and book['books']:
+            lines.append(f"📖 订单簿: 已同步 {book['synced']}/{book['books']}，增量 {book['updates']}，"
+                         f"快照 {book['snapshots']}，重新同步 {book['resyncs']}")
+
+        frames = sources.get('frames')
+        if frames and frames['frames']:
+            lines.append('')
+            lines.append(f"🎞 帧耗时: p50 {frames['p50']:.1f}ms，p95 {frames['p95']:.1f}ms，"
+                         f"掉帧 {frames['janky']}/{frames['frames']}")
+            peak = max(frames['histogram'].values()) or 1
+            for bucket, count in frames['histogram'].items():
+                bar = '█' * int(round(20 * count / peak))
+                lines.append(f"{bucket:>8} {bar} {count}")
+
+        memory = sources.get('memory')
+        if memory:
+            lines.append('')
+            lines.append('🧠 内存: ' + '，'.join(
+                f"{'当前' if key == 'rss_mb' else '峰值'} {value:.0f}MB" for key, value in memory.items()
+            ))
+
+        startup = sources.get('startup')
+        if startup:
+            lines.append('🚀 启动: ' + '，'.join(f'{k} {v:.0f}ms' for k, v in startup.items()))
+        return '\n'.join(lines)
+
+    def export_trace(self, instance):
+        """导出完整统计和最近的明细到应用数据目录"""
+        vibrate(0.05)
+        app = App.get_running_app()
+        path = os.path.join(app.user_data_dir, 'traces',
+                            datetime.now().strftime('trace-%Y%m%d-%H%M%S.json'))
+        try:
+            perf_trace.export(path)
+        except OSError as e:
+            CustomPopup.show_info("导出失败", f"❌ {e}")
+            return
+        CustomPopup.show_info("导出完成", f"✅ 已导出到\n{path}")
 
-        # 错误震动和弹窗
-        vibrate(0.3)
-        CustomPopup.show_info("分析失败", f"❌ {error_msg}\n\n请检查网络连接后重试")
 
 class CryptoPredictionApp(App):
     def build(self):
@@ -677,15 +1096,168 @@ class CryptoPredictionApp(App):
         setup_proxy()
         setup_chinese_font()
 
-        # 创建屏幕管理器
+        # 创建屏幕管理器，启动时只创建主界面，预测界面在首次进入时创建
         sm = ScreenManager()
-
-        # 添加屏幕
         sm.add_widget(MainScreen())
-        sm.add_widget(PredictionScreen('BTC'))
-        sm.add_widget(PredictionScreen('ETH'))
+        self._services_started = False
 
+        startup_timer.mark('build')
+        Window.bind(on_flip=self._on_first_frame)
         return sm
 
+    def show_prediction(self, coin_type):
+        """切换到预测界面，不存在时先创建"""
+        name = coin_type.lower()
+        if not self.root.has_screen(name):
+            # 首帧之前就点击时，先启动后台服务，保证K线历史已接入
+            self._start_services()
+            start = time.perf_counter()
+            self.root.add_widget(PredictionScreen(coin_type, keep=coin_type.upper() in COINS))
+            elapsed = (time.perf_counter() - start) * 1000
+            perf_trace.record('screen_build', elapsed, screen=name)
+            Logger.info(f"CryptoPredictionApp: 创建{coin_type}界面 {elapsed:.0f}ms")
+        self.root.current = name
+
+    def show_watchlist(self):
+        """切换到行情列表，不存在时先创建"""
+        if not self.root.has_screen('watchlist'):
+            from watchlist import WatchlistScreen
+
+            self._start_services()
+            start = time.perf_counter()
+            self.root.add_widget(WatchlistScreen())
+            perf_trace.record('screen_build', (time.perf_counter() - start) * 1000, screen='watchlist')
+        self.root.current = 'watchlist'
+
+    def show_alerts(self):
+        """切换到价格提醒界面，不存在时先创建"""
+        if not self.root.has_screen('alerts'):
+            from alert_screen import AlertScreen
+
+            # 规则在后台服务启动时加载，先启动再列出
+            self._start_services()
+            start = time.perf_counter()
+            self.root.add_widget(AlertScreen())
+            perf_trace.record('screen_build', (time.perf_counter() - start) * 1000, screen='alerts')
+        self.root.current = 'alerts'
+
+    @property
+    def alerts_path(self):
+        """价格提醒规则文件"""
+        return os.path.join(self.user_data_dir, 'alerts.json')
+
+    def show_diagnostics(self):
+        """切换到性能诊断界面，不存在时先创建"""
+        if not self.root.has_screen('diagnostics'):
+            start = time.perf_counter()
+            self.root.add_widget(DiagnosticsScreen())
+            perf_trace.record('screen_build', (time.perf_counter() - start) * 1000, screen='diagnostics')
+        self.root.current = 'diagnostics'
+
+    def _on_first_frame(self, *args):
+        # 首帧已经显示，再启动后台服务，避免重模块的导入拖慢首帧
+        Window.unbind(on_flip=self._on_first_frame)
+        startup_timer.mark('first_frame')
+        startup_timer.log()
+        startup_timer.save(os.path.join(self.user_data_dir, 'startup.json'))
+        Clock.schedule_once(self._start_services, 0)
+
+    def _start_services(self, *args):
+        if self._services_started:
+            return
+        self._services_started = True
+
+        from alert_engine import alert_engine
+        from binance_client import binance_client
+        from candle_history import CandleHistory
+        from compute_engine import compute_engine
+        from kline_store import kline_store
+        from llm_client import llm_client
+        from order_book import order_books
+        from perf_trace import frame_monitor, memory_usage
+        from price_cache import price_cache
+        from price_stream import price_stream
+        from rate_governor import BACKGROUND
+        from result_snapshot import result_snapshot
+        from symbol_registry import symbol_registry, to_symbol
+
+        # 上次的预测结果，打开预测界面时先显示
+        result_snapshot.load(os.path.join(self.user_data_dir, 'snapshot.json'))
+
+        # 本地K线历史，启动后只需补齐增量
+        kline_store.history = CandleHistory(os.path.join(self.user_data_dir, 'candles.db'))
+
+        # 预测界面尚未创建时也先注册交易对，价格和K线在后台预热
+        for coin in COINS:
+            symbol_registry.register(to_symbol(coin))
+
+        # AI分析接口配置，未配置密钥时不做AI分析
+        llm_client.load_config(os.path.join(self.user_data_dir, 'llm.json'))
+
+        # 价格提醒规则，有规则的交易对也加入行情推送
+        alert_engine.load(self.alerts_path)
+        for symbol in alert_engine.symbols:
+            symbol_registry.register(symbol, alert_engine.on_price)
+
+        # 启动实时行情推送，持续更新已注册交易对的价格
+        price_stream.on_prices = symbol_registry.update_prices
+        price_stream.on_depth = order_books.on_depth
+        price_stream.start(symbol_registry.symbols)
+
+        # 后台补齐各交易对的K线历史
+        for symbol in symbol_registry.symbols:
+            kline_store.refresh(symbol, priority=BACKGROUND)
+
+        # 诊断界面读取的统计来源；帧耗时统计只是每帧一次回调，常开
+        perf_trace.add_source('startup', startup_timer.report)
+        perf_trace.add_source('http', binance_client.stats.snapshot)
+        perf_trace.add_source('rate', binance_client.governor.snapshot)
+        perf_trace.add_source('price_cache', price_cache.stats)
+        perf_trace.add_source('llm', lambda: dict(llm_client.stats))
+        perf_trace.add_source('stream', price_stream.stats.snapshot)
+        perf_trace.add_source('frames', frame_monitor.snapshot)
+        perf_trace.add_source('memory', memory_usage)
+        perf_trace.add_source('ui', ui_scheduler.snapshot)
+        perf_trace.add_source('compute', compute_engine.snapshot)
+        perf_trace.add_source('book', order_books.snapshot)
+        frame_monitor.start()
+
+    def on_pause(self):
+        # 切到后台后可能被系统直接结束，先保存结果快照
+        from result_snapshot import result_snapshot
+
+        result_snapshot.save()
+        return True
+
+    def on_stop(self):
+        # 退出时取消所有后台请求；后台服务未启动时无需其他清理
+        if not self._services_started:
+            fetch_engine.shutdown()
+            return
+
+        from alert_engine import alert_engine
+        from compute_engine import compute_engine
+        from kline_store import kline_store
+        from price_stream import price_stream
+        from result_snapshot import result_snapshot
+        from symbol_registry import symbol_registry
+
+        # 停止推送并取消所有后台请求和计算，等已在执行的任务结束，
+        # 避免关闭数据库后它们还在写入K线
+        price_stream.stop()
+        fetch_engine.shutdown(timeout=SHUTDOWN_TIMEOUT)
+        compute_engine.shutdown(timeout=SHUTDOWN_TIMEOUT)
+
+        # 保存提醒规则（已触发的一次性规则不再保存）和结果快照
+        alert_engine.save(self.alerts_path)
+        result_snapshot.save()
+        if kline_store.history is not None:
+            for symbol in symbol_registry.symbols:
+                kline_store.history.prune(symbol, keep=kline_store.capacity * 10)
+            kline_store.history.close()
+            kline_store.history = None
+
 if __name__ == '__main__':
+    # 通过 main.py 启动时由入口文件记录导入阶段
+    startup_timer.mark('import')
     CryptoPredictionApp().run()
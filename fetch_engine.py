@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台网络请求引擎
+在工作线程池中执行阻塞的网络请求，通过Clock把结果交回UI线程
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from kivy.clock import Clock
+from kivy.logger import Logger
+
+
+class FetchTask:
+    """后台请求句柄，可随时取消"""
+
+    def __init__(self, name):
+        self.name = name
+        self.future = None
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """
+        取消请求
+
+        尚未开始的请求直接从队列移除；已在执行的请求无法中断，
+        但其结果会被丢弃，不会再回调到UI
+        """
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+
+class FetchEngine:
+    """后台请求引擎，UI线程只负责提交任务和接收回调"""
+
+    def __init__(self, max_workers=8):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._tasks = set()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='fetch'
+                )
+            return self._executor
+
+    def submit(self, func, *args, on_success=None, on_error=None, name=None, **kwargs):
+        """
+        提交后台请求
+
+        Args:
+            func: 在工作线程中执行的阻塞函数
+            on_success: 成功回调 callback(result)，在UI线程执行
+            on_error: 失败回调 callback(exception)，在UI线程执行
+            name: 任务名称（用于日志）
+
+        Returns:
+            FetchTask: 任务句柄
+        """
+        task = FetchTask(name or getattr(func, '__name__', 'fetch'))
+        with self._lock:
+            self._tasks.add(task)
+        task.future = self._get_executor().submit(func, *args, **kwargs)
+        task.future.add_done_callback(
+            lambda future: self._on_done(task, future, on_success, on_error)
+        )
+        return task
+
+    def _on_done(self, task, future, on_success, on_error):
+        """工作线程完成后调用，把结果调度回UI线程"""
+        with self._lock:
+            self._tasks.discard(task)
+
+        if task.cancelled or future.cancelled():
+            Logger.debug(f"FetchEngine: 已取消 - {task.name}")
+            return
+
+        error = future.exception()
+        if error is not None:
+            Logger.warning(f"FetchEngine: 请求失败 - {task.name}: {error}")
+            callback, value = on_error, error
+        else:
+            callback, value = on_success, future.result()
+
+        if callback is None:
+            return
+
+        def deliver(dt):
+            # 回调前再次检查，调度期间任务可能已被取消
+            if not task.cancelled:
+                callback(value)
+
+        Clock.schedule_once(deliver, 0)
+
+    @property
+    def pending_count(self):
+        """进行中的任务数量"""
+        with self._lock:
+            return len(self._tasks)
+
+    def cancel_all(self):
+        """取消所有进行中的任务"""
+        with self._lock:
+            tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+
+    def shutdown(self, timeout=0):
+        """
+        取消所有任务并关闭线程池
+
+        Args:
+            timeout: 等待已在执行的请求结束的最长秒数，0表示不等待
+        """
+        with self._lock:
+            futures = [task.future for task in self._tasks if task.future is not None]
+        self.cancel_all()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if timeout > 0 and futures:
+            wait(futures, timeout)
+
+
+# 全局请求引擎实例
+fetch_engine = FetchEngine()
+
+# 便捷函数
+def submit(func, *args, on_success=None, on_error=None, name=None, **kwargs):
+    """提交后台请求"""
+    return fetch_engine.submit(
+        func, *args, on_success=on_success, on_error=on_error, name=name, **kwargs
+    )
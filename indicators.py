@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+技术指标引擎
+首次加载时对全部历史做向量化计算，之后每根新K线O(1)增量更新
+支持 EMA、RSI、MACD、布林带、ATR、VWAP
+"""
+
+import math
+from collections import deque
+
+import numpy as np
+
+from kline_store import OPEN_TIME, HIGH, LOW, CLOSE, VOLUME
+
+# 分块计算EMA时缩放因子的上限，避免浮点溢出
+_EMA_SCALE_LIMIT = 1e100
+
+
+def ema(x, alpha, init=None):
+    """
+    指数移动平均（向量化）
+
+    y[t] = alpha * x[t] + (1 - alpha) * y[t-1]，按块展开为累加和计算，
+    块长度保证缩放因子不溢出
+
+    Args:
+        x: 一维数组
+        alpha: 平滑系数
+        init: 初始值，默认取x[0]
+    """
+    x = np.asarray(x, dtype=np.float64)
+    out = np.empty_like(x)
+    if x.size == 0:
+        return out
+    decay = 1.0 - alpha
+    if decay <= 0:
+        out[:] = x
+        return out
+    block = max(1, int(math.log(_EMA_SCALE_LIMIT) / -math.log(decay)))
+    state = x[0] if init is None else init
+
+    for start in range(0, x.size, block):
+        chunk = x[start:start + block]
+        k = np.arange(1, chunk.size + 1)
+        powers = decay ** k  # (1-a)^(t+1)
+        # sum_{i<=t} (1-a)^(t-i) * x_i = (1-a)^(t+1) * cumsum(x_i / (1-a)^(i+1))
+        acc = np.cumsum(chunk / powers)
+        out[start:start + chunk.size] = powers * (state + alpha * acc)
+        state = out[start + chunk.size - 1]
+    return out
+
+
+def span_alpha(span):
+    """周期转EMA平滑系数"""
+    return 2.0 / (span + 1)
+
+
+def wilder_alpha(period):
+    """Wilder平滑系数（RSI、ATR）"""
+    return 1.0 / period
+
+
+def rolling_sum(x, window):
+    """滑动窗口求和，前window-1项为NaN"""
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full_like(x, np.nan)
+    if x.size >= window:
+        c = np.cumsum(np.concatenate(([0.0], x)))
+        out[window - 1:] = c[window:] - c[:-window]
+    return out
+
+
+def rsi_averages(close, period=14):
+    """RSI的平均涨幅和平均跌幅（Wilder平滑）"""
+    delta = np.diff(close, prepend=close[0])
+    avg_gain = ema(np.maximum(delta, 0.0), wilder_alpha(period), init=0.0)
+    avg_loss = ema(np.maximum(-delta, 0.0), wilder_alpha(period), init=0.0)
+    return avg_gain, avg_loss
+
+
+def rsi(close, period=14):
+    """相对强弱指数"""
+    return _rsi_from_averages(*rsi_averages(close, period))
+
+
+def _rsi_from_averages(avg_gain, avg_loss):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+        value = 100.0 - 100.0 / (1.0 + rs)
+    return np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), value)
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """
+    MACD
+
+    Returns:
+        tuple: (macd线, 信号线, 柱状图)
+    """
+    line = ema(close, span_alpha(fast)) - ema(close, span_alpha(slow))
+    sig = ema(line, span_alpha(signal))
+    return line, sig, line - sig
+
+
+def bollinger(close, period=20, width=2.0):
+    """
+    布林带
+
+    Returns:
+        tuple: (中轨, 上轨, 下轨)
+    """
+    s = rolling_sum(close, period)
+    s2 = rolling_sum(np.square(close), period)
+    mid = s / period
+    std = np.sqrt(np.maximum(s2 / period - np.square(mid), 0.0))
+    return mid, mid + width * std, mid - width * std
+
+
+def true_range(high, low, close):
+    """真实波幅"""
+    prev_close = np.concatenate(([close[0]], close[:-1]))
+    return np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def atr(high, low, close, period=14):
+    """平均真实波幅"""
+    tr = true_range(high, low, close)
+    return ema(tr, wilder_alpha(period))
+
+
+def vwap(high, low, close, volume, window=60):
+    """滑动窗口成交量加权平均价"""
+    typical = (high + low + close) / 3.0
+    pv = rolling_sum(typical * volume, window)
+    v = rolling_sum(volume, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(v > 0, pv / v, typical)
+
+
+class _RollingWindow:
+    """固定长度窗口的O(1)滑动求和"""
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+
+    def load(self, values):
+        self.values.clear()
+        self.values.extend(float(v) for v in values[-self.size:])
+        self.total = float(sum(self.values))
+
+    def push(self, value):
+        if len(self.values) == self.size:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+
+    @property
+    def full(self):
+        return len(self.values) == self.size
+
+
+class IndicatorEngine:
+    """
+    单个交易对的指标状态
+
+    load() 对历史做一次向量化计算并保存各指标的递推状态，
+    update() 只用上一状态和新K线计算，代价与历史长度无关
+    """
+
+    def __init__(self, ema_fast=12, ema_slow=26, macd_signal=9, rsi_period=14,
+                 bb_period=20, bb_width=2.0, atr_period=14, vwap_window=60):
+        self.ema_fast = ema_fast
+        self.ema_slow = ema_slow
+        self.macd_signal = macd_signal
+        self.rsi_period = rsi_period
+        self.bb_period = bb_period
+        self.bb_width = bb_width
+        self.atr_period = atr_period
+        self.vwap_window = vwap_window
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.last_open_time = None
+        self.values = {}
+        self.prev_values = {}
+        self._state = {}
+        self._rsi_averages = None
+        self._bb = _RollingWindow(self.bb_period)
+        self._bb_sq = _RollingWindow(self.bb_period)
+        self._pv = _RollingWindow(self.vwap_window)
+        self._vol = _RollingWindow(self.vwap_window)
+
+    def series(self, view):
+        """
+        对整段历史向量化计算全部指标
+
+        Args:
+            view: 形状为 (6, n) 的K线数组
+
+        Returns:
+            dict: 指标名 -> 与K线等长的数组
+        """
+        high, low, close, volume = view[HIGH], view[LOW], view[CLOSE], view[VOLUME]
+        line, sig, hist = macd(close, self.ema_fast, self.ema_slow, self.macd_signal)
+        mid, upper, lower = bollinger(close, self.bb_period, self.bb_width)
+        self._rsi_averages = rsi_averages(close, self.rsi_period)
+        return {
+            'close': close,
+            'ema_fast': ema(close, span_alpha(self.ema_fast)),
+            'ema_slow': ema(close, span_alpha(self.ema_slow)),
+            'macd': line,
+            'macd_signal': sig,
+            'macd_hist': hist,
+            'rsi': _rsi_from_averages(*self._rsi_averages),
+            'bb_mid': mid,
+            'bb_upper': upper,
+            'bb_lower': lower,
+            'atr': atr(high, low, close, self.atr_period),
+            'vwap': vwap(high, low, close, volume, self.vwap_window),
+        }
+
+    def load(self, view):
+        """用全部历史初始化（向量化）"""
+        self.reset()
+        if view.shape[1] == 0:
+            return {}
+        close = view[CLOSE]
+        s = self.series(view)
+        avg_gain, avg_loss = self._rsi_averages
+        self._state = {
+            'ema_fast': s['ema_fast'][-1],
+            'ema_slow': s['ema_slow'][-1],
+            'macd_signal': s['macd_signal'][-1],
+            'avg_gain': avg_gain[-1],
+            'avg_loss': avg_loss[-1],
+            'atr': s['atr'][-1],
+            'prev_close': close[-1],
+        }
+        typical = (view[HIGH] + view[LOW] + close) / 3.0
+        self._bb.load(close)
+        self._bb_sq.load(np.square(close))
+        self._pv.load(typical * view[VOLUME])
+        self._vol.load(view[VOLUME])
+
+        self.count = view.shape[1]
+        self.last_open_time = int(view[OPEN_TIME, -1])
+        self.values = {name: float(values[-1]) for name, values in s.items()}
+        if self.count > 1:
+            self.prev_values = {name: float(values[-2]) for name, values in s.items()}
+        return s
+
+    def update(self, candle):
+        """
+        追加一根已收盘K线（O(1)）
+
+        Args:
+            candle: (open_time, open, high, low, close, volume)
+        """
+        if self.count == 0:
+            return self.load(np.asarray(candle, dtype=np.float64).reshape(-1, 1))
+        open_time, _, high, low, close, volume = (float(v) for v in candle)
+        st = self._state
+        prev_close = st['prev_close']
+
+        st['ema_fast'] += span_alpha(self.ema_fast) * (close - st['ema_fast'])
+        st['ema_slow'] += span_alpha(self.ema_slow) * (close - st['ema_slow'])
+        line = st['ema_fast'] - st['ema_slow']
+        st['macd_signal'] += span_alpha(self.macd_signal) * (line - st['macd_signal'])
+
+        a = wilder_alpha(self.rsi_period)
+        delta = close - prev_close
+        st['avg_gain'] += a * (max(delta, 0.0) - st['avg_gain'])
+        st['avg_loss'] += a * (max(-delta, 0.0) - st['avg_loss'])
+
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        st['atr'] += wilder_alpha(self.atr_period) * (tr - st['atr'])
+        st['prev_close'] = close
+
+        self._bb.push(close)
+        self._bb_sq.push(close * close)
+        self._pv.push((high + low + close) / 3.0 * volume)
+        self._vol.push(volume)
+
+        if self._bb.full:
+            mid = self._bb.total / self.bb_period
+            std = math.sqrt(max(self._bb_sq.total / self.bb_period - mid * mid, 0.0))
+        else:
+            mid, std = math.nan, math.nan
+
+        self.prev_values = self.values
+        self.values = {
+            'close': close,
+            'ema_fast': st['ema_fast'],
+            'ema_slow': st['ema_slow'],
+            'macd': line,
+            'macd_signal': st['macd_signal'],
+            'macd_hist': line - st['macd_signal'],
+            'rsi': float(_rsi_from_averages(st['avg_gain'], st['avg_loss'])),
+            'bb_mid': mid,
+            'bb_upper': mid + self.bb_width * std,
+            'bb_lower': mid - self.bb_width * std,
+            'atr': st['atr'],
+            'vwap': self._pv.total / self._vol.total if self._vol.total > 0 else close,
+        }
+        self.count += 1
+        self.last_open_time = int(open_time)
+        return self.values
+
+    def sync(self, view):
+        """
+        与K线缓冲区同步
+
+        最后一根K线视为未收盘，不参与计算；首次同步走向量化加载，
+        之后只对新收盘的K线逐根增量更新
+        """
+        closed = view[:, :-1]
+        if closed.shape[1] == 0:
+            return self.values
+        if self.last_open_time is None:
+            self.load(closed)
+            return self.values
+        new = np.flatnonzero(closed[OPEN_TIME] > self.last_open_time)
+        if new.size > self.bb_period * 4:
+            # 断档太久时重新向量化加载比逐根更新更快
+            self.load(closed)
+        else:
+            for index in new:
+                self.update(closed[:, index])
+        return self.values
+
+    def describe(self, horizon):
+        """
+        根据指标生成预测卡片的趋势和理由
+
+        Args:
+            horizon: 预测时长（分钟），短周期侧重RSI/布林带，长周期侧重均线/VWAP
+
+        Returns:
+            tuple: (趋势, 理由)
+        """
+        v = self.values
+        if not v:
+            return '震荡', '暂无K线数据'
+
+        score = 0
+        reasons = []
+        hist = v['macd_hist']
+        prev_hist = self.prev_values.get('macd_hist', hist)
+        if prev_hist <= 0 < hist:
+            score += 1
+            reasons.append('MACD金叉')
+        elif prev_hist >= 0 > hist:
+            score -= 1
+            reasons.append('MACD死叉')
+        else:
+            score += 1 if hist > 0 else -1
+            reasons.append('MACD多头' if hist > 0 else 'MACD空头')
+
+        if horizon <= 15:
+            if v['rsi'] >= 70:
+                score -= 1
+                reasons.insert(0, f"RSI超买({v['rsi']:.0f})")
+            elif v['rsi'] <= 30:
+                score += 1
+                reasons.insert(0, f"RSI超卖({v['rsi']:.0f})")
+            if v['close'] > v['bb_upper']:
+                reasons.append('突破布林上轨')
+            elif v['close'] < v['bb_lower']:
+                reasons.append('跌破布林下轨')
+        else:
+            if v['ema_fast'] > v['ema_slow']:
+                score += 1
+                reasons.append('均线多头排列')
+            else:
+                score -= 1
+                reasons.append('均线空头排列')
+            if horizon >= 60:
+                above = v['close'] >= v['vwap']
+                score += 1 if above else -1
+                reasons.append('价格高于VWAP' if above else '价格低于VWAP')
+
+        if score > 0:
+            trend = '上升'
+        elif score < 0:
+            trend = '下跌'
+        else:
+            trend = '震荡'
+        return trend, '，'.join(reasons[:3])
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+凯莉公式仓位计算
+根据上涨概率和预期盈亏比计算做多/做空仓位，所有交易对和预测周期一次向量化计算
+"""
+
+import numpy as np
+
+# 默认使用半凯利，单笔仓位上限25%
+DEFAULT_FRACTION = 0.5
+DEFAULT_CAP = 0.25
+
+
+def kelly_fraction(p_win, win_loss_ratio):
+    """
+    凯莉最优仓位 f = p - (1 - p) / b
+
+    Args:
+        p_win: 获胜概率（可为数组）
+        win_loss_ratio: 盈亏比 b = 平均盈利 / 平均亏损（可为数组）
+    """
+    p_win = np.asarray(p_win, dtype=np.float64)
+    b = np.maximum(np.asarray(win_loss_ratio, dtype=np.float64), 1e-12)
+    return p_win - (1.0 - p_win) / b
+
+
+def position_sizes(p_up, up_move, down_move, fraction=DEFAULT_FRACTION, cap=DEFAULT_CAP):
+    """
+    计算带方向的仓位
+
+    做多时盈亏比为 上涨幅度/下跌幅度，做空时取倒数；两个方向都为负时空仓；
+    任一方向幅度不为正（如没有历史数据时均为0）时盈亏比无意义，直接观望
+
+    Args:
+        p_up: 上涨概率，形状任意，如 (交易对数, 周期数)
+        up_move: 上涨时的预期幅度（绝对值或百分比，与down_move一致即可）
+        down_move: 下跌时的预期幅度
+        fraction: 凯利系数，0.5为半凯利
+        cap: 单笔仓位上限
+
+    Returns:
+        ndarray: 仓位比例，正数做多、负数做空、0为观望
+    """
+    p_up = np.asarray(p_up, dtype=np.float64)
+    up_move = np.asarray(up_move, dtype=np.float64)
+    down_move = np.asarray(down_move, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(down_move > 0, up_move / down_move, np.inf)
+        long_f = kelly_fraction(p_up, ratio)
+        short_f = kelly_fraction(1.0 - p_up, np.where(ratio > 0, 1.0 / ratio, np.inf))
+    size = np.where(long_f >= short_f, np.maximum(long_f, 0.0), -np.maximum(short_f, 0.0))
+    size = np.where((up_move > 0) & (down_move > 0), size, 0.0)
+    return np.clip(size * fraction, -cap, cap)
+
+
+def format_advice(size):
+    """仓位转显示文本，如 做多📈 12.5%"""
+    if size > 0:
+        return f"做多📈 {size * 100:.1f}%"
+    if size < 0:
+        return f"做空📉 {-size * 100:.1f}%"
+    return "观望⏸️ 0%"
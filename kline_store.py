@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+K线数据存储
+每个交易对的OHLCV保存在预分配的NumPy环形缓冲区中，追加为O(1)，
+指标和模型通过零拷贝视图读取历史数据
+"""
+
+import json
+import threading
+import time
+
+import numpy as np
+
+# 可选的C实现JSON解析，未安装时用标准库
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+from binance_client import binance_client
+from fetch_engine import fetch_engine
+from perf_trace import perf_trace
+from price_cache import price_cache, FRESH
+from rate_governor import INTERACTIVE
+
+COLUMNS = ('open_time', 'open', 'high', 'low', 'close', 'volume')
+OPEN_TIME, OPEN, HIGH, LOW, CLOSE, VOLUME = range(len(COLUMNS))
+
+# K线周期对应的毫秒数
+INTERVAL_MS = {
+    '1m': 60_000,
+    '3m': 180_000,
+    '5m': 300_000,
+    '15m': 900_000,
+    '30m': 1_800_000,
+    '1h': 3_600_000,
+}
+
+
+class KlineRingBuffer:
+    """
+    OHLCV环形缓冲区
+
+    每列分配两倍容量，每条数据同时写入 i 和 i+capacity 两个位置，
+    这样任意最近N条数据在内存中总是连续的，可以直接返回切片视图而无需拷贝
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self._data = np.zeros((len(COLUMNS), 2 * capacity), dtype=np.float64)
+        self._head = 0  # 下一条数据的写入位置
+        self._size = 0
+        # 可重入：ingest 持锁调用 update_last 和 extend
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def last_open_time(self):
+        """最新一条K线的开盘时间（毫秒），无数据时返回None"""
+        if not self._size:
+            return None
+        return int(self._data[OPEN_TIME, (self._head - 1) % self.capacity])
+
+    def append(self, row):
+        """
+        追加一条K线
+
+        Args:
+            row: (open_time, open, high, low, close, volume)
+        """
+        with self._lock:
+            self._write(self._head, row)
+            self._head = (self._head + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+    def update_last(self, row):
+        """覆盖最新一条K线（未收盘K线的实时更新）"""
+        with self._lock:
+            self._write((self._head - 1) % self.capacity, row)
+
+    def _write(self, index, row):
+        self._data[:, index] = row
+        self._data[:, index + self.capacity] = row
+
+    def extend(self, columns):
+        """
+        批量追加
+
+        Args:
+            columns: 形状为 (6, n) 的数组，按COLUMNS顺序排列
+        """
+        columns = np.asarray(columns, dtype=np.float64)
+        n = columns.shape[1]
+        if n == 0:
+            return
+        if n > self.capacity:
+            columns = columns[:, -self.capacity:]
+            n = self.capacity
+        with self._lock:
+            index = (self._head + np.arange(n)) % self.capacity
+            self._data[:, index] = columns
+            self._data[:, index + self.capacity] = columns
+            self._head = (self._head + n) % self.capacity
+            self._size = min(self._size + n, self.capacity)
+
+    def ingest(self, columns):
+        """
+        写入接口返回的K线，自动去重
+
+        早于最新K线的数据被忽略，开盘时间相同的视为未收盘K线的更新
+
+        Returns:
+            int: 新增的K线数量
+        """
+        columns = np.asarray(columns, dtype=np.float64)
+        with self._lock:
+            last = self.last_open_time
+            if last is not None:
+                open_times = columns[OPEN_TIME]
+                same = np.flatnonzero(open_times == last)
+                if same.size:
+                    self.update_last(columns[:, same[-1]])
+                columns = columns[:, open_times > last]
+            self.extend(columns)
+        return columns.shape[1]
+
+    def view(self, n=None):
+        """
+        最近n条K线的零拷贝视图
+
+        视图直接引用缓冲区内存，下一次写入后内容可能变化，需要时重新获取；
+        只适合在写入所在的线程使用，其他线程应使用 snapshot()
+
+        Returns:
+            ndarray: 形状为 (6, n) 的只读视图，按时间从旧到新排列
+        """
+        with self._lock:
+            window = self._window(n)
+        window.flags.writeable = False
+        return window
+
+    def snapshot(self, n=None):
+        """
+        最近n条K线的拷贝
+
+        在锁内拷贝，请求线程同时写入也不会读到一半新一半旧的数据
+
+        Returns:
+            ndarray: 形状为 (6, n) 的数组，按时间从旧到新排列
+        """
+        with self._lock:
+            return self._window(n).copy()
+
+    def _window(self, n):
+        # 在持有 self._lock 时调用
+        size = self._size if n is None else min(n, self._size)
+        end = self._head + self.capacity
+        return self._data[:, end - size:end]
+
+    def column(self, name, n=None):
+        """单列的零拷贝视图，如 column('close')"""
+        return self.view(n)[COLUMNS.index(name)]
+
+
+def parse_klines(data):
+    """
+    解析 /api/v3/klines 返回的数据
+
+    Returns:
+        ndarray: 形状为 (6, n) 的数组
+    """
+    if not data:
+        return np.empty((len(COLUMNS), 0))
+    return np.array([row[:len(COLUMNS)] for row in data], dtype=np.float64).T
+
+
+def decode_klines(payload):
+    """
+    把 /api/v3/klines 的原始响应直接解码为列数组
+
+    币安K线是不含嵌套对象的二维数组，去掉括号和引号后就是逗号分隔的数值。
+    整个响应一次split成字段（每个字段仍是一个bytes对象），再按列步长取出
+    需要的6列转成浮点数，省去JSON解析时每行的列表和每个值的str对象，
+    用不到的后6列只切分不转换；1000根K线约比JSON路径快一倍。
+    格式不符时退回JSON解析
+
+    Args:
+        payload: 响应体（bytes），也接受已解析的列表
+
+    Returns:
+        ndarray: 形状为 (6, n) 的数组
+    """
+    if not isinstance(payload, (bytes, bytearray)):
+        return parse_klines(payload)
+    width = len(COLUMNS)
+    try:
+        first = payload.index(b']')
+        if not payload[:first].strip(b' [\r\n'):
+            return np.empty((width, 0))
+        # 第一行的字段数即每行字段数
+        n = payload.count(b',', 0, first) + 1
+        fields = payload.translate(None, b'[]" \r\n').split(b',')
+        rows, remainder = divmod(len(fields), n)
+        if n < width or remainder:
+            raise ValueError(f"K线字段数不一致: {len(fields)}/{n}")
+        columns = np.empty((width, rows), dtype=np.float64)
+        for k in range(width):
+            columns[k] = list(map(float, fields[k::n]))
+        return columns
+    except ValueError:
+        return parse_klines(_json_loads(payload))
+
+
+class KlineStore:
+    """按 (交易对, 周期) 管理K线缓冲区，负责从币安下载数据"""
+
+    def __init__(self, capacity=1000, client=binance_client, engine=fetch_engine,
+                 cache=price_cache, history=None):
+        """
+        Args:
+            history: 本地K线历史（CandleHistory），为None时不做持久化
+        """
+        self.capacity = capacity
+        self.client = client
+        self.engine = engine
+        self.cache = cache
+        self.history = history
+        self._buffers = {}
+        self._lock = threading.Lock()
+
+    def buffer(self, symbol, interval='1m'):
+        """获取交易对的K线缓冲区，不存在时创建"""
+        key = (symbol, interval)
+        with self._lock:
+            buf = self._buffers.get(key)
+            if buf is None:
+                buf = self._buffers[key] = KlineRingBuffer(self.capacity)
+            return buf
+
+    def fetch(self, symbol, interval='1m', limit=None, priority=INTERACTIVE):
+        """
+        下载K线并写入缓冲区（阻塞，应在后台线程调用）
+
+        缓冲区为空时先从本地历史加载，然后只请求最新一根之后的K线；
+        断档超过缓冲区容量时直接取最新数据
+
+        Args:
+            priority: 请求优先级，后台预热用BACKGROUND
+
+        Returns:
+            KlineRingBuffer: 该交易对的缓冲区
+        """
+        buf = self.buffer(symbol, interval)
+        if not len(buf) and self.history is not None:
+            buf.ingest(self.history.load_recent(symbol, interval, self.capacity))
+
+        limit = min(limit or self.capacity, 1000)
+        start_time = buf.last_open_time
+        now = time.time() * 1000
+        if start_time is not None and now - start_time > limit * INTERVAL_MS.get(interval, 60_000):
+            start_time = None
+        payload = self.client.klines(symbol, interval, limit=limit, start_time=start_time,
+                                     priority=priority, raw=True)
+        with perf_trace.span('parse', symbol=symbol, size=len(payload)):
+            columns = decode_klines(payload)
+            buf.ingest(columns)
+        if self.history is not None:
+            self.history.save(symbol, interval, columns)
+        if self.cache is not None:
+            self.cache.put(('klines', symbol, interval), buf.last_open_time)
+        return buf
+
+    def refresh(self, symbol, interval='1m', on_success=None, on_error=None,
+                priority=INTERACTIVE):
+        """
+        后台刷新K线，缓存新鲜期内不重复请求
+
+        Args:
+            on_success: 回调 callback(buffer)，在UI线程执行
+            on_error: 失败回调 callback(exception)
+            priority: 请求优先级
+        """
+        if self.cache is not None:
+            _, _, state = self.cache.get(('klines', symbol, interval))
+            if state == FRESH:
+                if on_success is not None:
+                    on_success(self.buffer(symbol, interval))
+                return None
+        return self.engine.submit(
+            self.fetch, symbol, interval, priority=priority,
+            on_success=on_success, on_error=on_error,
+            name=f'klines:{symbol}:{interval}'
+        )
+
+
+# 全局K线存储
+kline_store = KlineStore()
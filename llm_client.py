@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI行情分析客户端
+把精简的行情摘要发送到OpenAI兼容接口（默认Grok），流式接收分析文字；
+结果按 (交易对, K线窗口哈希) 缓存，相同的进行中请求合并为一次
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+from kivy.clock import Clock
+from kivy.logger import Logger
+
+from fetch_engine import fetch_engine
+from kline_store import CLOSE
+
+DEFAULT_BASE_URL = 'https://api.x.ai/v1'
+DEFAULT_MODEL = 'grok-4'
+
+# 连接超时, 两个数据块之间的最长等待（秒）
+DEFAULT_TIMEOUT = (5, 30)
+
+# 参与摘要和哈希的已收盘K线数
+SUMMARY_WINDOW = 60
+
+SYSTEM_PROMPT = (
+    '你是加密货币短线行情分析助手。根据用户给出的行情摘要，'
+    '用中文给出不超过80字的简短分析，包含方向判断和主要风险，不要重复原始数据。'
+)
+
+
+class LLMError(Exception):
+    """接口返回非200状态码"""
+
+    def __init__(self, status_code, message=''):
+        self.status_code = status_code
+        self.message = message
+        super().__init__(f"HTTP {status_code} {message}".strip())
+
+
+def window_hash(closed):
+    """
+    K线窗口哈希，窗口内没有新收盘K线时哈希不变
+
+    Args:
+        closed: 形状为 (6, n) 的已收盘K线
+    """
+    data = np.ascontiguousarray(closed, dtype=np.float64)
+    return hashlib.blake2b(data.tobytes(), digest_size=8).hexdigest()
+
+
+def market_summary(symbol, closed, values, horizons=(), p_up=()):
+    """
+    精简行情摘要，控制在几百字节以内
+
+    Args:
+        closed: 形状为 (6, n) 的已收盘K线
+        values: IndicatorEngine.values
+        horizons: 预测周期（分钟）
+        p_up: 各周期上涨概率
+    """
+    close = closed[CLOSE]
+    last = close[-1]
+
+    def change(k):
+        return last / close[-1 - k] - 1.0 if close.size > k else 0.0
+
+    band = values['bb_upper'] - values['bb_lower']
+    bb_pos = (last - values['bb_mid']) / band if band > 0 else 0.0
+    lines = [
+        f"交易对 {symbol}，最新价 {last:.2f}，1分钟K线 {close.size} 根",
+        f"涨跌幅 1分钟 {change(1):+.2%}，5分钟 {change(5):+.2%}，"
+        f"15分钟 {change(15):+.2%}，60分钟 {change(min(60, close.size - 1)):+.2%}",
+        f"RSI {values['rsi']:.1f}，MACD柱 {values['macd_hist']:.4g}，布林位置 {bb_pos:+.2f}，"
+        f"ATR {values['atr'] / last:.3%}，VWAP偏离 {last / values['vwap'] - 1.0:+.2%}",
+    ]
+    if len(horizons):
+        probs = '，'.join(f"{h}分钟 {p:.0%}" for h, p in zip(horizons, p_up))
+        lines.append(f"模型上涨概率: {probs}")
+    return '\n'.join(lines)
+
+
+class _Request:
+    """一次进行中的分析请求，可被多个调用方共享"""
+
+    def __init__(self, key):
+        self.key = key
+        self.text = ''
+        self.listeners = []  # [(on_token, on_done, on_error)]
+        self.task = None
+        self.flush_scheduled = False
+
+
+class LLMClient:
+    """OpenAI兼容的流式对话客户端（线程安全）"""
+
+    def __init__(self, base_url=None, api_key=None, model=None, engine=fetch_engine,
+                 cache_size=64, timeout=DEFAULT_TIMEOUT):
+        """
+        Args:
+            base_url: 接口地址，默认读取环境变量 LLM_BASE_URL
+            api_key: 密钥，默认读取环境变量 LLM_API_KEY 或 XAI_API_KEY
+            model: 模型名，默认读取环境变量 LLM_MODEL
+            cache_size: 最多缓存的分析结果数
+        """
+        self.engine = engine
+        self.cache_size = cache_size
+        self.timeout = timeout
+        self.configure(base_url, api_key, model)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._cache = OrderedDict()  # (交易对, 窗口哈希) -> 分析文字
+        self._inflight = {}  # (交易对, 窗口哈希) -> _Request
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'hits': 0, 'merged': 0, 'errors': 0}
+
+    def configure(self, base_url=None, api_key=None, model=None):
+        """设置接口地址、密钥和模型，未指定的项读取环境变量"""
+        self.base_url = (base_url or os.environ.get('LLM_BASE_URL') or DEFAULT_BASE_URL).rstrip('/')
+        self.api_key = api_key or os.environ.get('LLM_API_KEY') or os.environ.get('XAI_API_KEY')
+        self.model = model or os.environ.get('LLM_MODEL') or DEFAULT_MODEL
+
+    def load_config(self, path):
+        """从JSON文件读取 base_url/api_key/model，文件不存在时忽略"""
+        try:
+            with open(path, encoding='utf-8') as f:
+                config = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            Logger.warning(f"LLMClient: 读取配置失败 - {e}")
+            return False
+        self.configure(config.get('base_url'), config.get('api_key'), config.get('model'))
+        return True
+
+    @property
+    def enabled(self):
+        """配置了密钥才发送请求（本地模拟服务器可用任意密钥）"""
+        return bool(self.api_key)
+
+    def cached(self, symbol, digest):
+        """已缓存的分析文字，没有则返回None"""
+        key = (symbol, digest)
+        with self._lock:
+            text = self._cache.get(key)
+            if text is not None:
+                self._cache.move_to_end(key)
+            return text
+
+    def analyze(self, symbol, summary, digest, on_token=None, on_done=None, on_error=None):
+        """
+        请求AI分析
+
+        缓存命中时同步调用on_done并返回None；同一 (交易对, 哈希) 已有请求在进行时
+        合并到该请求，并先补发已收到的文字
+
+        Args:
+            summary: market_summary() 生成的摘要
+            digest: window_hash() 生成的窗口哈希
+            on_token: 回调 callback(已收到的全部文字)，在UI线程执行，每帧最多一次
+            on_done: 回调 callback(完整文字)，在UI线程执行
+            on_error: 失败回调 callback(exception)
+
+        Returns:
+            FetchTask: 后台请求句柄
+        """
+        text = self.cached(symbol, digest)
+        if text is not None:
+            self.stats['hits'] += 1
+            if on_done is not None:
+                on_done(text)
+            return None
+
+        key = (symbol, digest)
+        with self._lock:
+            request = self._inflight.get(key)
+            merged = request is not None
+            if not merged:
+                request = self._inflight[key] = _Request(key)
+            request.listeners.append((on_token, on_done, on_error))
+            partial = request.text
+
+        if merged:
+            self.stats['merged'] += 1
+            if partial and on_token is not None:
+                on_token(partial)
+            return request.task
+
+        self.stats['requests'] += 1
+        request.task = self.engine.submit(
+            self._stream, request, summary,
+            on_success=lambda text: self._finish(request, text),
+            on_error=lambda e: self._fail(request, e),
+            name=f'llm:{symbol}'
+        )
+        return request.task
+
+    def _stream(self, request, summary):
+        """发送请求并逐块读取SSE（在后台线程执行）"""
+        payload = {
+            'model': self.model,
+            'stream': True,
+            'temperature': 0.3,
+            'max_tokens': 200,
+            'messages': [
+                {'role': 'system', 'content': SYSTEM_PROMPT},
+                {'role': 'user', 'content': summary},
+            ],
+        }
+        headers = {'Authorization': f'Bearer {self.api_key}', 'Accept': 'text/event-stream'}
+        with self.session.post(f'{self.base_url}/chat/completions', json=payload,
+                               headers=headers, timeout=self.timeout, stream=True) as response:
+            if response.status_code != 200:
+                raise LLMError(response.status_code, response.text[:200])
+            # SSE固定为UTF-8，服务器未声明字符集时requests会按ISO-8859-1解码
+            response.encoding = 'utf-8'
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                data = line[5:].strip()
+                if data == '[DONE]':
+                    break
+                try:
+                    choice = json.loads(data)['choices'][0]
+                except (ValueError, KeyError, IndexError):
+                    continue
+                delta = (choice.get('delta') or {}).get('content')
+                if delta:
+                    self._append(request, delta)
+        return request.text
+
+    def _append(self, request, delta):
+        with self._lock:
+            request.text += delta
+            if request.flush_scheduled:
+                return
+            request.flush_scheduled = True
+        # 同一帧内到达的多个数据块只刷新一次界面
+        Clock.schedule_once(lambda dt: self._flush(request), 0)
+
+    def _flush(self, request):
+        with self._lock:
+            request.flush_scheduled = False
+            text = request.text
+            listeners = list(request.listeners)
+        for on_token, _, _ in listeners:
+            if on_token is not None:
+                on_token(text)
+
+    def _finish(self, request, text):
+        with self._lock:
+            self._inflight.pop(request.key, None)
+            if text:
+                self._cache[request.key] = text
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        for _, on_done, _ in request.listeners:
+            if on_done is not None:
+                on_done(text)
+
+    def _fail(self, request, error):
+        self.stats['errors'] += 1
+        with self._lock:
+            self._inflight.pop(request.key, None)
+        Logger.warning(f"LLMClient: 分析失败 {request.key[0]} - {error}")
+        for _, _, on_error in request.listeners:
+            if on_error is not None:
+                on_error(error)
+
+
+# 全局AI分析客户端
+llm_client = LLMClient()
@@ -5,8 +5,13 @@
 用于Buildozer打包
 """
 
+# 最先导入启动计时器，统计包含Kivy初始化在内的全部导入耗时
+from startup_timer import startup_timer
+
 # 导入优化后的移动应用
 from crypto_mobile_optimized import CryptoPredictionApp
 
+startup_timer.mark('import')
+
 if __name__ == '__main__':
     CryptoPredictionApp().run()
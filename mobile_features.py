@@ -5,9 +5,15 @@
 提供震动、通知、声音等移动端特性
 """
 
+import threading
+import time
+
 from kivy.utils import platform
 from kivy.logger import Logger
 
+# 提示音优先级，合并时保留优先级最高的一个
+SOUND_PRIORITY = {'default': 0, 'success': 1, 'warning': 2, 'error': 3}
+
 class MobileFeatures:
     """移动端功能管理器"""
     
@@ -17,6 +23,10 @@ class MobileFeatures:
         self.notification_available = False
         self.audio_available = False
         
+        # JNI句柄只在初始化时获取一次
+        self._vibrator = None
+        self._ringtones = {}
+        
         self._init_features()
     
     def _init_features(self):
@@ -34,20 +44,18 @@ class MobileFeatures:
     def _init_android_features(self):
         """初始化Android功能"""
         try:
-            # 请求权限
-            from android.permissions import request_permissions, Permission
-            request_permissions([
-                Permission.VIBRATE,
-                Permission.INTERNET,
-                Permission.WAKE_LOCK,
-                Permission.WRITE_EXTERNAL_STORAGE
-            ])
+            # 权限由应用启动时统一申请（见 setup_mobile_window），
+            # 这里只获取句柄，首次震动时不会弹出权限对话框
             
             # 初始化震动
             from jnius import autoclass
             self.PythonActivity = autoclass('org.kivy.android.PythonActivity')
             self.Context = autoclass('android.content.Context')
-            self.vibrator_available = True
+            self.RingtoneManager = autoclass('android.media.RingtoneManager')
+            activity = self.PythonActivity.mActivity
+            self._vibrator = activity.getSystemService(self.Context.VIBRATOR_SERVICE)
+            self.vibrator_available = self._vibrator is not None
+            self.audio_available = True
             
             # 初始化通知
             try:
@@ -71,8 +79,7 @@ class MobileFeatures:
         """
         try:
             if self.platform == 'android' and self.vibrator_available:
-                activity = self.PythonActivity.mActivity
-                vibrator = activity.getSystemService(self.Context.VIBRATOR_SERVICE)
+                vibrator = self._vibrator
                 
                 if pattern:
                     # 使用震动模式
@@ -124,24 +131,21 @@ class MobileFeatures:
             sound_type: 声音类型 (default, success, error, warning)
         """
         try:
-            if self.platform == 'android':
-                # Android系统声音
-                from jnius import autoclass
-                MediaPlayer = autoclass('android.media.MediaPlayer')
-                RingtoneManager = autoclass('android.media.RingtoneManager')
-                
-                # 获取系统提示音
-                if sound_type == "success":
-                    sound_uri = RingtoneManager.getDefaultUri(RingtoneManager.TYPE_NOTIFICATION)
-                elif sound_type == "error":
-                    sound_uri = RingtoneManager.getDefaultUri(RingtoneManager.TYPE_ALARM)
-                else:
-                    sound_uri = RingtoneManager.getDefaultUri(RingtoneManager.TYPE_NOTIFICATION)
+            if self.platform == 'android' and self.audio_available:
+                # Android系统声音，每种类型的Ringtone只创建一次
+                ringtone = self._ringtones.get(sound_type)
+                if ringtone is None:
+                    RingtoneManager = self.RingtoneManager
+                    if sound_type == "error":
+                        sound_uri = RingtoneManager.getDefaultUri(RingtoneManager.TYPE_ALARM)
+                    else:
+                        sound_uri = RingtoneManager.getDefaultUri(RingtoneManager.TYPE_NOTIFICATION)
+                    ringtone = RingtoneManager.getRingtone(
+                        self.PythonActivity.mActivity, sound_uri
+                    )
+                    self._ringtones[sound_type] = ringtone
                 
                 # 播放声音
-                ringtone = RingtoneManager.getRingtone(
-                    self.PythonActivity.mActivity, sound_uri
-                )
                 ringtone.play()
                 
                 Logger.info(f"MobileFeatures: 播放声音 - {sound_type}")
@@ -200,21 +204,167 @@ class MobileFeatures:
         
         return info
 
+class FeedbackDispatcher:
+    """
+    反馈调度器
+
+    震动、提示音和通知在后台线程执行，UI线程只登记请求；
+    短时间内的连续请求合并为一次（震动取最长时长，提示音取最高优先级，
+    同标题通知只保留最新一条），已被刚执行的反馈覆盖的请求直接丢弃
+    """
+
+    def __init__(self, features, vibrate_interval=0.15, sound_interval=0.5):
+        """
+        Args:
+            features: MobileFeatures实例，实际执行反馈
+            vibrate_interval: 两次震动的最小间隔（秒）
+            sound_interval: 两次提示音的最小间隔（秒）
+        """
+        self.features = features
+        self.intervals = {'vibrate': vibrate_interval, 'sound': sound_interval, 'notify': 0.0}
+        self._cond = threading.Condition()
+        self._pending = {}  # 种类 -> 合并后的请求
+        self._last = {}  # 种类 -> (执行时刻, 请求)
+        self._next_allowed = {}  # 种类 -> 下次可执行时刻
+        self._thread = None
+        self._stopped = False
+        self.requested = 0
+        self.fired = 0
+
+    @property
+    def coalesced(self):
+        """被合并或丢弃的请求数"""
+        with self._cond:
+            pending = sum(len(v) if isinstance(v, dict) else 1 for v in self._pending.values())
+            return self.requested - self.fired - pending
+
+    def vibrate(self, duration=0.1, pattern=None):
+        """震动，时长不超过刚执行的震动时直接合并"""
+        if pattern:
+            self._submit('vibrate', ('pattern', tuple(pattern)))
+        else:
+            self._submit('vibrate', ('duration', duration))
+
+    def play_sound(self, sound_type="default"):
+        """播放提示音，优先级不高于刚播放的提示音时直接合并"""
+        self._submit('sound', sound_type)
+
+    def notify(self, title, message, timeout=10):
+        """显示通知，同标题的待发送通知只保留最新一条"""
+        self._submit('notify', {title: (message, timeout)})
+
+    def _covered(self, kind, request, now):
+        """请求是否已被刚执行、仍在间隔（或震动时长）内的反馈覆盖"""
+        last = self._last.get(kind)
+        if last is None or now >= self._next_allowed[kind]:
+            return False
+        if kind == 'vibrate':
+            return (request[0] == 'duration' and last[1][0] == 'duration'
+                    and request[1] <= last[1][1])
+        if kind == 'sound':
+            return SOUND_PRIORITY.get(request, 0) <= SOUND_PRIORITY.get(last[1], 0)
+        return False
+
+    @staticmethod
+    def _merge(kind, current, request):
+        if kind == 'vibrate':
+            # 震动模式优先，否则取最长时长
+            if current[0] == 'pattern' or request[0] == 'pattern':
+                return request if request[0] == 'pattern' else current
+            return ('duration', max(current[1], request[1]))
+        if kind == 'sound':
+            return max(current, request, key=lambda t: SOUND_PRIORITY.get(t, 0))
+        merged = dict(current)
+        merged.update(request)
+        return merged
+
+    def _submit(self, kind, request):
+        with self._cond:
+            self.requested += len(request) if isinstance(request, dict) else 1
+            if self._covered(kind, request, time.monotonic()):
+                return
+            current = self._pending.get(kind)
+            self._pending[kind] = request if current is None else self._merge(kind, current, request)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='feedback', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        try:
+            while True:
+                with self._cond:
+                    jobs = self._take_ready()
+                    if jobs is None:
+                        return
+                for kind, request in jobs:
+                    self._execute(kind, request)
+        finally:
+            if platform == 'android':
+                try:
+                    from jnius import detach
+                    detach()
+                except Exception:
+                    pass
+
+    def _take_ready(self):
+        """等待到有可执行的请求，返回 [(种类, 请求)]；停止时返回None"""
+        while not self._stopped:
+            now = time.monotonic()
+            ready = [k for k in self._pending if self._next_allowed.get(k, 0.0) <= now]
+            if ready:
+                jobs = [(k, self._pending.pop(k)) for k in ready]
+                for kind, request in jobs:
+                    self._last[kind] = (now, request)
+                    hold = request[1] if kind == 'vibrate' and request[0] == 'duration' else 0.0
+                    self._next_allowed[kind] = now + max(self.intervals[kind], hold)
+                    self.fired += len(request) if isinstance(request, dict) else 1
+                return jobs
+            timeout = None
+            if self._pending:
+                timeout = min(self._next_allowed[k] for k in self._pending) - now
+            self._cond.wait(timeout)
+        return None
+
+    def _execute(self, kind, request):
+        if kind == 'vibrate':
+            if request[0] == 'pattern':
+                self.features.vibrate(pattern=list(request[1]))
+            else:
+                self.features.vibrate(request[1])
+        elif kind == 'sound':
+            self.features.play_sound(request)
+        else:
+            for title, (message, timeout) in request.items():
+                self.features.show_notification(title, message, timeout)
+
+    def stop(self, timeout=1.0):
+        """停止后台线程，未执行的请求被丢弃"""
+        with self._cond:
+            self._stopped = True
+            self._pending.clear()
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
 # 全局移动功能实例
 mobile_features = MobileFeatures()
 
+# 全局反馈调度器
+feedback = FeedbackDispatcher(mobile_features)
+
 # 便捷函数
 def vibrate(duration=0.1, pattern=None):
     """震动"""
-    mobile_features.vibrate(duration, pattern)
+    feedback.vibrate(duration, pattern)
 
 def notify(title, message, timeout=10):
     """通知"""
-    mobile_features.show_notification(title, message, timeout)
+    feedback.notify(title, message, timeout)
 
 def play_sound(sound_type="default"):
     """播放声音"""
-    mobile_features.play_sound(sound_type)
+    feedback.play_sound(sound_type)
 
 def keep_screen_on(keep_on=True):
     """屏幕常亮"""
@@ -0,0 +1,565 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟服务器
+在本机模拟币安行情推送、REST接口和OpenAI兼容的对话接口，用于离线开发、调试和基准测试，无需真实网络
+
+用法:
+    python mock_servers.py stream --port 8765
+    然后把 PriceStream 的 url 指向 ws://127.0.0.1:8765/stream
+
+    python mock_servers.py rest --port 8767 --latency 0.05
+    然后把 BinanceClient 的 base_url 指向 http://127.0.0.1:8767
+    （同时启动两者时可共用订单簿：MockBinanceServer(books=stream_server.books)，
+    深度快照与增量深度流的序号才能衔接）
+
+    python mock_servers.py llm --port 8766
+    然后设置 LLM_BASE_URL=http://127.0.0.1:8766/v1 LLM_API_KEY=test
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import websockets
+
+
+def _request_path(ws, path=None):
+    """兼容新旧版本websockets获取请求路径"""
+    if path is not None:
+        return path
+    request = getattr(ws, 'request', None)
+    return request.path if request is not None else getattr(ws, 'path', '/')
+
+
+class MockOrderBook:
+    """模拟订单簿：每步随机改动若干价位，序号递增，可生成快照和增量事件"""
+
+    def __init__(self, symbol, mid=100000.0, levels=200, tick=0.01, seed=None):
+        self.symbol = symbol
+        self.tick = tick
+        self.update_id = 1000
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.bids = {}
+        self.asks = {}
+        base = round(mid / tick)
+        for i in range(1, levels + 1):
+            self.bids[base - i] = self._random.uniform(0.01, 5)
+            self.asks[base + i] = self._random.uniform(0.01, 5)
+
+    def snapshot(self, limit=100):
+        with self._lock:
+            bids = sorted(self.bids, reverse=True)[:limit]
+            asks = sorted(self.asks)[:limit]
+            return {
+                'lastUpdateId': self.update_id,
+                'bids': [[f"{p * self.tick:.2f}", f"{self.bids[p]:.5f}"] for p in bids],
+                'asks': [[f"{p * self.tick:.2f}", f"{self.asks[p]:.5f}"] for p in asks],
+            }
+
+    def step(self, changes=5):
+        """
+        随机改动价位（新增、修改或撤空），买一不会高于卖一
+
+        Returns:
+            dict: depthUpdate事件
+        """
+        with self._lock:
+            first = self.update_id + 1
+            self.update_id += self._random.randint(1, 3)
+            best_bid, best_ask = max(self.bids), min(self.asks)
+            updates = {'b': {}, 'a': {}}
+            for _ in range(changes):
+                side = self._random.choice('ba')
+                offset = self._random.randint(0, 20)
+                if side == 'b':
+                    price, levels = best_bid - offset, self.bids
+                else:
+                    price, levels = best_ask + offset, self.asks
+                qty = 0.0 if self._random.random() < 0.3 and len(levels) > 1 else \
+                    self._random.uniform(0.01, 5)
+                if qty > 0:
+                    levels[price] = qty
+                else:
+                    levels.pop(price, None)
+                updates[side][price] = qty
+            return {
+                'e': 'depthUpdate', 'E': int(time.time() * 1000), 's': self.symbol,
+                'U': first, 'u': self.update_id,
+                'b': [[f"{p * self.tick:.2f}", f"{q:.5f}"] for p, q in updates['b'].items()],
+                'a': [[f"{p * self.tick:.2f}", f"{q:.5f}"] for p, q in updates['a'].items()],
+            }
+
+
+class MockStreamServer:
+    """
+    模拟币安组合行情流
+
+    按 /stream?streams=btcusdt@trade/... 推送随机游走的成交价，
+    btcusdt@depth@100ms 推送模拟订单簿的增量深度；
+    支持SUBSCRIBE/UNSUBSCRIBE请求，可主动断开连接以验证自动重连
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, rate=20.0, start_price=100000.0, books=None):
+        """
+        Args:
+            port: 监听端口，0表示随机端口
+            rate: 每个流每秒推送的消息数
+            start_price: 初始价格
+            books: 交易对 -> MockOrderBook，可与MockBinanceServer共用
+        """
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.start_price = start_price
+        self.books = books if books is not None else {}
+        self.prices = {}
+        self.connections = 0
+        self.sent = 0
+        self._clients = set()
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}/stream"
+
+    def book(self, symbol):
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books.setdefault(symbol, MockOrderBook(symbol, self.start_price))
+        return book
+
+    def _next_trade(self, stream):
+        symbol = stream.split('@')[0].upper()
+        if '@depth' in stream:
+            return json.dumps({'stream': stream, 'data': self.book(symbol).step()})
+        price = self.prices.get(symbol, self.start_price)
+        price *= 1 + random.gauss(0, 0.0005)
+        self.prices[symbol] = price
+        now = int(time.time() * 1000)
+        if stream.endswith('@trade'):
+            data = {'e': 'trade', 'E': now, 's': symbol, 't': self.sent,
+                    'p': f"{price:.2f}", 'q': '0.010', 'T': now, 'm': False}
+        else:
+            data = {'e': '24hrTicker', 'E': now, 's': symbol, 'c': f"{price:.2f}"}
+        return json.dumps({'stream': stream, 'data': data})
+
+    async def _handler(self, ws, path=None):
+        query = parse_qs(urlparse(_request_path(ws, path)).query)
+        streams = set(filter(None, query.get('streams', [''])[0].split('/')))
+        self.connections += 1
+        self._clients.add(ws)
+
+        async def receive():
+            async for message in ws:
+                request = json.loads(message)
+                params = set(request.get('params', []))
+                if request.get('method') == 'SUBSCRIBE':
+                    streams.update(params)
+                elif request.get('method') == 'UNSUBSCRIBE':
+                    streams.difference_update(params)
+                await ws.send(json.dumps({'result': None, 'id': request.get('id')}))
+
+        receiver = asyncio.ensure_future(receive())
+        try:
+            while not receiver.done():
+                for stream in list(streams):
+                    await ws.send(self._next_trade(stream))
+                    self.sent += 1
+                await asyncio.sleep(1.0 / self.rate)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            receiver.cancel()
+            self._clients.discard(ws)
+
+    def drop_connections(self):
+        """断开所有客户端连接（模拟网络中断）"""
+        for ws in list(self._clients):
+            asyncio.run_coroutine_threadsafe(ws.close(), self._loop)
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        async with websockets.serve(self._handler, self.host, self.port) as server:
+            self._server = server
+            self.port = next(iter(server.sockets)).getsockname()[1]
+            self._stop = asyncio.Event()
+            self._ready.set()
+            await self._stop.wait()
+
+    def start(self):
+        """在后台线程中启动服务器，返回后即可连接"""
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._serve()), daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        if self._thread is not None:
+            self._thread.join(2)
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    """模拟HTTP接口的公共设置：保持连接、不输出访问日志"""
+
+    protocol_version = 'HTTP/1.1'
+    # 响应头和正文分两次写出，避免Nagle与延迟ACK叠加出40ms延迟
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _RestHandler(_QuietHandler):
+    def _send_json(self, status, body, weight=0):
+        server = self.server.owner
+        data = json.dumps(body, separators=(',', ':')).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('X-MBX-USED-WEIGHT-1M', str(server.use_weight(weight)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server.owner
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        server.delay()
+        with server.lock:
+            server.requests += 1
+
+        if url.path == '/api/v3/ping':
+            self._send_json(200, {}, 1)
+        elif url.path == '/api/v3/ticker/price':
+            if 'symbols' in query:
+                symbols = json.loads(query['symbols'])
+                self._send_json(200, [{'symbol': s, 'price': f"{server.price(s):.2f}"}
+                                      for s in symbols], 4)
+            elif 'symbol' in query:
+                symbol = query['symbol']
+                self._send_json(200, {'symbol': symbol, 'price': f"{server.price(symbol):.2f}"}, 2)
+            else:
+                self._send_json(400, {'code': -1102, 'msg': 'symbol required'})
+        elif url.path == '/api/v3/ticker/24hr':
+            if 'symbol' in query:
+                self._send_json(200, server.ticker_24hr(query['symbol']), 2)
+                return
+            if 'symbols' in query:
+                symbols = json.loads(query['symbols'])
+                weight = 2 if len(symbols) <= 20 else 40 if len(symbols) <= 100 else 80
+            else:
+                symbols, weight = server.universe, 80
+            self._send_json(200, [server.ticker_24hr(s) for s in symbols], weight)
+        elif url.path == '/api/v3/depth':
+            if 'symbol' not in query:
+                self._send_json(400, {'code': -1102, 'msg': 'symbol required'})
+                return
+            limit = int(query.get('limit', 100))
+            weight = 5 if limit <= 100 else 25 if limit <= 500 else 50 if limit <= 1000 else 250
+            self._send_json(200, server.book(query['symbol']).snapshot(limit), weight)
+        elif url.path == '/api/v3/klines':
+            if 'symbol' not in query:
+                self._send_json(400, {'code': -1102, 'msg': 'symbol required'})
+                return
+            limit = min(int(query.get('limit', 500)), 1000)
+            start_time = int(query['startTime']) if 'startTime' in query else None
+            self._send_json(200, server.klines(query['symbol'], limit, start_time), 2)
+        else:
+            self._send_json(404, {'code': -1, 'msg': 'not found'})
+
+
+class MockBinanceServer:
+    """
+    模拟币安现货REST接口（ping、ticker/price、ticker/24hr、depth、klines）
+
+    每个交易对一条随机游走的1分钟K线序列，每次K线请求后前进advance根，
+    模拟真实行情中不断有新K线收盘；可配置网络延迟，并返回权重响应头
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, advance=1,
+                 history=5000, start_price=100000.0, seed=0, universe=300, books=None):
+        """
+        Args:
+            port: 监听端口，0表示随机端口
+            latency: 每个请求的固定延迟（秒）
+            jitter: 额外的随机延迟上限（秒）
+            advance: 每次K线请求后新增的K线数
+            history: 初始已有的K线数
+            universe: 不带symbols参数请求24小时行情时返回的交易对数
+            books: 交易对 -> MockOrderBook，与MockStreamServer共用时深度快照和增量流序号一致
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.advance = advance
+        self.history = history
+        self.start_price = start_price
+        self.requests = 0
+        self.lock = threading.Lock()
+        self._random = random.Random(seed)
+        self.books = books if books is not None else {}
+        self._series = {}  # 交易对 -> [K线行]
+        self._tickers = {}  # 交易对 -> [开盘价, 最新价, 成交额]，没有K线的交易对只模拟行情
+        self.universe = ['BTCUSDT', 'ETHUSDT'] + [f'C{i:03d}USDT' for i in range(max(universe - 2, 0))]
+        self._origin = (int(time.time()) // 60 - history) * 60_000
+        self._weight_minute = 0
+        self._weight = 0
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def delay(self):
+        wait = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if wait > 0:
+            time.sleep(wait)
+
+    def use_weight(self, weight):
+        """累计当前分钟的请求权重"""
+        with self.lock:
+            minute = int(time.time() // 60)
+            if minute != self._weight_minute:
+                self._weight_minute, self._weight = minute, 0
+            self._weight += weight
+            return self._weight
+
+    def _extend(self, symbol, count):
+        rows = self._series.setdefault(symbol, [])
+        price = float(rows[-1][4]) if rows else self.start_price
+        for _ in range(count):
+            open_time = self._origin + len(rows) * 60_000
+            open_ = price
+            price *= 1 + self._random.gauss(0, 0.001)
+            spread = abs(self._random.gauss(0, 0.0005)) * price
+            volume = self._random.uniform(1, 100)
+            rows.append([
+                open_time, f"{open_:.2f}", f"{max(open_, price) + spread:.2f}",
+                f"{min(open_, price) - spread:.2f}", f"{price:.2f}", f"{volume:.5f}",
+                open_time + 59_999, f"{volume * price:.4f}", self._random.randint(100, 2000),
+                f"{volume / 2:.5f}", f"{volume * price / 2:.4f}", "0",
+            ])
+        return rows
+
+    def price(self, symbol):
+        with self.lock:
+            return float(self._extend(symbol, 0 if symbol in self._series else self.history)[-1][4])
+
+    def ticker_24hr(self, symbol):
+        """MINI类型的24小时行情；有K线的交易对取K线最新价，其余随机游走"""
+        with self.lock:
+            ticker = self._tickers.get(symbol)
+            rows = self._series.get(symbol)
+            if ticker is None:
+                if rows:
+                    open_ = float(rows[max(len(rows) - 1440, 0)][1])
+                else:
+                    open_ = self.start_price * self._random.uniform(0.0001, 1.0)
+                ticker = self._tickers[symbol] = [open_, open_, self._random.uniform(1e5, 1e9)]
+            if rows:
+                ticker[1] = float(rows[-1][4])
+            else:
+                ticker[1] *= 1 + self._random.gauss(0, 0.002)
+            open_, last, quote_volume = ticker
+        return {
+            'symbol': symbol, 'openPrice': f"{open_:.8f}", 'lastPrice': f"{last:.8f}",
+            'highPrice': f"{max(open_, last):.8f}", 'lowPrice': f"{min(open_, last):.8f}",
+            'volume': f"{quote_volume / last:.8f}", 'quoteVolume': f"{quote_volume:.8f}",
+        }
+
+    def book(self, symbol):
+        """交易对的模拟订单簿，首次请求时以K线最新价为中间价创建"""
+        if symbol not in self.books:
+            mid = self.price(symbol)
+            with self.lock:
+                self.books.setdefault(symbol, MockOrderBook(symbol, mid))
+        return self.books[symbol]
+
+    def klines(self, symbol, limit=500, start_time=None):
+        with self.lock:
+            rows = self._series.get(symbol)
+            rows = self._extend(symbol, self.advance if rows else self.history)
+            if start_time is None:
+                return rows[-limit:]
+            first = max(0, (start_time - self._origin + 59_999) // 60_000)
+            return rows[first:first + limit]
+
+    def start(self):
+        """在后台线程中启动服务器，返回后即可连接"""
+        self._server = ThreadingHTTPServer((self.host, self.port), _RestHandler)
+        self._server.daemon_threads = True
+        self._server.owner = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(2)
+
+
+class _LLMHandler(_QuietHandler):
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        server = self.server.owner
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        if urlparse(self.path).path.rstrip('/') != '/v1/chat/completions':
+            self._send_json(404, {'error': {'message': 'not found'}})
+            return
+        if not self.headers.get('Authorization', '').startswith('Bearer '):
+            self._send_json(401, {'error': {'message': 'missing api key'}})
+            return
+
+        with server.lock:
+            server.requests += 1
+        messages = body.get('messages', [])
+        prompt = messages[-1]['content'] if messages else ''
+        chunks = server.reply_chunks(prompt)
+        model = body.get('model', 'mock')
+
+        if not body.get('stream'):
+            self._send_json(200, {
+                'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': ''.join(chunks)},
+                             'finish_reason': 'stop'}],
+            })
+            return
+
+        # SSE流式输出，使用分块传输编码
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def write(event):
+            data = f"data: {event}\n\n".encode('utf-8')
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        try:
+            for chunk in chunks:
+                time.sleep(server.delay)
+                write(json.dumps({
+                    'model': model,
+                    'choices': [{'index': 0, 'delta': {'content': chunk}, 'finish_reason': None}],
+                }, ensure_ascii=False))
+            write('[DONE]')
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class MockLLMServer:
+    """
+    模拟OpenAI兼容的 /v1/chat/completions 接口
+
+    支持普通和SSE流式两种返回方式，逐字推送固定格式的分析文字，
+    并统计收到的请求数，用于验证缓存和请求合并
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, delay=0.02, reply=None):
+        """
+        Args:
+            port: 监听端口，0表示随机端口
+            delay: 流式输出每个数据块的间隔（秒）
+            reply: 固定回复文字，默认根据摘要首行生成
+        """
+        self.host = host
+        self.port = port
+        self.delay = delay
+        self.reply = reply
+        self.requests = 0
+        self.lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/v1"
+
+    def reply_chunks(self, prompt):
+        """回复按2个字符一块切分"""
+        text = self.reply
+        if text is None:
+            first_line = prompt.splitlines()[0] if prompt else ''
+            text = f"【模拟分析】{first_line}。短线震荡为主，注意控制仓位。"
+        return [text[i:i + 2] for i in range(0, len(text), 2)]
+
+    def start(self):
+        """在后台线程中启动服务器，返回后即可连接"""
+        self._server = ThreadingHTTPServer((self.host, self.port), _LLMHandler)
+        self._server.daemon_threads = True
+        self._server.owner = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地模拟服务器')
+    sub = parser.add_subparsers(dest='command', required=True)
+    stream = sub.add_parser('stream', help='模拟行情推送')
+    stream.add_argument('--port', type=int, default=8765)
+    stream.add_argument('--rate', type=float, default=20.0)
+    rest = sub.add_parser('rest', help='模拟币安REST接口')
+    rest.add_argument('--port', type=int, default=8767)
+    rest.add_argument('--latency', type=float, default=0.0)
+    rest.add_argument('--jitter', type=float, default=0.0)
+    llm = sub.add_parser('llm', help='模拟OpenAI兼容的对话接口')
+    llm.add_argument('--port', type=int, default=8766)
+    llm.add_argument('--delay', type=float, default=0.02)
+    args = parser.parse_args()
+
+    if args.command == 'stream':
+        server = MockStreamServer(port=args.port, rate=args.rate).start()
+        print(f"模拟行情推送已启动: {server.url}")
+    elif args.command == 'rest':
+        server = MockBinanceServer(port=args.port, latency=args.latency, jitter=args.jitter).start()
+        print(f"模拟REST接口已启动: {server.url}")
+    elif args.command == 'llm':
+        server = MockLLMServer(port=args.port, delay=args.delay).start()
+        print(f"模拟对话接口已启动: {server.url}")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
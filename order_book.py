@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地订单簿
+按币安文档的方式同步：先订阅增量深度流并缓存事件，再用REST深度快照初始化，
+之后逐条应用增量更新（每个价位O(log n)），发现序号断档时重新取快照；
+由订单簿计算买卖失衡、价差等盘口特征
+"""
+
+import bisect
+import threading
+import time
+from collections import deque
+
+from kivy.clock import Clock
+from kivy.logger import Logger
+
+# 可选的有序字典实现，未安装时用二分查找的有序列表
+try:
+    from sortedcontainers import SortedDict
+except ImportError:
+    SortedDict = None
+
+from binance_client import binance_client
+from fetch_engine import fetch_engine
+from price_stream import price_stream
+from rate_governor import BACKGROUND
+
+# REST快照档位数（100档权重5），盘口特征只用前几档
+SNAPSHOT_LIMIT = 100
+
+# 增量深度流更新间隔，100ms或1000ms
+DEPTH_SPEED = '100ms'
+
+# 计算失衡使用的档位数
+FEATURE_LEVELS = 10
+
+# 重新取快照的最短间隔（秒），持续断档时不会频繁请求
+RESYNC_DELAY = 1.0
+
+
+class _BisectSortedDict:
+    """SortedDict的最小替代：键保存在有序列表中，查找为二分查找"""
+
+    def __init__(self):
+        self._keys = []
+        self._values = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __setitem__(self, key, value):
+        if key not in self._values:
+            bisect.insort(self._keys, key)
+        self._values[key] = value
+
+    def pop(self, key, default=None):
+        if key not in self._values:
+            return default
+        del self._keys[bisect.bisect_left(self._keys, key)]
+        return self._values.pop(key)
+
+    def clear(self):
+        self._keys.clear()
+        self._values.clear()
+
+    def islice(self, start=None, stop=None):
+        return iter(self._keys[start:stop])
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+
+def _levels():
+    return SortedDict() if SortedDict is not None else _BisectSortedDict()
+
+
+class OrderBook:
+    """
+    单个交易对的订单簿（线程安全）
+
+    买卖两侧都按"从优到劣"排序：卖单以价格为键，买单以负价格为键，
+    最优价总在第0位；增量事件在推送线程中应用，特征在UI线程读取
+    """
+
+    def __init__(self, symbol, max_buffer=1000):
+        self.symbol = symbol
+        self.bids = _levels()  # -价格 -> 数量
+        self.asks = _levels()  # 价格 -> 数量
+        self.last_update_id = None
+        self.synced = False
+        self.updates = 0
+        self.updated_at = 0.0
+        self._buffer = deque(maxlen=max_buffer)  # 快照到达前的增量事件
+        self._lock = threading.Lock()
+
+    def load_snapshot(self, snapshot):
+        """
+        用REST深度快照初始化，并应用快照之后缓存的增量事件
+
+        Args:
+            snapshot: /api/v3/depth 的返回值
+
+        Returns:
+            bool: 是否同步成功；快照早于缓存的事件或应用时断档则需要重新取快照
+        """
+        with self._lock:
+            self.bids.clear()
+            self.asks.clear()
+            for price, qty in snapshot['bids']:
+                self._set(self.bids, -float(price), float(qty))
+            for price, qty in snapshot['asks']:
+                self._set(self.asks, float(price), float(qty))
+            self.last_update_id = snapshot['lastUpdateId']
+            buffered = list(self._buffer)
+            self._buffer.clear()
+            if buffered and buffered[0]['U'] > self.last_update_id + 1:
+                # 快照太旧，和缓存的事件之间缺了一段，事件留着等下一个快照
+                self._buffer.extend(buffered)
+                return False
+            self.synced = True
+            return all(self._apply(event) for event in buffered)
+
+    def apply(self, event):
+        """
+        应用一条增量深度事件（depthUpdate）
+
+        Returns:
+            bool: False表示序号断档，订单簿已失效，需要重新取快照
+        """
+        with self._lock:
+            if not self.synced:
+                self._buffer.append(event)
+                return True
+            return self._apply(event)
+
+    def _apply(self, event):
+        # 在持有 self._lock 时调用
+        if event['u'] <= self.last_update_id:
+            # 快照已包含的旧事件
+            return True
+        if event['U'] > self.last_update_id + 1:
+            self.synced = False
+            self._buffer.clear()
+            return False
+        for price, qty in event['b']:
+            self._set(self.bids, -float(price), float(qty))
+        for price, qty in event['a']:
+            self._set(self.asks, float(price), float(qty))
+        self.last_update_id = event['u']
+        self.updates += 1
+        self.updated_at = time.time()
+        return True
+
+    @staticmethod
+    def _set(levels, key, qty):
+        # 数量为0表示该价位已撤空
+        if qty > 0:
+            levels[key] = qty
+        else:
+            levels.pop(key, None)
+
+    def top(self, levels=FEATURE_LEVELS):
+        """
+        Returns:
+            tuple: (买盘 [(价格, 数量)], 卖盘 [(价格, 数量)])，都从最优价开始
+        """
+        with self._lock:
+            bids = [(-key, self.bids[key]) for key in self.bids.islice(0, levels)]
+            asks = [(key, self.asks[key]) for key in self.asks.islice(0, levels)]
+        return bids, asks
+
+    def features(self, levels=FEATURE_LEVELS):
+        """
+        盘口特征
+
+        Args:
+            levels: 计算失衡和深度使用的档位数
+
+        Returns:
+            dict: 买一、卖一、中间价、微观价格、价差、价差基点、买卖失衡(-1~1)、
+                  买卖深度、距上次更新的秒数；未同步或一侧为空时返回None
+        """
+        if not self.synced:
+            return None
+        bids, asks = self.top(levels)
+        if not bids or not asks:
+            return None
+        (bid, bid_qty), (ask, ask_qty) = bids[0], asks[0]
+        bid_depth = sum(qty for _, qty in bids)
+        ask_depth = sum(qty for _, qty in asks)
+        mid = (bid + ask) / 2
+        spread = ask - bid
+        return {
+            'bid': bid,
+            'ask': ask,
+            'mid': mid,
+            # 按一档数量加权，买盘厚时更靠近卖一
+            'microprice': (bid * ask_qty + ask * bid_qty) / (bid_qty + ask_qty),
+            'spread': spread,
+            'spread_bps': spread / mid * 1e4 if mid > 0 else 0.0,
+            'imbalance': (bid_depth - ask_depth) / (bid_depth + ask_depth),
+            'bid_depth': bid_depth,
+            'ask_depth': ask_depth,
+            'age': time.time() - self.updated_at if self.updated_at else None,
+        }
+
+
+def format_features(features):
+    """盘口特征的显示文字"""
+    if features is None:
+        return '📖 盘口: 同步中...'
+    imbalance = features['imbalance']
+    side = '买盘强' if imbalance > 0.2 else '卖盘强' if imbalance < -0.2 else '均衡'
+    return (f"📖 盘口: 买卖失衡 {imbalance:+.0%}（{side}） | "
+            f"价差 {features['spread']:.6g} ({features['spread_bps']:.2f}bp)")
+
+
+class OrderBookManager:
+    """按需维护各交易对的本地订单簿，只有正在查看的交易对订阅深度流"""
+
+    def __init__(self, client=binance_client, engine=fetch_engine, stream=price_stream,
+                 limit=SNAPSHOT_LIMIT, speed=DEPTH_SPEED, resync_delay=RESYNC_DELAY):
+        self.client = client
+        self.engine = engine
+        self.stream = stream
+        self.limit = limit
+        self.speed = speed
+        self.resync_delay = resync_delay
+        self.books = {}  # 交易对 -> OrderBook
+        self._tasks = {}  # 交易对 -> 进行中的快照请求
+        self._scheduled = set()  # 已安排重新取快照的交易对
+        self._lock = threading.Lock()
+        self.stats = {'snapshots': 0, 'resyncs': 0, 'errors': 0}
+
+    def _stream_name(self, symbol):
+        return f"{symbol.lower()}@depth@{self.speed}"
+
+    def watch(self, symbol):
+        """开始维护订单簿：先订阅深度流缓存事件，再取快照"""
+        with self._lock:
+            if symbol in self.books:
+                return self.books[symbol]
+            book = self.books[symbol] = OrderBook(symbol)
+        self.stream.subscribe_streams([self._stream_name(symbol)])
+        self._fetch_snapshot(symbol)
+        return book
+
+    def unwatch(self, symbol):
+        """停止维护订单簿并取消深度流订阅"""
+        with self._lock:
+            book = self.books.pop(symbol, None)
+            task = self._tasks.pop(symbol, None)
+        if book is None:
+            return
+        if task is not None:
+            task.cancel()
+        self.stream.unsubscribe_streams([self._stream_name(symbol)])
+
+    def features(self, symbol, levels=FEATURE_LEVELS):
+        book = self.books.get(symbol)
+        return book.features(levels) if book is not None else None
+
+    def on_depth(self, event):
+        """增量深度事件回调（在推送线程执行）"""
+        book = self.books.get(event.get('s'))
+        if book is None:
+            return
+        if not book.apply(event):
+            Logger.info(f"OrderBookManager: {book.symbol} 深度序号断档，重新同步")
+            self._schedule_resync(book.symbol)
+
+    def _schedule_resync(self, symbol):
+        with self._lock:
+            if symbol in self._scheduled:
+                return
+            self._scheduled.add(symbol)
+            self.stats['resyncs'] += 1
+        Clock.schedule_once(lambda dt: self._resync(symbol), self.resync_delay)
+
+    def _resync(self, symbol):
+        with self._lock:
+            self._scheduled.discard(symbol)
+        self._fetch_snapshot(symbol)
+
+    def _fetch_snapshot(self, symbol):
+        with self._lock:
+            if symbol not in self.books:
+                return
+            task = self._tasks.get(symbol)
+            if task is not None and not task.done():
+                return
+            self._tasks[symbol] = self.engine.submit(
+                self.client.depth, symbol, self.limit, priority=BACKGROUND,
+                on_success=lambda snapshot: self._on_snapshot(symbol, snapshot),
+                on_error=lambda e: self._on_snapshot_error(symbol, e),
+                name=f'depth:{symbol}'
+            )
+
+    def _on_snapshot(self, symbol, snapshot):
+        book = self.books.get(symbol)
+        if book is None:
+            return
+        self.stats['snapshots'] += 1
+        if not book.load_snapshot(snapshot):
+            self._schedule_resync(symbol)
+
+    def _on_snapshot_error(self, symbol, e):
+        self.stats['errors'] += 1
+        Logger.warning(f"OrderBookManager: {symbol} 获取深度快照失败 - {e}")
+        if symbol in self.books:
+            self._schedule_resync(symbol)
+
+    def snapshot(self):
+        books = list(self.books.values())
+        stats = dict(self.stats)
+        stats['books'] = len(books)
+        stats['synced'] = sum(1 for book in books if book.synced)
+        stats['updates'] = sum(book.updates for book in books)
+        return stats
+
+
+# 全局订单簿管理
+order_books = OrderBookManager()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能追踪
+各阶段（连接、服务器响应、解析、计算、界面构建）调用 record()/span() 记录耗时，
+诊断界面读取最近的统计，也可导出为JSON用于现场排查
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from kivy.logger import Logger
+
+
+def percentile(ordered, q):
+    """已排序列表的分位数（最近秩法：第 ceil(q% × n) 个值）"""
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, math.ceil(q / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    """
+    Returns:
+        dict: 样本数、最近一次、p50、p95、最大值（毫秒）
+    """
+    ordered = sorted(samples)
+    return {
+        'n': len(ordered),
+        'last': samples[-1] if samples else 0.0,
+        'p50': percentile(ordered, 50),
+        'p95': percentile(ordered, 95),
+        'max': ordered[-1] if ordered else 0.0,
+    }
+
+
+class PerfTrace:
+    """
+    耗时记录器（线程安全）
+
+    每个阶段保留最近window个样本用于统计，另保留最近max_events条明细用于导出；
+    记录一次只是两次deque追加，可以常开
+    """
+
+    def __init__(self, window=256, max_events=2000):
+        self.window = window
+        self.enabled = True
+        self._stages = {}  # 阶段 -> deque[毫秒]
+        self._counts = {}  # 阶段 -> 累计次数
+        self._events = deque(maxlen=max_events)
+        self._sources = {}  # 名称 -> 返回dict的函数
+        self._lock = threading.Lock()
+        self._origin = time.time() - time.perf_counter()
+
+    def record(self, stage, ms, **meta):
+        """
+        记录一次耗时
+
+        Args:
+            stage: 阶段名，如 connect、server、parse
+            ms: 耗时（毫秒）
+            meta: 附加信息，导出时保留，如 symbol、path
+        """
+        if not self.enabled:
+            return
+        end = time.perf_counter()
+        with self._lock:
+            samples = self._stages.get(stage)
+            if samples is None:
+                samples = self._stages[stage] = deque(maxlen=self.window)
+            samples.append(ms)
+            self._counts[stage] = self._counts.get(stage, 0) + 1
+            self._events.append((end, stage, ms, meta))
+
+    @contextmanager
+    def span(self, stage, **meta):
+        """用with包住一个阶段，自动记录耗时"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - start) * 1000, **meta)
+
+    def add_source(self, name, func):
+        """注册统计来源，快照和导出时调用 func() 获取dict"""
+        self._sources[name] = func
+
+    def stage_stats(self):
+        """
+        Returns:
+            dict: {阶段: summarize() 的结果，另含累计次数 total}
+        """
+        with self._lock:
+            stages = {name: list(samples) for name, samples in self._stages.items()}
+            counts = dict(self._counts)
+        result = {}
+        for name, samples in stages.items():
+            result[name] = summarize(samples)
+            result[name]['total'] = counts[name]
+        return result
+
+    def sources(self):
+        """调用所有统计来源，出错的来源记录错误信息"""
+        result = {}
+        for name, func in list(self._sources.items()):
+            try:
+                result[name] = func()
+            except Exception as e:
+                result[name] = {'error': str(e)}
+        return result
+
+    def snapshot(self):
+        return {'stages': self.stage_stats(), 'sources': self.sources()}
+
+    def events(self):
+        """最近的明细，时间为Unix时间戳（秒）"""
+        with self._lock:
+            events = list(self._events)
+        return [
+            dict(meta, time=round(self._origin + end, 4), stage=stage, ms=round(ms, 3))
+            for end, stage, ms, meta in events
+        ]
+
+    def export(self, path):
+        """
+        导出统计、统计来源和明细到JSON文件
+
+        Returns:
+            str: 文件路径
+        """
+        data = self.snapshot()
+        data['exported_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        data['events'] = self.events()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1, default=str)
+        Logger.info(f"PerfTrace: 已导出 {len(data['events'])} 条记录到 {path}")
+        return path
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counts.clear()
+            self._events.clear()
+
+
+class FrameMonitor:
+    """帧耗时统计，每帧由Clock回调记录与上一帧的间隔"""
+
+    # 直方图各档上限（毫秒），最后一档为超过100ms
+    BUCKETS = (8.3, 16.7, 33.3, 50.0, 100.0)
+
+    def __init__(self, window=600):
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.recent = deque(maxlen=window)
+        self.frames = 0
+        self._event = None
+
+    def start(self):
+        if self._event is None:
+            from kivy.clock import Clock
+            self._event = Clock.schedule_interval(self._tick, 0)
+
+    def stop(self):
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+
+    def _tick(self, dt):
+        ms = dt * 1000
+        self.frames += 1
+        self.recent.append(ms)
+        for i, bound in enumerate(self.BUCKETS):
+            if ms <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def histogram(self):
+        """[(档位标签, 帧数)]"""
+        labels = [f"<={b:g}ms" for b in self.BUCKETS] + [f">{self.BUCKETS[-1]:g}ms"]
+        return list(zip(labels, self.counts))
+
+    def snapshot(self):
+        stats = summarize(list(self.recent))
+        stats.update(
+            frames=self.frames,
+            janky=sum(self.counts[2:]),  # 超过16.7ms即掉帧
+            histogram=dict(self.histogram()),
+        )
+        return stats
+
+
+def memory_usage():
+    """
+    进程内存（MB）
+
+    rss为当前常驻内存（Linux/Android读取/proc），peak为峰值
+    """
+    result = {}
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        result['rss_mb'] = pages * os.sysconf('SC_PAGE_SIZE') / 1048576
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux单位为KB，macOS为字节
+        result['peak_mb'] = peak / (1048576 if os.uname().sysname == 'Darwin' else 1024)
+    except (ImportError, AttributeError):
+        pass
+    return result
+
+
+# 全局性能追踪
+perf_trace = PerfTrace()
+
+# 全局帧耗时统计
+frame_monitor = FrameMonitor()
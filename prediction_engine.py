@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多周期预测引擎
+每次刷新构建一次特征矩阵，对所有交易对和预测周期做一次批量推理，
+输出上涨/下跌概率和目标价格区间
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from indicators import IndicatorEngine
+from kline_store import CLOSE
+
+# 预测周期（分钟），基于1分钟K线即为向前的K线根数
+HORIZONS = (10, 30, 60)
+
+FEATURE_NAMES = (
+    'ret_1', 'ret_5', 'ret_15', 'rsi', 'macd_hist',
+    'bb_pos', 'volatility', 'vwap_dist', 'ema_spread',
+)
+
+# 指标预热期，之前的K线不参与训练
+WARMUP = 60
+
+
+def _feature_columns(close, lag1, lag5, lag15, rsi, macd_hist, bb_mid, bb_upper,
+                     bb_lower, atr, vwap, ema_fast, ema_slow):
+    """
+    特征公式（标量或数组均可），训练和推理共用，保证口径一致
+
+    价格类特征都按ATR或收盘价归一化，不同交易对可以共用一个模型
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        atr = np.where(atr > 0, atr, np.nan)
+        band = bb_upper - bb_lower
+        columns = (
+            np.log(close / lag1),
+            np.log(close / lag5),
+            np.log(close / lag15),
+            (rsi - 50.0) / 50.0,
+            macd_hist / atr,
+            np.where(band > 0, (close - bb_mid) / band, 0.0),
+            atr / close,
+            (close - vwap) / atr,
+            (ema_fast - ema_slow) / atr,
+        )
+    return np.nan_to_num(np.stack(columns, axis=-1), nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def build_feature_matrix(series):
+    """
+    整段历史的特征矩阵（向量化）
+
+    Args:
+        series: IndicatorEngine.series() 的返回值
+
+    Returns:
+        ndarray: 形状为 (n, 特征数)
+    """
+    close = series['close']
+
+    def lag(k):
+        return np.concatenate((np.full(k, close[0]), close[:-k]))
+
+    return _feature_columns(
+        close, lag(1), lag(5), lag(15), series['rsi'], series['macd_hist'],
+        series['bb_mid'], series['bb_upper'], series['bb_lower'], series['atr'],
+        series['vwap'], series['ema_fast'], series['ema_slow'],
+    )
+
+
+def feature_row(values, closes):
+    """
+    最新一根K线的特征
+
+    Args:
+        values: IndicatorEngine.values
+        closes: 已收盘K线的收盘价（至少16根）
+    """
+    def lag(k):
+        return closes[-1 - k] if closes.size > k else closes[0]
+
+    return _feature_columns(
+        values['close'], lag(1), lag(5), lag(15), values['rsi'], values['macd_hist'],
+        values['bb_mid'], values['bb_upper'], values['bb_lower'], values['atr'],
+        values['vwap'], values['ema_fast'], values['ema_slow'],
+    )
+
+
+def forward_returns(close, horizons=HORIZONS):
+    """
+    各周期的未来收益率
+
+    Returns:
+        ndarray: 形状为 (n, 周期数)，末尾无法计算的位置为NaN
+    """
+    out = np.full((close.size, len(horizons)), np.nan)
+    for j, h in enumerate(horizons):
+        if close.size > h:
+            out[:-h, j] = close[h:] / close[:-h] - 1.0
+    return out
+
+
+def move_stats(returns):
+    """
+    各周期上涨时的平均涨幅和下跌时的平均跌幅
+
+    Args:
+        returns: forward_returns() 的返回值
+
+    Returns:
+        tuple: (平均涨幅, 平均跌幅)，每个周期一项
+    """
+    up, down = returns > 0, returns < 0
+    up_mean = np.where(up, returns, 0.0).sum(axis=0) / np.maximum(up.sum(axis=0), 1)
+    down_mean = np.where(down, -returns, 0.0).sum(axis=0) / np.maximum(down.sum(axis=0), 1)
+    return up_mean, down_mean
+
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+
+class LogisticModel:
+    """多输出逻辑回归（纯NumPy），每个预测周期一列权重，一次矩阵乘法完成全部推理"""
+
+    def __init__(self, n_features, n_outputs, l2=1e-3):
+        self.l2 = l2
+        self.weights = np.zeros((n_features, n_outputs))
+        self.bias = np.zeros(n_outputs)
+        self.mean = np.zeros(n_features)
+        self.scale = np.ones(n_features)
+        self.fitted = False
+
+    def fit(self, X, Y, iterations=300, learning_rate=0.5):
+        """
+        批量梯度下降，所有输出同时训练
+
+        Args:
+            X: (n, 特征数)
+            Y: (n, 输出数)，取值0/1
+        """
+        self.mean = X.mean(axis=0)
+        self.scale = X.std(axis=0)
+        self.scale[self.scale == 0] = 1.0
+        Xs = (X - self.mean) / self.scale
+        n = Xs.shape[0]
+        for _ in range(iterations):
+            error = _sigmoid(Xs @ self.weights + self.bias) - Y
+            self.weights -= learning_rate * (Xs.T @ error / n + self.l2 * self.weights)
+            self.bias -= learning_rate * error.mean(axis=0)
+        self.fitted = True
+        return self
+
+    def predict_proba(self, X):
+        """上涨概率，形状为 (n, 输出数)"""
+        return _sigmoid(((X - self.mean) / self.scale) @ self.weights + self.bias)
+
+
+class PredictionEngine:
+    """
+    预测引擎
+
+    持有每个交易对的指标引擎；训练时把所有交易对的历史合并成一个样本集，
+    推理时把所有交易对的最新特征堆成一个矩阵做一次批量计算
+    """
+
+    def __init__(self, horizons=HORIZONS, refit_every=60, min_samples=200):
+        self.horizons = tuple(horizons)
+        self.refit_every = refit_every
+        self.min_samples = min_samples
+        self.model = LogisticModel(len(FEATURE_NAMES), len(self.horizons))
+        self.indicators = {}
+        self.moves = {}  # 交易对 -> (平均上涨幅度, 平均下跌幅度)，每个周期一列
+        self.timings = {}
+        self._buffers = {}
+        self._fitted_counts = {}
+        # 同步、训练和推理可能在计算线程中执行，共享的指标状态和模型用同一把锁保护
+        self.lock = threading.RLock()
+
+    def indicator(self, symbol):
+        """交易对的指标引擎，不存在时创建"""
+        engine = self.indicators.get(symbol)
+        if engine is None:
+            engine = self.indicators[symbol] = IndicatorEngine()
+        return engine
+
+    def sync(self, symbol, buffer):
+        """
+        同步K线到指标引擎
+
+        Args:
+            buffer: 交易对的 KlineRingBuffer
+        """
+        with self.lock:
+            self._buffers[symbol] = buffer
+            # 在计算线程执行，请求线程可能同时写入缓冲区，取拷贝
+            return self.indicator(symbol).sync(buffer.snapshot())
+
+    def reset(self):
+        """清空指标状态和已训练的模型，下次同步和预测走完整的冷启动路径"""
+        with self.lock:
+            for engine in self.indicators.values():
+                engine.reset()
+            self.model = LogisticModel(len(FEATURE_NAMES), len(self.horizons))
+            self.moves.clear()
+            self._fitted_counts.clear()
+
+    def _needs_fit(self):
+        if not self.model.fitted:
+            return True
+        return any(
+            engine.count - self._fitted_counts.get(symbol, 0) >= self.refit_every
+            for symbol, engine in self.indicators.items()
+        )
+
+    def fit(self):
+        """用全部交易对的已收盘K线训练模型，并统计各周期的平均涨跌幅"""
+        features, labels = [], []
+        max_h = max(self.horizons)
+        for symbol, buffer in self._buffers.items():
+            closed = buffer.snapshot()[:, :-1]
+            if closed.shape[1] <= WARMUP + max_h:
+                continue
+            close = closed[CLOSE]
+            X = build_feature_matrix(self.indicator(symbol).series(closed))
+            R = forward_returns(close, self.horizons)
+            rows = slice(WARMUP, close.size - max_h)
+            features.append(X[rows])
+            labels.append((R[rows] > 0).astype(np.float64))
+            self.moves[symbol] = move_stats(R[WARMUP:])
+            self._fitted_counts[symbol] = self.indicator(symbol).count
+
+        if not features or sum(len(x) for x in features) < self.min_samples:
+            return False
+        self.model.fit(np.concatenate(features), np.concatenate(labels))
+        return True
+
+    def predict(self, symbols, prices):
+        """
+        对多个交易对做一次批量预测
+
+        Args:
+            symbols: 交易对列表
+            prices: {交易对: 当前价格}
+
+        Returns:
+            dict: symbols、p_up (交易对数, 周期数)、up_move/down_move（收益率）、
+                  low/high（目标价格区间）、timings（各阶段耗时，毫秒）
+        """
+        with self.lock:
+            return self._predict(symbols, prices)
+
+    def _predict(self, symbols, prices):
+        timings = {}
+        start = time.perf_counter()
+        if self._needs_fit():
+            self.fit()
+            timings['fit'] = (time.perf_counter() - start) * 1000
+
+        t = time.perf_counter()
+        symbols = [s for s in symbols if self.indicators.get(s) and self.indicators[s].values]
+        X = np.empty((len(symbols), len(FEATURE_NAMES)))
+        for i, symbol in enumerate(symbols):
+            closes = self._buffers[symbol].snapshot(17)[CLOSE, :-1]
+            X[i] = feature_row(self.indicators[symbol].values, closes)
+        timings['features'] = (time.perf_counter() - t) * 1000
+
+        t = time.perf_counter()
+        if self.model.fitted:
+            p_up = self.model.predict_proba(X)
+        else:
+            p_up = np.full((len(symbols), len(self.horizons)), 0.5)
+        timings['inference'] = (time.perf_counter() - t) * 1000
+
+        t = time.perf_counter()
+        moves = [self.moves.get(s) or self._default_moves(s) for s in symbols]
+        up_move = np.array([m[0] for m in moves]).reshape(p_up.shape)
+        down_move = np.array([m[1] for m in moves]).reshape(p_up.shape)
+        price = np.array([prices[s] for s in symbols]).reshape(-1, 1)
+        low = price * (1.0 - down_move)
+        high = price * (1.0 + up_move)
+        timings['ranges'] = (time.perf_counter() - t) * 1000
+        timings['total'] = (time.perf_counter() - start) * 1000
+
+        self.timings = timings
+        return {
+            'symbols': symbols,
+            'horizons': self.horizons,
+            'p_up': p_up,
+            'up_move': up_move,
+            'down_move': down_move,
+            'low': low,
+            'high': high,
+            'timings': timings,
+        }
+
+    def _default_moves(self, symbol):
+        """历史不足时按ATR和随机游走估算涨跌幅"""
+        values = self.indicators[symbol].values
+        move = values['atr'] / values['close'] * np.sqrt(np.array(self.horizons, dtype=np.float64))
+        return move, move
+
+
+# 全局预测引擎
+prediction_engine = PredictionEngine()
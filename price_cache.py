@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+价格/K线缓存
+按交易对缓存最近数据，过期后仍可先返回旧值（stale-while-revalidate），由调用方后台刷新
+"""
+
+import threading
+import time
+
+FRESH = 'fresh'
+STALE = 'stale'
+MISS = 'miss'
+
+# 各类数据的新鲜期和最长可用期（秒）
+DEFAULT_TTL = {
+    'price': (5.0, 300.0),
+    'klines': (60.0, 3600.0),
+}
+
+
+class PriceCache:
+    """带TTL的缓存，记录命中、过期命中和未命中次数"""
+
+    def __init__(self, ttl=None, clock=time.monotonic):
+        """
+        Args:
+            ttl: {数据类型: (新鲜期, 最长可用期)}，键的第一项为数据类型
+            clock: 时间函数
+        """
+        self.ttl = dict(DEFAULT_TTL)
+        if ttl:
+            self.ttl.update(ttl)
+        self.clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._age_total = 0.0
+
+    def _limits(self, key):
+        return self.ttl.get(key[0], (0.0, 0.0))
+
+    def put(self, key, value):
+        """
+        写入缓存
+
+        Args:
+            key: 元组，如 ('price', 'BTCUSDT') 或 ('klines', 'BTCUSDT', '1m')
+        """
+        with self._lock:
+            self._entries[key] = (value, self.clock())
+
+    def get(self, key):
+        """
+        读取缓存
+
+        Returns:
+            tuple: (值, 已缓存秒数, 状态)，状态为 fresh/stale/miss；
+                   stale表示值可以先显示，但调用方应在后台刷新
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            fresh_ttl, max_age = self._limits(key)
+            if entry is None:
+                self.misses += 1
+                return None, None, MISS
+
+            value, stored_at = entry
+            age = self.clock() - stored_at
+            if age > max_age:
+                del self._entries[key]
+                self.misses += 1
+                return None, None, MISS
+
+            self._age_total += age
+            if age <= fresh_ttl:
+                self.hits += 1
+                return value, age, FRESH
+            self.stale_hits += 1
+            return value, age, STALE
+
+    def invalidate(self, key=None):
+        """删除指定缓存，不指定则全部清空"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """缓存统计"""
+        with self._lock:
+            served = self.hits + self.stale_hits
+            lookups = served + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'hit_rate': served / lookups if lookups else 0.0,
+                'avg_age': self._age_total / served if served else 0.0,
+            }
+
+
+# 全局缓存实例
+price_cache = PriceCache()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+实时行情推送
+通过WebSocket订阅币安成交/行情流，在后台线程中维护各交易对的最新价格；
+同一连接上也可订阅增量深度流，事件交给订单簿处理
+"""
+
+import asyncio
+import json
+import random
+import threading
+
+import websockets
+from kivy.clock import Clock
+from kivy.logger import Logger
+
+STREAM_URL = 'wss://stream.binance.com:9443/stream'
+
+# 事件类型 -> 价格字段
+PRICE_FIELDS = {
+    'trade': 'p',
+    'aggTrade': 'p',
+    '24hrTicker': 'c',
+    '24hrMiniTicker': 'c',
+}
+
+
+class StreamStats:
+    """推送统计"""
+
+    def __init__(self):
+        self.messages = 0
+        self.dropped = 0
+        self.reconnects = 0
+        self.flushes = 0
+        self.connected = False
+
+    def snapshot(self):
+        return dict(vars(self))
+
+
+class PriceStream:
+    """
+    实时价格流
+
+    接收协程只负责把原始消息放入有界队列，队列满时丢弃最旧消息；
+    解析协程把价格合并到"最新价格"表中，UI线程每帧最多取一次，
+    行情再快也不会堆积回调
+    """
+
+    def __init__(self, url=STREAM_URL, streams=('trade',), on_prices=None, on_depth=None,
+                 ping_interval=20, ping_timeout=20, idle_timeout=60,
+                 reconnect_base=1.0, reconnect_cap=30.0, queue_size=1000,
+                 dispatch=None):
+        """
+        Args:
+            url: 组合流地址
+            streams: 每个交易对订阅的流类型，如 trade、ticker、miniTicker
+            on_prices: 价格回调 callback({交易对: 价格})，默认在UI线程执行
+            on_depth: 增量深度回调 callback(事件)，在推送线程执行，需自行保证线程安全
+            ping_interval: 心跳间隔（秒）
+            ping_timeout: 心跳超时（秒）
+            idle_timeout: 超过该时间无任何消息则重连（秒）
+            queue_size: 待解析消息队列上限
+            dispatch: 回调调度函数，默认通过Clock回到UI线程
+        """
+        self.url = url
+        self.streams = tuple(streams)
+        self.on_prices = on_prices
+        self.on_depth = on_depth
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.idle_timeout = idle_timeout
+        self.reconnect_base = reconnect_base
+        self.reconnect_cap = reconnect_cap
+        self.queue_size = queue_size
+        self.dispatch = dispatch or (lambda func: Clock.schedule_once(lambda dt: func(), 0))
+
+        self.symbols = set()
+        self.extra_streams = set()  # 不属于价格的流，如 btcusdt@depth@100ms
+        self.prices = {}
+        self.stats = StreamStats()
+
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._flush_scheduled = False
+        self._thread = None
+        self._loop = None
+        self._stop = None  # asyncio.Event，在推送线程的事件循环中创建
+        self._stopping = threading.Event()  # 事件循环建立前也能可靠地请求停止
+        self._ws = None
+        self._attempt = 0
+        self._request_id = 0
+
+    # ---------- 订阅管理 ----------
+
+    def _stream_names(self, symbols):
+        return [f"{symbol.lower()}@{stream}" for symbol in sorted(symbols) for stream in self.streams]
+
+    def _stream_url(self):
+        names = self._stream_names(self.symbols) + sorted(self.extra_streams)
+        return f"{self.url}?streams={'/'.join(names)}"
+
+    def subscribe(self, symbols):
+        """增加订阅的交易对，已连接时即时发送订阅请求"""
+        new = set(symbols) - self.symbols
+        if not new:
+            return
+        self.symbols |= new
+        self._send_method('SUBSCRIBE', self._stream_names(new))
+
+    def unsubscribe(self, symbols):
+        """取消订阅交易对"""
+        removed = set(symbols) & self.symbols
+        if not removed:
+            return
+        self.symbols -= removed
+        self._send_method('UNSUBSCRIBE', self._stream_names(removed))
+
+    def subscribe_streams(self, names):
+        """按流名称订阅，如 btcusdt@depth@100ms"""
+        new = set(names) - self.extra_streams
+        if not new:
+            return
+        self.extra_streams |= new
+        self._send_method('SUBSCRIBE', sorted(new))
+
+    def unsubscribe_streams(self, names):
+        removed = set(names) & self.extra_streams
+        if not removed:
+            return
+        self.extra_streams -= removed
+        self._send_method('UNSUBSCRIBE', sorted(removed))
+
+    def _send_method(self, method, params):
+        if self._loop is None or self._ws is None:
+            return
+        self._request_id += 1
+        message = json.dumps({'method': method, 'params': params, 'id': self._request_id})
+        asyncio.run_coroutine_threadsafe(self._safe_send(message), self._loop)
+
+    async def _safe_send(self, message):
+        try:
+            if self._ws is not None:
+                await self._ws.send(message)
+        except Exception as e:
+            Logger.warning(f"PriceStream: 发送订阅请求失败 - {e}")
+
+    # ---------- 生命周期 ----------
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, symbols=()):
+        """在后台线程中启动推送"""
+        self.symbols |= set(symbols)
+        if self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._thread_main, name='price-stream', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """停止推送并等待后台线程退出"""
+        # 先置标志再检查事件循环：循环尚未建立时，_run() 建立后会读到标志
+        self._stopping.set()
+        loop, stop = self._loop, self._stop
+        if loop is not None and stop is not None:
+            loop.call_soon_threadsafe(stop.set)
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _thread_main(self):
+        try:
+            asyncio.run(self._run())
+        except Exception as e:
+            Logger.error(f"PriceStream: 推送线程异常退出 - {e}")
+        finally:
+            self._loop = None
+            self._stop = None
+            self.stats.connected = False
+
+    async def _run(self):
+        self._stop = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        if self._stopping.is_set():
+            self._stop.set()
+        self._attempt = 0
+        while not self._stop.is_set():
+            if not self.symbols and not self.extra_streams:
+                await self._sleep(1.0)
+                continue
+            try:
+                await self._connect_once()
+            except Exception as e:
+                Logger.warning(f"PriceStream: 连接中断 - {e}")
+            if self._stop.is_set():
+                break
+            # 指数退避 + 抖动后重连
+            delay = random.uniform(
+                0, min(self.reconnect_cap, self.reconnect_base * (2 ** self._attempt))
+            )
+            self._attempt += 1
+            self.stats.reconnects += 1
+            Logger.info(f"PriceStream: {delay:.1f}秒后重连")
+            await self._sleep(delay)
+
+    async def _sleep(self, delay):
+        try:
+            await asyncio.wait_for(self._stop.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _connect_once(self):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        async with websockets.connect(
+            self._stream_url(),
+            ping_interval=self.ping_interval,
+            ping_timeout=self.ping_timeout,
+            max_queue=self.queue_size,
+        ) as ws:
+            self._ws = ws
+            self._attempt = 0
+            self.stats.connected = True
+            Logger.info(f"PriceStream: 已连接，订阅 {len(self.symbols)} 个交易对")
+            tasks = [
+                asyncio.ensure_future(self._reader(ws, queue)),
+                asyncio.ensure_future(self._parser(queue)),
+                asyncio.ensure_future(self._stop.wait()),
+            ]
+            try:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                self._ws = None
+                self.stats.connected = False
+                for task in tasks:
+                    task.cancel()
+            for task in done:
+                if not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
+
+    async def _reader(self, ws, queue):
+        """接收消息；队列满时丢弃最旧消息，保证只处理最新行情"""
+        while True:
+            # 心跳帧由websockets自动应答，这里只检测长时间无数据的半开连接
+            message = await asyncio.wait_for(ws.recv(), self.idle_timeout)
+            self.stats.messages += 1
+            if queue.full():
+                queue.get_nowait()
+                self.stats.dropped += 1
+            queue.put_nowait(message)
+
+    async def _parser(self, queue):
+        while True:
+            message = await queue.get()
+            try:
+                self._handle_message(json.loads(message))
+            except (ValueError, KeyError, TypeError) as e:
+                Logger.warning(f"PriceStream: 无法解析消息 - {e}")
+
+    # ---------- 消息处理 ----------
+
+    def _handle_message(self, message):
+        data = message.get('data', message)
+        if isinstance(data, dict) and data.get('e') == 'depthUpdate':
+            if self.on_depth is not None:
+                self.on_depth(data)
+            return
+        field = PRICE_FIELDS.get(data.get('e')) if isinstance(data, dict) else None
+        if field is None:
+            # 订阅确认等非行情消息
+            return
+        self._push_price(data['s'], float(data[field]))
+
+    def _push_price(self, symbol, price):
+        """合并价格，每帧最多调度一次UI回调"""
+        with self._pending_lock:
+            self._pending[symbol] = price
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        self.dispatch(self._flush)
+
+    def _flush(self):
+        with self._pending_lock:
+            prices, self._pending = self._pending, {}
+            self._flush_scheduled = False
+        if not prices:
+            return
+        self.prices.update(prices)
+        self.stats.flushes += 1
+        if self.on_prices is not None:
+            self.on_prices(prices)
+
+
+# 全局实时价格流
+price_stream = PriceStream()
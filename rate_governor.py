@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+币安请求权重调度
+每个权重窗口一个令牌桶，按响应头 X-MBX-USED-WEIGHT-* 与服务器用量对齐；
+用户操作触发的请求优先，后台刷新在额度紧张时延后或直接放弃，避免触发429/418
+"""
+
+import math
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from kivy.logger import Logger
+
+# 请求优先级
+INTERACTIVE = 0  # 用户操作触发，只要额度够就立即发送
+BACKGROUND = 1  # 后台刷新，需给用户操作留出余量
+
+# 各窗口的权重上限（币安现货 REQUEST_WEIGHT 为每分钟6000）
+DEFAULT_LIMITS = {'1m': 6000}
+
+# 后台请求不能占用的额度比例
+DEFAULT_RESERVE = 0.2
+
+# 各优先级最长等待时间（秒），超过则放弃请求
+DEFAULT_MAX_WAIT = {INTERACTIVE: 10.0, BACKGROUND: 3.0}
+
+# 429/418 没有可用的 Retry-After 时暂停的秒数
+DEFAULT_RETRY_AFTER = 60.0
+
+_WEIGHT_HEADER = re.compile(r'^x-mbx-used-weight-(\d+[smhd])$', re.IGNORECASE)
+_WINDOW_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+class RateLimitedError(Exception):
+    """请求因额度不足或被限流而放弃"""
+
+    def __init__(self, wait, message=''):
+        self.wait = wait
+        super().__init__(message or f"请求额度不足，需等待 {wait:.1f}秒")
+
+
+def window_seconds(window):
+    """窗口名转秒数，如 1m -> 60"""
+    return int(window[:-1]) * _WINDOW_SECONDS[window[-1].lower()]
+
+
+def retry_after_seconds(value, default=DEFAULT_RETRY_AFTER):
+    """
+    解析 Retry-After 响应头
+
+    Args:
+        value: 秒数或HTTP日期，如 '120' 或 'Wed, 21 Oct 2026 07:28:00 GMT'
+
+    Returns:
+        float: 需要等待的秒数，缺失或无法解析时返回default
+    """
+    if not value:
+        return default
+    try:
+        seconds = float(value)
+    except ValueError:
+        pass
+    else:
+        return max(0.0, seconds) if math.isfinite(seconds) else default
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if when.tzinfo is None:
+        return default
+    return max(0.0, when.timestamp() - time.time())
+
+
+class TokenBucket:
+    """单个权重窗口的令牌桶，容量为窗口上限，按上限/窗口长度匀速恢复"""
+
+    def __init__(self, limit, window, clock=time.monotonic):
+        self.limit = limit
+        self.rate = limit / window_seconds(window)
+        self.clock = clock
+        self.tokens = float(limit)
+        self._last = clock()
+
+    def refill(self, now):
+        self.tokens = min(self.limit, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def wait_time(self, weight, reserve=0.0):
+        """扣除weight后仍保留reserve所需等待的秒数"""
+        deficit = weight + reserve - self.tokens
+        return deficit / self.rate if deficit > 0 else 0.0
+
+    def sync(self, used):
+        """服务器报告的已用权重比本地估计更多时，以服务器为准"""
+        self.tokens = min(self.tokens, self.limit - used)
+
+
+class RateGovernor:
+    """请求权重调度器（线程安全），所有REST请求发送前先获取额度"""
+
+    def __init__(self, limits=None, reserve=DEFAULT_RESERVE, max_wait=None, clock=time.monotonic):
+        """
+        Args:
+            limits: {窗口: 权重上限}，如 {'1m': 6000}
+            reserve: 后台请求不能占用的额度比例
+            max_wait: {优先级: 最长等待秒数}
+        """
+        self.clock = clock
+        self.reserve = reserve
+        self.max_wait = dict(DEFAULT_MAX_WAIT)
+        if max_wait:
+            self.max_wait.update(max_wait)
+        self.buckets = {
+            window.lower(): TokenBucket(limit, window, clock)
+            for window, limit in (limits or DEFAULT_LIMITS).items()
+        }
+        self.used = {}  # 窗口 -> 服务器报告的已用权重
+        self.blocked_until = 0.0
+        self._cond = threading.Condition()
+        self._interactive_waiting = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        # 计数与 acquire 中的累加共用同一把锁
+        with self._cond:
+            self.granted = 0
+            self.delayed = 0
+            self.shed = 0
+            self.wait_total = 0.0
+
+    def _wait_time(self, weight, priority, now):
+        wait = max(0.0, self.blocked_until - now)
+        for bucket in self.buckets.values():
+            bucket.refill(now)
+            reserve = bucket.limit * self.reserve if priority == BACKGROUND else 0.0
+            wait = max(wait, bucket.wait_time(weight, reserve))
+        return wait
+
+    def acquire(self, weight, priority=INTERACTIVE):
+        """
+        获取额度，不足时阻塞等待（应在后台线程调用）
+
+        有用户请求在等待时，后台请求让行
+
+        Returns:
+            float: 等待的秒数
+
+        Raises:
+            RateLimitedError: 需要等待的时间超过该优先级的上限
+        """
+        start = self.clock()
+        deadline = start + self.max_wait[priority]
+        blocked = False
+        with self._cond:
+            if priority == INTERACTIVE:
+                self._interactive_waiting += 1
+            try:
+                while True:
+                    now = self.clock()
+                    wait = self._wait_time(weight, priority, now)
+                    if now + wait > deadline:
+                        self.shed += 1
+                        raise RateLimitedError(wait)
+                    yielding = priority == BACKGROUND and self._interactive_waiting > 0
+                    if wait <= 0 and not yielding:
+                        for bucket in self.buckets.values():
+                            bucket.tokens -= weight
+                        self.granted += 1
+                        if not blocked:
+                            return 0.0
+                        waited = now - start
+                        self.delayed += 1
+                        self.wait_total += waited
+                        return waited
+                    blocked = True
+                    self._cond.wait(wait if wait > 0 else 0.05)
+            finally:
+                if priority == INTERACTIVE:
+                    self._interactive_waiting -= 1
+                    self._cond.notify_all()
+
+    def update(self, status_code, headers):
+        """
+        根据响应状态码和响应头更新额度
+
+        Args:
+            headers: 响应头（不区分大小写的字典）
+        """
+        with self._cond:
+            now = self.clock()
+            for name, value in headers.items():
+                match = _WEIGHT_HEADER.match(name)
+                if not match:
+                    continue
+                window = match.group(1).lower()
+                try:
+                    used = int(value)
+                except ValueError:
+                    continue
+                self.used[window] = used
+                bucket = self.buckets.get(window)
+                if bucket is not None:
+                    bucket.refill(now)
+                    bucket.sync(used)
+
+            if status_code in (418, 429):
+                # 429为超限警告，418为IP被封禁，等待期间暂停所有请求
+                delay = retry_after_seconds(headers.get('Retry-After'))
+                self.blocked_until = max(self.blocked_until, now + delay)
+                for bucket in self.buckets.values():
+                    bucket.tokens = min(bucket.tokens, 0.0)
+                Logger.warning(f"RateGovernor: HTTP {status_code}，暂停请求 {delay:.0f}秒")
+            self._cond.notify_all()
+
+    def snapshot(self):
+        """额度和调度统计"""
+        with self._cond:
+            now = self.clock()
+            for bucket in self.buckets.values():
+                bucket.refill(now)
+            return {
+                'tokens': {w: round(b.tokens, 1) for w, b in self.buckets.items()},
+                'used': dict(self.used),
+                'blocked_s': max(0.0, self.blocked_until - now),
+                'granted': self.granted,
+                'delayed': self.delayed,
+                'shed': self.shed,
+                'wait_total_ms': self.wait_total * 1000,
+            }
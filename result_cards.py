@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+预测结果卡片
+所有卡片控件只创建一次，刷新时原地修改文字，不再清空重建
+"""
+
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.label import Label
+from kivy.metrics import dp
+
+MESSAGE = 'message'
+RESULTS = 'results'
+
+
+class PriceCard(BoxLayout):
+    """时间、价格和盘口卡片"""
+
+    def __init__(self, **kwargs):
+        super().__init__(orientation='vertical', size_hint_y=None, height=dp(100), **kwargs)
+        self.time_label = Label(
+            size_hint_y=None,
+            height=dp(25),
+            font_size=dp(12),
+            color=(0.7, 0.7, 0.7, 1),
+            font_name='Chinese'
+        )
+        self.price_label = Label(
+            size_hint_y=None,
+            height=dp(40),
+            font_size=dp(16),
+            color=(0, 1, 0, 1),
+            font_name='Chinese'
+        )
+        # 盘口特征（买卖失衡、价差），随订单簿更新
+        self.book_label = Label(
+            size_hint_y=None,
+            height=dp(20),
+            font_size=dp(11),
+            color=(0.7, 0.8, 1, 1),
+            font_name='Chinese'
+        )
+        self.add_widget(self.time_label)
+        self.add_widget(self.price_label)
+        self.add_widget(self.book_label)
+
+
+class PredictionCard(BoxLayout):
+    """单个预测周期的卡片"""
+
+    def __init__(self, **kwargs):
+        super().__init__(orientation='vertical', size_hint_y=None, height=dp(100), **kwargs)
+
+        # 时间段和概率
+        self.period_label = Label(
+            size_hint_y=None,
+            height=dp(25),
+            color=(1, 1, 1, 1),
+            font_size=dp(13),
+            font_name='Chinese'
+        )
+
+        # 趋势和目标价
+        self.trend_label = Label(
+            size_hint_y=None,
+            height=dp(25),
+            color=(0.9, 0.9, 0.9, 1),
+            font_size=dp(12),
+            font_name='Chinese'
+        )
+
+        # 凯莉建议
+        self.kelly_label = Label(
+            size_hint_y=None,
+            height=dp(25),
+            color=(0.8, 1, 0.8, 1),
+            font_size=dp(12),
+            font_name='Chinese'
+        )
+
+        # 理由
+        self.reason_label = Label(
+            size_hint_y=None,
+            height=dp(25),
+            color=(0.8, 0.8, 0.8, 1),
+            font_size=dp(11),
+            font_name='Chinese'
+        )
+
+        self.add_widget(self.period_label)
+        self.add_widget(self.trend_label)
+        self.add_widget(self.kelly_label)
+        self.add_widget(self.reason_label)
+
+    def update(self, period, prob, trend, target, kelly, reason):
+        """原地更新文字，内容不变的标签不会重新渲染纹理"""
+        self.period_label.text = f'{period}: {prob}'
+        self.trend_label.text = f'趋势: {trend} | 目标: {target}'
+        self.kelly_label.text = f'仓位建议: {kelly}'
+        self.reason_label.text = f'理由: {reason}'
+
+
+class ResultCards:
+    """
+    结果区域的控件池
+
+    提示/加载/错误共用一个消息标签，预测卡片按需扩充且只增不减；
+    切换显示内容时只重新排列已有控件
+    """
+
+    def __init__(self, layout):
+        """
+        Args:
+            layout: 承载结果的竖向BoxLayout
+        """
+        self.layout = layout
+        self.mode = None
+        self._shown_cards = 0
+
+        self.message_label = Label(halign='center', size_hint_y=None, font_name='Chinese')
+        self.price_card = PriceCard()
+        self.separator = Label(
+            text='━' * 30,
+            size_hint_y=None,
+            height=dp(20),
+            color=(0.5, 0.5, 0.5, 1),
+            font_size=dp(10)
+        )
+        self.title_label = Label(
+            text='🤖 AI预测结果',
+            size_hint_y=None,
+            height=dp(35),
+            font_size=dp(16),
+            color=(1, 1, 1, 1),
+            font_name='Chinese'
+        )
+        self.footer_label = Label(
+            text='💡 仅供参考，投资有风险，决策需谨慎',
+            size_hint_y=None,
+            height=dp(40),
+            color=(1, 0.8, 0.2, 1),
+            font_size=dp(11),
+            font_name='Chinese'
+        )
+        # AI分析文字，流式更新时高度随内容增长
+        self.analysis_label = Label(
+            size_hint_y=None,
+            halign='left',
+            valign='top',
+            color=(0.7, 0.9, 1, 1),
+            font_size=dp(12),
+            font_name='Chinese'
+        )
+        self.analysis_label.bind(
+            width=lambda label, width: setattr(label, 'text_size', (width, None)),
+            texture_size=lambda label, size: setattr(label, 'height', size[1])
+        )
+        self.cards = []
+        self.card_separators = []
+
+    @property
+    def showing_results(self):
+        return self.mode == RESULTS
+
+    def show_message(self, text, color, height=dp(80), font_size=dp(12)):
+        """显示提示、加载或错误信息"""
+        label = self.message_label
+        label.text = text
+        label.color = color
+        label.height = height
+        label.font_size = font_size
+        if self.mode != MESSAGE:
+            self.layout.clear_widgets()
+            self.layout.add_widget(label)
+            self.mode = MESSAGE
+
+    def _ensure_cards(self, count):
+        """卡片池不足时扩充（仅在预测周期数首次增加时创建控件）"""
+        while len(self.cards) < count:
+            self.cards.append(PredictionCard())
+            self.card_separators.append(Label(
+                text='- ' * 15,
+                size_hint_y=None,
+                height=dp(15),
+                color=(0.3, 0.3, 0.3, 1),
+                font_size=dp(8)
+            ))
+
+    def show_results(self, time_text, price_text, rows):
+        """
+        显示预测结果
+
+        Args:
+            time_text: 时间标签文字
+            price_text: 价格标签文字
+            rows: [(周期, 概率, 趋势, 目标, 仓位, 理由), ...]
+        """
+        self._ensure_cards(len(rows))
+        self.price_card.time_label.text = time_text
+        self.price_card.price_label.text = price_text
+        for card, row in zip(self.cards, rows):
+            card.update(*row)
+
+        if self.mode != RESULTS or self._shown_cards != len(rows):
+            self._arrange(len(rows))
+
+    def set_price(self, price_text):
+        """只更新价格"""
+        self.price_card.price_label.text = price_text
+
+    def set_book(self, book_text):
+        """只更新盘口特征"""
+        self.price_card.book_label.text = book_text
+
+    def set_analysis(self, text):
+        """更新AI分析文字，首次出现时插入到免责提示之前"""
+        self.analysis_label.text = text
+        if self.mode == RESULTS and (self.analysis_label.parent is None) == bool(text):
+            self._arrange(self._shown_cards)
+
+    def _arrange(self, count):
+        layout = self.layout
+        layout.clear_widgets()
+        layout.add_widget(self.price_card)
+        layout.add_widget(self.separator)
+        layout.add_widget(self.title_label)
+        for i in range(count):
+            layout.add_widget(self.cards[i])
+            if i < count - 1:
+                layout.add_widget(self.card_separators[i])
+        if self.analysis_label.text:
+            layout.add_widget(self.analysis_label)
+        layout.add_widget(self.footer_label)
+        self.mode = RESULTS
+        self._shown_cards = count
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+预测结果快照
+退出或切到后台时把各交易对最近一次的价格和预测卡片文字写入一个小JSON文件，
+下次打开预测界面时先显示快照（标记为旧数据），同时在后台刷新
+"""
+
+import json
+import os
+import time
+
+from kivy.logger import Logger
+
+# 快照格式版本，卡片内容变化时递增，旧版本快照直接忽略
+VERSION = 1
+
+# 超过该时间（秒）的快照不再显示
+MAX_AGE = 24 * 3600
+
+
+class ResultSnapshot:
+    """按交易对保存的最近一次结果"""
+
+    def __init__(self, path=None, max_age=MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self._entries = {}  # 交易对 -> {'t': 保存时间, 'p': 价格, 'rows': 卡片文字}
+        self._dirty = False
+
+    def load(self, path=None):
+        """
+        读取快照文件，文件不存在或格式不符时忽略
+
+        Returns:
+            int: 读取的交易对数
+        """
+        if path is not None:
+            self.path = path
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            Logger.warning(f"ResultSnapshot: 读取快照失败 - {e}")
+            return 0
+        if not isinstance(data, dict) or data.get('v') != VERSION:
+            return 0
+        self._entries = data.get('symbols', {})
+        return len(self._entries)
+
+    def put(self, symbol, price, rows):
+        """
+        记录最新结果
+
+        Args:
+            price: 当前价格
+            rows: 卡片文字 [(周期, 概率, 趋势, 目标, 仓位, 理由), ...]
+        """
+        self._entries[symbol] = {
+            't': round(time.time(), 1),
+            'p': float(price),
+            'rows': [list(row) for row in rows],
+        }
+        self._dirty = True
+
+    def get(self, symbol):
+        """
+        Returns:
+            tuple: (价格, 卡片文字, 距保存的秒数)，没有或已过期返回None
+        """
+        entry = self._entries.get(symbol)
+        if not entry:
+            return None
+        age = max(0.0, time.time() - entry['t'])
+        if age > self.max_age:
+            return None
+        try:
+            return entry['p'], [tuple(row) for row in entry['rows']], age
+        except (KeyError, TypeError):
+            return None
+
+    def save(self):
+        """有变化时写入文件（先写临时文件再替换，中途被杀也不会留下损坏的快照）"""
+        if not self._dirty or not self.path:
+            return False
+        data = {'v': VERSION, 'symbols': self._entries}
+        tmp = self.path + '.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            Logger.warning(f"ResultSnapshot: 保存快照失败 - {e}")
+            return False
+        self._dirty = False
+        return True
+
+
+# 全局结果快照
+result_snapshot = ResultSnapshot()
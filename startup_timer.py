@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动耗时统计
+记录导入、构建界面、首帧等阶段的耗时，写入日志并保存最近几次结果，用于跟踪冷启动回归
+"""
+
+import json
+import os
+import time
+
+# 模块导入时刻作为起点（包括Kivy自身的初始化），入口文件应最先导入本模块
+_ORIGIN = time.perf_counter()
+
+from kivy.logger import Logger
+
+
+class StartupTimer:
+    """按顺序记录启动阶段，每个阶段的耗时为与上一阶段的时间差"""
+
+    def __init__(self, origin=_ORIGIN, history_size=20):
+        self.origin = origin
+        self.history_size = history_size
+        self.marks = []  # [(阶段名, 距起点秒数)]
+
+    def mark(self, stage):
+        """记录阶段结束时刻，同名阶段只记录第一次"""
+        if not any(name == stage for name, _ in self.marks):
+            self.marks.append((stage, time.perf_counter() - self.origin))
+
+    def report(self):
+        """
+        Returns:
+            dict: {阶段名: 耗时毫秒}，以及 total（距起点的总耗时）
+        """
+        result = {}
+        previous = 0.0
+        for name, elapsed in self.marks:
+            result[name] = (elapsed - previous) * 1000
+            previous = elapsed
+        result['total'] = previous * 1000
+        return result
+
+    def log(self):
+        report = self.report()
+        stages = ', '.join(f"{name} {ms:.0f}ms" for name, ms in report.items() if name != 'total')
+        Logger.info(f"StartupTimer: 启动耗时 {report['total']:.0f}ms ({stages})")
+        return report
+
+    def save(self, path):
+        """追加到JSON文件，只保留最近history_size次"""
+        history = []
+        try:
+            with open(path, encoding='utf-8') as f:
+                history = json.load(f)
+        except (OSError, ValueError):
+            pass
+        entry = {'time': time.strftime('%Y-%m-%d %H:%M:%S')}
+        entry.update({name: round(ms, 1) for name, ms in self.report().items()})
+        history = (history + [entry])[-self.history_size:]
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(history, f, ensure_ascii=False, indent=1)
+        except OSError as e:
+            Logger.warning(f"StartupTimer: 保存启动耗时失败 - {e}")
+        return history
+
+
+# 全局启动计时器
+startup_timer = StartupTimer()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+交易对注册表
+记录各界面关注的交易对，一次请求批量获取所有价格并分发给监听者
+"""
+
+import time
+
+from kivy.logger import Logger
+
+from binance_client import binance_client
+from fetch_engine import fetch_engine
+from price_cache import price_cache
+from price_stream import price_stream
+from rate_governor import INTERACTIVE
+
+QUOTE_ASSET = 'USDT'
+
+
+def to_symbol(coin, quote=QUOTE_ASSET):
+    """币种转交易对，如 BTC -> BTCUSDT"""
+    return f"{coin.upper()}{quote}"
+
+
+class SymbolRegistry:
+    """交易对注册表，N个交易对只需一次请求"""
+
+    def __init__(self, client=binance_client, engine=fetch_engine, cache=price_cache,
+                 stream=price_stream):
+        """
+        Args:
+            stream: 实时行情推送，新注册的交易对即时订阅；为None时只靠批量请求
+        """
+        self.client = client
+        self.engine = engine
+        self.cache = cache
+        self.stream = stream
+        self._listeners = {}  # 交易对 -> [callback(symbol, price)]
+        self.prices = {}  # 交易对 -> (价格, 更新时间)
+        self._task = None
+        self._error_callbacks = []
+
+    @property
+    def symbols(self):
+        """已注册的交易对"""
+        return list(self._listeners)
+
+    def register(self, symbol, listener=None):
+        """
+        注册交易对
+
+        Args:
+            symbol: 交易对，如 BTCUSDT
+            listener: 价格回调 callback(symbol, price)，在UI线程执行
+        """
+        if symbol not in self._listeners and self.stream is not None:
+            # 启动后才打开的交易对（如从行情列表点开）也要接收实时价格
+            self.stream.subscribe([symbol])
+        listeners = self._listeners.setdefault(symbol, [])
+        if listener is not None and listener not in listeners:
+            listeners.append(listener)
+
+    def unregister(self, symbol, listener=None):
+        """取消注册；不指定监听者时移除整个交易对"""
+        if listener is None:
+            if self._listeners.pop(symbol, None) is not None and self.stream is not None:
+                self.stream.unsubscribe([symbol])
+            return
+        listeners = self._listeners.get(symbol)
+        if listeners and listener in listeners:
+            listeners.remove(listener)
+
+    def release(self, symbol, listener):
+        """移除监听者，没有其他监听者时取消注册并停止该交易对的推送"""
+        self.unregister(symbol, listener)
+        if not self._listeners.get(symbol):
+            self.unregister(symbol)
+
+    def get_price(self, symbol):
+        """获取最近一次价格，没有则返回None"""
+        entry = self.prices.get(symbol)
+        return entry[0] if entry else None
+
+    def refresh(self, on_error=None, priority=INTERACTIVE):
+        """
+        批量刷新所有已注册交易对的价格
+
+        已有批量请求在进行时直接合并，不会重复请求
+
+        Args:
+            on_error: 失败回调 callback(exception)，在UI线程执行
+            priority: 请求优先级，后台刷新用BACKGROUND
+        """
+        if self._task is not None and not self._task.done():
+            if on_error is not None:
+                self._error_callbacks.append(on_error)
+            return self._task
+
+        symbols = self.symbols
+        if not symbols:
+            # 没有请求也就不会回调，失败回调不登记，避免一直留在列表中
+            return None
+        if on_error is not None:
+            self._error_callbacks.append(on_error)
+        self._task = self.engine.submit(
+            self.client.ticker_prices, symbols, priority=priority,
+            on_success=self._dispatch,
+            on_error=self._fail,
+            name=f'ticker_prices:{len(symbols)}'
+        )
+        return self._task
+
+    def update_prices(self, prices):
+        """写入价格并分发给监听者（UI线程调用）"""
+        now = time.time()
+        for symbol, price in prices.items():
+            self.prices[symbol] = (price, now)
+            if self.cache is not None:
+                self.cache.put(('price', symbol), price)
+            for listener in list(self._listeners.get(symbol, ())):
+                try:
+                    listener(symbol, price)
+                except Exception as e:
+                    Logger.error(f"SymbolRegistry: 分发价格失败 {symbol} - {e}")
+
+    def _dispatch(self, prices):
+        self._task = None
+        self._error_callbacks = []
+        self.update_prices(prices)
+
+    def _fail(self, error):
+        self._task = None
+        callbacks, self._error_callbacks = self._error_callbacks, []
+        for callback in callbacks:
+            callback(error)
+
+
+# 全局交易对注册表
+symbol_registry = SymbolRegistry()
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""测试公共设置：模块都在仓库根目录，Kivy不解析命令行参数、不输出到控制台"""
+
+import os
+import sys
+import time
+
+import pytest
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+# 模拟服务器都在本机，不经过代理
+os.environ['NO_PROXY'] = '127.0.0.1,localhost'
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def wait_until():
+    """
+    轮询等待条件成立，期间执行Clock回调（后台结果经Clock交回"UI线程"）
+
+    用法: assert wait_until(lambda: done, timeout=5)
+    """
+    from kivy.clock import Clock
+
+    def wait(predicate, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            Clock.tick()
+            if predicate():
+                return True
+            time.sleep(0.01)
+        return predicate()
+
+    return wait
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from alert_engine import AlertEngine, AlertRule, ThresholdIndex, ABOVE, BELOW, CROSS
+
+
+def _engine():
+    messages = []
+    engine = AlertEngine(notify=lambda title, message: messages.append(message),
+                         play_sound=lambda sound_type: None)
+    return engine, messages
+
+
+def test_falling_to_threshold_is_described_as_downward():
+    engine, messages = _engine()
+    engine.add_price_alert('BTCUSDT', 99000, BELOW)
+    engine.add_price_alert('BTCUSDT', 99000, CROSS)
+    engine.on_price('BTCUSDT', 99500)
+    assert len(engine.on_price('BTCUSDT', 99000)) == 2
+    assert messages == ['BTCUSDT 下穿 99000（当前 99000）'] * 2
+
+
+def test_rising_to_threshold_is_described_as_upward():
+    engine, messages = _engine()
+    engine.add_price_alert('BTCUSDT', 99000, CROSS)
+    engine.on_price('BTCUSDT', 98000)
+    engine.on_price('BTCUSDT', 99000)
+    assert messages == ['BTCUSDT 上穿 99000（当前 99000）']
+
+
+def _index(*rules):
+    index = ThresholdIndex()
+    for rule_id, (threshold, direction) in enumerate(rules, 1):
+        index.add(AlertRule(rule_id, ('BTCUSDT', 'price'), threshold, direction))
+    return index
+
+
+def _ids(result):
+    moved, rules = result
+    return moved, sorted(rule.id for rule in rules)
+
+
+def test_first_value_and_unchanged_value_do_not_fire():
+    index = _index((100, ABOVE))
+    assert _ids(index.update(100)) == (None, [])
+    assert _ids(index.update(100)) == (None, [])
+
+
+def test_upward_crossing_includes_threshold_equal_to_new_value():
+    index = _index((100, ABOVE), (101, ABOVE), (102, BELOW), (101, CROSS))
+    index.update(99)
+    assert _ids(index.update(101)) == (ABOVE, [1, 2, 4])
+    # 从阈值上继续上涨不算再次穿越
+    assert _ids(index.update(103)) == (ABOVE, [])
+
+
+def test_downward_crossing_includes_threshold_equal_to_new_value():
+    index = _index((100, BELOW), (101, BELOW), (98, ABOVE), (101, CROSS))
+    index.update(102)
+    assert _ids(index.update(100)) == (BELOW, [1, 2, 4])
+    assert _ids(index.update(97)) == (BELOW, [])
+
+
+def test_leaving_a_threshold_in_the_opposite_direction_fires_nothing():
+    index = _index((100, BELOW))
+    index.update(100)
+    assert _ids(index.update(101)) == (ABOVE, [])
+
+
+def test_removed_rule_no_longer_fires():
+    index = ThresholdIndex()
+    kept = AlertRule(1, ('BTCUSDT', 'price'), 100, CROSS)
+    removed = AlertRule(2, ('BTCUSDT', 'price'), 100, CROSS)
+    index.add(kept)
+    index.add(removed)
+    index.remove(removed)
+    index.update(99)
+    assert _ids(index.update(100)) == (ABOVE, [1])
+    assert _ids(index.update(99)) == (BELOW, [])
+    assert _ids(index.update(100)) == (ABOVE, [1])
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+from compute_engine import ComputeEngine
+from fetch_engine import FetchEngine
+
+
+def _slow(finished, seconds=0.2):
+    time.sleep(seconds)
+    finished.set()
+
+
+def test_fetch_shutdown_waits_for_running_request():
+    engine = FetchEngine(max_workers=1)
+    finished = threading.Event()
+    engine.submit(_slow, finished)
+    time.sleep(0.05)
+    engine.shutdown(timeout=2.0)
+    assert finished.is_set()
+
+
+def test_compute_shutdown_waits_for_running_job():
+    engine = ComputeEngine(max_workers=1)
+    finished = threading.Event()
+    engine.submit('slow', _slow, finished)
+    time.sleep(0.05)
+    engine.shutdown(timeout=2.0)
+    assert finished.is_set()
+
+
+def test_shutdown_without_timeout_does_not_wait():
+    engine = ComputeEngine(max_workers=1)
+    finished = threading.Event()
+    engine.submit('slow', _slow, finished, 0.5)
+    time.sleep(0.05)
+    engine.shutdown()
+    assert not finished.is_set()
+
+
+def _computed(engine, timeout=2.0):
+    # 只等计算完成，不执行Clock回调，结果停在交回UI线程之前
+    deadline = time.monotonic() + timeout
+    while engine.snapshot()['completed'] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return engine.snapshot()['completed'] == 1
+
+
+def test_cancel_after_compute_drops_result():
+    from kivy.clock import Clock
+
+    engine = ComputeEngine(max_workers=1)
+    results = []
+    task = engine.submit('predict', lambda: 42, on_success=results.append)
+    assert _computed(engine)
+    assert not task.done()
+    assert engine.cancel('predict')
+    for _ in range(3):
+        Clock.tick()
+    assert results == []
+    assert task.done()
+    assert engine.snapshot()['dropped'] == 1
+    engine.shutdown()
+
+
+def test_cancel_after_delivery_returns_false(wait_until):
+    engine = ComputeEngine(max_workers=1)
+    results = []
+    engine.submit('predict', lambda: 42, on_success=results.append)
+    assert wait_until(lambda: results)
+    assert results == [42]
+    assert not engine.cancel('predict')
+    engine.shutdown()
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+from kelly import position_sizes
+
+
+def test_zero_moves_stay_flat():
+    # 没有历史数据时上涨、下跌幅度都为0，不能因盈亏比为inf给出仓位
+    sizes = position_sizes([[0.5, 0.6, 0.4]], np.zeros((1, 3)), np.zeros((1, 3)))
+    assert np.array_equal(sizes, np.zeros((1, 3)))
+
+
+def test_one_sided_move_stays_flat():
+    sizes = position_sizes([0.9, 0.1], [0.01, 0.0], [0.0, 0.01])
+    assert np.array_equal(sizes, [0.0, 0.0])
+
+
+def test_direction_and_cap():
+    sizes = position_sizes([0.7, 0.3, 0.5, 0.99], [0.01] * 4, [0.01] * 4)
+    assert sizes[0] > 0 and sizes[1] < 0
+    assert sizes[2] == 0
+    assert sizes[3] == 0.25
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import numpy as np
+
+from kline_store import KlineRingBuffer, OPEN_TIME
+
+
+def _candles(start, n):
+    open_times = (start + np.arange(n)) * 60_000.0
+    return np.vstack([open_times] + [open_times / 1e6] * 5)
+
+
+def test_snapshot_is_not_changed_by_later_writes():
+    buf = KlineRingBuffer(capacity=10)
+    buf.ingest(_candles(0, 10))
+    snapshot = buf.snapshot()
+    buf.ingest(_candles(10, 5))
+    assert snapshot[OPEN_TIME, 0] == 0
+    assert buf.snapshot()[OPEN_TIME, 0] == 5 * 60_000
+
+
+def test_snapshot_is_consistent_while_another_thread_ingests():
+    buf = KlineRingBuffer(capacity=100)
+    buf.ingest(_candles(0, 100))
+    stop = threading.Event()
+
+    def writer():
+        start = 100
+        while not stop.is_set():
+            buf.ingest(_candles(start, 37))
+            start += 37
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(2000):
+            steps = np.diff(buf.snapshot()[OPEN_TIME])
+            assert (steps == 60_000).all()
+    finally:
+        stop.set()
+        thread.join()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from fetch_engine import FetchEngine
+from llm_client import LLMClient
+from mock_servers import MockLLMServer
+
+
+@pytest.fixture
+def llm_server():
+    server = MockLLMServer(delay=0.02).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(llm_server):
+    engine = FetchEngine(max_workers=2)
+    client = LLMClient(base_url=llm_server.url, api_key='test', engine=engine)
+    client.session.trust_env = False
+    yield client
+    engine.shutdown()
+
+
+def test_inflight_merge_and_cache_hit(client, llm_server, wait_until):
+    first, second, third = [], [], []
+    client.analyze('BTCUSDT', 'summary', 'digest', on_done=first.append)
+    # 第一个请求还在流式输出，同键请求合并，不再发请求
+    client.analyze('BTCUSDT', 'summary', 'digest', on_done=second.append)
+    assert wait_until(lambda: first and second)
+    assert first == second and first[0]
+
+    # 完成后命中缓存，同步回调
+    client.analyze('BTCUSDT', 'summary', 'digest', on_done=third.append)
+    assert third == first
+
+    assert llm_server.requests == 1
+    assert client.stats == {'requests': 1, 'hits': 1, 'merged': 1, 'errors': 0}
+
+
+def test_different_window_is_a_new_request(client, llm_server, wait_until):
+    done = []
+    client.analyze('BTCUSDT', 'summary', 'a', on_done=done.append)
+    client.analyze('BTCUSDT', 'summary', 'b', on_done=done.append)
+    assert wait_until(lambda: len(done) == 2)
+    assert llm_server.requests == 2
+    assert client.stats['merged'] == 0
+
+
+def test_error_reaches_every_listener(llm_server, wait_until):
+    engine = FetchEngine(max_workers=1)
+    client = LLMClient(base_url=llm_server.url + '/missing', api_key='test', engine=engine)
+    client.session.trust_env = False
+    errors = []
+    client.analyze('BTCUSDT', 'summary', 'digest', on_error=errors.append)
+    client.analyze('BTCUSDT', 'summary', 'digest', on_error=errors.append)
+    assert wait_until(lambda: len(errors) == 2)
+    assert client.stats['errors'] == 1 and client.cached('BTCUSDT', 'digest') is None
+    engine.shutdown()
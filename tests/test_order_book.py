@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+from order_book import OrderBook, OrderBookManager
+
+
+def _snapshot(last_update_id):
+    return {
+        'lastUpdateId': last_update_id,
+        'bids': [['100.0', '1.0'], ['99.0', '2.0']],
+        'asks': [['101.0', '1.5'], ['102.0', '3.0']],
+    }
+
+
+def _event(first, last, bids=(), asks=(), symbol='BTCUSDT'):
+    return {'e': 'depthUpdate', 's': symbol, 'U': first, 'u': last,
+            'b': [list(level) for level in bids], 'a': [list(level) for level in asks]}
+
+
+def test_buffered_events_apply_after_snapshot_and_stale_ones_are_dropped():
+    book = OrderBook('BTCUSDT')
+    # 快照之前到达的事件先缓存；第一条已包含在快照里
+    assert book.apply(_event(5, 9, bids=[('100.0', '9.0')]))
+    assert book.apply(_event(10, 11, bids=[('100.5', '4.0')]))
+    assert book.load_snapshot(_snapshot(9))
+    bids, asks = book.top()
+    assert bids[0] == (100.5, 4.0)
+    # 旧事件不会覆盖快照中的数量
+    assert (100.0, 1.0) in bids
+    assert book.last_update_id == 11
+
+    # 已应用过的事件再次到达时直接忽略
+    assert book.apply(_event(10, 11, bids=[('100.5', '0')]))
+    assert book.top()[0][0] == (100.5, 4.0)
+
+
+def test_zero_quantity_removes_level():
+    book = OrderBook('BTCUSDT')
+    assert book.load_snapshot(_snapshot(1))
+    assert book.apply(_event(2, 2, asks=[('101.0', '0')]))
+    assert book.top()[1][0] == (102.0, 3.0)
+
+
+def test_sequence_gap_invalidates_book():
+    book = OrderBook('BTCUSDT')
+    assert book.load_snapshot(_snapshot(10))
+    assert not book.apply(_event(15, 16))
+    assert not book.synced
+    assert book.features() is None
+
+
+def test_snapshot_older_than_buffered_events_is_rejected():
+    book = OrderBook('BTCUSDT')
+    book.apply(_event(20, 21))
+    assert not book.load_snapshot(_snapshot(10))
+    assert not book.synced
+    # 缓存的事件保留，等下一个快照
+    assert book.load_snapshot(_snapshot(20))
+    assert book.last_update_id == 21
+
+
+class _FakeTask:
+    def done(self):
+        return True
+
+    def cancel(self):
+        pass
+
+
+class _FakeEngine:
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, func, *args, on_success=None, on_error=None, **kwargs):
+        self.calls.append((args, on_success))
+        return _FakeTask()
+
+
+class _FakeClient:
+    def depth(self, symbol, limit):
+        raise AssertionError('快照由测试直接提供')
+
+
+class _FakeStream:
+    def subscribe_streams(self, streams):
+        pass
+
+    def unsubscribe_streams(self, streams):
+        pass
+
+
+def test_manager_resyncs_after_gap(wait_until):
+    engine = _FakeEngine()
+    manager = OrderBookManager(client=_FakeClient(), engine=engine, stream=_FakeStream(), resync_delay=0)
+    manager.watch('BTCUSDT')
+    assert len(engine.calls) == 1
+    engine.calls[0][1](_snapshot(10))
+    assert manager.books['BTCUSDT'].synced
+
+    manager.on_depth(_event(11, 12, bids=[('100.0', '5.0')]))
+    manager.on_depth(_event(20, 21))
+    manager.on_depth(_event(22, 23))
+    assert manager.stats['resyncs'] == 1
+    assert wait_until(lambda: len(engine.calls) == 2)
+
+    engine.calls[1][1](_snapshot(21))
+    book = manager.books['BTCUSDT']
+    assert book.synced
+    assert book.last_update_id == 23
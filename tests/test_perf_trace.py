@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from perf_trace import percentile, summarize
+
+
+def test_percentile_nearest_rank():
+    ordered = list(range(1, 11))
+    assert percentile(ordered, 50) == 5
+    assert percentile(ordered, 95) == 10
+    assert percentile(ordered, 10) == 1
+    assert percentile(ordered, 0) == 1
+    assert percentile(ordered, 100) == 10
+    assert percentile([], 50) == 0.0
+
+
+def test_summarize():
+    stats = summarize([3.0, 1.0, 2.0, 4.0])
+    assert stats == {'n': 4, 'last': 4.0, 'p50': 2.0, 'p95': 4.0, 'max': 4.0}
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from mock_servers import MockStreamServer
+from price_stream import PriceStream
+
+
+@pytest.fixture
+def stream_server():
+    server = MockStreamServer(rate=50).start()
+    yield server
+    server.stop()
+
+
+def test_reconnects_after_forced_disconnect(stream_server, wait_until):
+    got = []
+    stream = PriceStream(url=stream_server.url, on_prices=got.append, dispatch=lambda func: func(),
+                         reconnect_base=0.05, reconnect_cap=0.2)
+    stream.start(['BTCUSDT'])
+    try:
+        assert wait_until(lambda: stream.stats.connected and got)
+
+        stream_server.drop_connections()
+        assert wait_until(lambda: stream.stats.reconnects >= 1 and stream_server.connections >= 2)
+        before = len(got)
+        assert wait_until(lambda: stream.stats.connected and len(got) > before)
+        assert 'BTCUSDT' in stream.prices
+    finally:
+        stream.stop()
+    assert not stream.running
+
+
+def test_subscribe_after_start(stream_server, wait_until):
+    stream = PriceStream(url=stream_server.url, dispatch=lambda func: func())
+    stream.start(['BTCUSDT'])
+    try:
+        assert wait_until(lambda: 'BTCUSDT' in stream.prices)
+        stream.subscribe(['ETHUSDT'])
+        assert wait_until(lambda: 'ETHUSDT' in stream.prices)
+    finally:
+        stream.stop()
+
+
+def test_stop_before_loop_starts():
+    stream = PriceStream(url='ws://127.0.0.1:9/stream')
+    stream.start(['BTCUSDT'])
+    stream.stop()
+    assert not stream.running
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+from email.utils import formatdate
+
+import pytest
+
+from rate_governor import RateGovernor, retry_after_seconds
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('120', 120.0),
+    (None, 60.0),
+    ('soon', 60.0),
+    ('inf', 60.0),
+    ('Wed, 21 Oct 2015 07:28:00 GMT', 0.0),
+])
+def test_retry_after_seconds(value, expected):
+    assert retry_after_seconds(value) == expected
+
+
+def test_retry_after_http_date_in_the_future():
+    import time
+
+    value = formatdate(time.time() + 30, usegmt=True)
+    assert 28 <= retry_after_seconds(value) <= 30
+
+
+def test_http_date_retry_after_blocks_instead_of_raising():
+    clock = FakeClock()
+    governor = RateGovernor(clock=clock)
+    governor.update(429, {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+    assert governor.snapshot()['blocked_s'] == 0.0
+    governor.update(429, {'Retry-After': 'not a date'})
+    assert governor.snapshot()['blocked_s'] == 60.0
+
+
+def test_background_request_is_shed_inside_reserve_while_interactive_is_granted():
+    from rate_governor import BACKGROUND, INTERACTIVE, RateLimitedError
+
+    clock = FakeClock()
+    governor = RateGovernor(limits={'1m': 100}, reserve=0.2, clock=clock)
+    assert governor.acquire(10, BACKGROUND) == 0.0
+    assert governor.acquire(75, INTERACTIVE) == 0.0
+    # 剩15，后台请求要保留20的余量，补足需要9秒，超过后台最长等待3秒
+    with pytest.raises(RateLimitedError):
+        governor.acquire(10, BACKGROUND)
+    assert governor.acquire(10, INTERACTIVE) == 0.0
+    stats = governor.snapshot()
+    assert (stats['granted'], stats['shed']) == (3, 1)
+    assert stats['tokens']['1m'] == 5.0
+
+
+def test_server_reported_weight_lowers_local_tokens():
+    clock = FakeClock()
+    governor = RateGovernor(limits={'1m': 100}, clock=clock)
+    governor.update(200, {'X-MBX-USED-WEIGHT-1M': '90'})
+    assert governor.snapshot()['tokens']['1m'] == 10.0
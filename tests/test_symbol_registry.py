@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from fetch_engine import FetchEngine
+from symbol_registry import SymbolRegistry
+
+
+class _FailingClient:
+    def ticker_prices(self, symbols, priority=None):
+        raise ConnectionError('offline')
+
+
+def test_refresh_without_symbols_keeps_no_error_callback():
+    registry = SymbolRegistry(client=_FailingClient(), engine=FetchEngine(), cache=None, stream=None)
+    assert registry.refresh(on_error=lambda e: None) is None
+    assert registry._error_callbacks == []
+
+
+def test_refresh_error_reaches_callback_once(wait_until):
+    engine = FetchEngine(max_workers=1)
+    registry = SymbolRegistry(client=_FailingClient(), engine=engine, cache=None, stream=None)
+    registry.refresh(on_error=lambda e: None)
+    registry.register('BTCUSDT')
+    errors = []
+    registry.refresh(on_error=errors.append)
+    assert wait_until(lambda: errors)
+    assert isinstance(errors[0], ConnectionError)
+    assert registry._error_callbacks == []
+    engine.shutdown()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+界面更新调度
+行情回调不直接改控件，而是按 (控件, 属性) 登记最新值；每帧统一写入一次，
+同一帧内的多次更新只保留最后一次。单帧写入超出时间预算时，剩余的顺延到下一帧
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from kivy.clock import Clock
+from kivy.logger import Logger
+
+from perf_trace import perf_trace
+
+# 每帧用于界面更新的时间预算（毫秒），约为60帧每帧时长的四分之一
+DEFAULT_BUDGET_MS = 4.0
+
+
+class UIUpdateScheduler:
+    """
+    每帧合并写入的界面更新队列（可在任意线程登记，写入在UI线程执行）
+
+    同一个键的更新保留最早登记时的排队位置，只替换为最新的值，
+    持续高频更新的控件不会让其他控件一直排不到
+    """
+
+    def __init__(self, budget_ms=DEFAULT_BUDGET_MS):
+        """
+        Args:
+            budget_ms: 每帧写入的时间预算（毫秒），至少执行一个更新
+        """
+        self.budget_ms = budget_ms
+        self._pending = OrderedDict()  # 键 -> (函数, 参数)
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._trigger = Clock.create_trigger(self._flush, 0)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {
+            'requested': 0,  # 登记的更新数
+            'coalesced': 0,  # 被同一帧内更新的值覆盖而丢弃的数
+            'applied': 0,  # 实际写入的数
+            'spilled': 0,  # 超出预算顺延到下一帧的数（每顺延一帧计一次）
+            'frames': 0,  # 执行过写入的帧数
+            'max_ms': 0.0,  # 单帧最长写入耗时
+        }
+
+    def __len__(self):
+        return len(self._pending)
+
+    def set(self, widget, attr, value):
+        """
+        登记控件属性的新值，如 set(label, 'text', '...')
+
+        同一帧内对同一控件属性的多次登记只写入最后一次
+        """
+        self.call((id(widget), attr), setattr, widget, attr, value)
+
+    def call(self, key, func, *args):
+        """
+        登记一个更新函数，同一键在写入前只执行最后一次登记的函数
+
+        Args:
+            key: 去重用的键，如 ('price', 'BTCUSDT')
+            func: 在UI线程执行的函数
+        """
+        with self._lock:
+            self.stats['requested'] += 1
+            if key in self._pending:
+                self.stats['coalesced'] += 1
+            self._pending[key] = (func, args)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._trigger()
+
+    def cancel(self, key):
+        """取消尚未写入的更新"""
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def flush(self):
+        """立即写入全部待更新项，不受预算限制（界面切换等需要同步结果的场合）"""
+        self._drain(time.perf_counter(), None)
+
+    def _flush(self, dt):
+        start = time.perf_counter()
+        self._drain(start, start + self.budget_ms / 1000)
+
+    def _drain(self, start, deadline):
+        applied = 0
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._scheduled = False
+                    break
+                if deadline is not None and applied and time.perf_counter() >= deadline:
+                    # 超出预算，剩余的下一帧继续
+                    self.stats['spilled'] += len(self._pending)
+                    self._trigger()
+                    break
+                key, (func, args) = self._pending.popitem(last=False)
+            try:
+                func(*args)
+            except Exception as e:
+                Logger.error(f"UIUpdateScheduler: 更新失败 {key} - {e}")
+            applied += 1
+
+        if applied:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.stats['applied'] += applied
+            self.stats['frames'] += 1
+            self.stats['max_ms'] = max(self.stats['max_ms'], elapsed)
+            perf_trace.record('ui_flush', elapsed, updates=applied)
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['pending'] = len(self._pending)
+        return stats
+
+
+# 全局界面更新调度器
+ui_scheduler = UIUpdateScheduler()
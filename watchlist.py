@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+行情列表
+基于RecycleView的虚拟化列表，只为屏幕内的行创建控件，几百个交易对也只有十几个行控件；
+价格、涨跌幅和预测按行合并，经ui_scheduler每帧写入一次，只重绘当前显示的行
+"""
+
+from kivy.app import App
+from kivy.clock import Clock
+from kivy.logger import Logger
+from kivy.metrics import dp
+from kivy.uix.behaviors import ButtonBehavior
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.button import Button
+from kivy.uix.label import Label
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.screenmanager import Screen
+
+from binance_client import binance_client
+from fetch_engine import fetch_engine
+from rate_governor import BACKGROUND
+from symbol_registry import symbol_registry, QUOTE_ASSET
+from ui_scheduler import ui_scheduler
+
+# 列表中的交易对数，按24小时成交额从高到低选取
+WATCHLIST_SIZE = 200
+
+# 24小时行情轮询间隔（秒），只在列表显示时轮询
+POLL_INTERVAL = 15.0
+
+UP_COLOR = (0.3, 0.9, 0.4, 1)
+DOWN_COLOR = (1, 0.35, 0.35, 1)
+FLAT_COLOR = (0.8, 0.8, 0.8, 1)
+
+
+def format_price(price):
+    """按价格量级保留有效数字，低价币也能看出变化"""
+    if price >= 1000:
+        return f"{price:,.0f}"
+    if price >= 1:
+        return f"{price:.2f}"
+    return f"{price:.6g}"
+
+
+def format_change(change):
+    """
+    Returns:
+        tuple: (涨跌幅文字, 颜色)
+    """
+    color = UP_COLOR if change > 0 else DOWN_COLOR if change < 0 else FLAT_COLOR
+    return f"{change:+.2%}", color
+
+
+class WatchlistRow(RecycleDataViewBehavior, ButtonBehavior, BoxLayout):
+    """列表中的一行，由RecycleView复用；点击进入该交易对的预测界面"""
+
+    def __init__(self, **kwargs):
+        super().__init__(orientation='horizontal', padding=[dp(8), 0], **kwargs)
+        self.symbol = None
+        self.name_label = self._label(size_hint_x=0.3, halign='left', bold=True)
+        self.price_label = self._label(size_hint_x=0.25, halign='right')
+        self.change_label = self._label(size_hint_x=0.2, halign='right')
+        self.prediction_label = self._label(size_hint_x=0.25, halign='right',
+                                            color=(0.8, 0.8, 1, 1))
+
+    def _label(self, **kwargs):
+        label = Label(font_size=dp(13), valign='middle', font_name='Chinese', **kwargs)
+        label.bind(size=label.setter('text_size'))
+        self.add_widget(label)
+        return label
+
+    def refresh_view_attrs(self, rv, index, data):
+        """把数据写入控件；数据项里只有预先格式化好的文字，不在这里做计算"""
+        self.symbol = data['symbol']
+        self.name_label.text = data['name']
+        self.price_label.text = data['price']
+        self.change_label.text = data['change']
+        self.change_label.color = data['change_color']
+        self.prediction_label.text = data['prediction']
+
+    def on_release(self):
+        if self.symbol:
+            App.get_running_app().show_prediction(self.symbol[:-len(QUOTE_ASSET)])
+
+
+class WatchlistScreen(Screen):
+    """行情列表界面：价格、24小时涨跌幅和60分钟预测"""
+
+    def __init__(self, limit=WATCHLIST_SIZE, poll_interval=POLL_INTERVAL, **kwargs):
+        super().__init__(**kwargs)
+        self.name = 'watchlist'
+        self.limit = limit
+        self.poll_interval = poll_interval
+        self._index = {}  # 交易对 -> 数据行号
+        self._open = {}  # 交易对 -> 24小时开盘价，用于按实时价格计算涨跌幅
+        self._pending = {}  # 交易对 -> 待写入的字段，同一帧内的多次更新合并
+        self._live = []  # 已注册实时价格回调的交易对
+        self._task = None
+        self._poll_event = None
+
+        main_layout = BoxLayout(
+            orientation='vertical',
+            padding=[dp(15), dp(10), dp(15), dp(10)],
+            spacing=dp(8)
+        )
+
+        top_layout = BoxLayout(
+            orientation='horizontal',
+            size_hint_y=None,
+            height=dp(50),
+            spacing=dp(10)
+        )
+        back_btn = Button(
+            text='← 返回',
+            size_hint_x=None,
+            width=dp(70),
+            background_color=(0.6, 0.6, 0.6, 1),
+            font_size=dp(14),
+            font_name='Chinese'
+        )
+        back_btn.bind(on_press=self.go_back)
+        self.title_label = Label(
+            text='行情列表',
+            font_size=dp(18),
+            color=(1, 1, 1, 1),
+            font_name='Chinese'
+        )
+        refresh_btn = Button(
+            text='🔄 排序',
+            size_hint_x=None,
+            width=dp(80),
+            background_color=(0.2, 0.8, 0.2, 1),
+            font_size=dp(14),
+            font_name='Chinese'
+        )
+        refresh_btn.bind(on_press=self.reload)
+        top_layout.add_widget(back_btn)
+        top_layout.add_widget(self.title_label)
+        top_layout.add_widget(refresh_btn)
+
+        # 表头，列宽与WatchlistRow一致
+        header = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(30),
+                           padding=[dp(8), 0])
+        for text, width, halign in (('交易对', 0.3, 'left'), ('价格', 0.25, 'right'),
+                                    ('24h涨跌', 0.2, 'right'), ('60分钟上涨', 0.25, 'right')):
+            label = Label(text=text, size_hint_x=width, halign=halign, valign='middle',
+                          font_size=dp(12), color=(0.6, 0.6, 0.6, 1), font_name='Chinese')
+            label.bind(size=label.setter('text_size'))
+            header.add_widget(label)
+
+        # 固定行高，布局不需要逐行测量尺寸
+        self.rv = RecycleView(do_scroll_x=False)
+        layout = RecycleBoxLayout(
+            orientation='vertical',
+            default_size=(None, dp(44)),
+            default_size_hint=(1, None),
+            size_hint_y=None
+        )
+        layout.bind(minimum_height=layout.setter('height'))
+        self.rv.add_widget(layout)
+        # viewclass保存在布局上，需在添加布局之后设置
+        self.rv.viewclass = WatchlistRow
+
+        main_layout.add_widget(top_layout)
+        main_layout.add_widget(header)
+        main_layout.add_widget(self.rv)
+        self.add_widget(main_layout)
+
+    def on_enter(self, *args):
+        self.poll()
+        self._poll_event = Clock.schedule_interval(self.poll, self.poll_interval)
+        self._register_live()
+
+    def on_leave(self, *args):
+        # 不显示时不轮询，也不接收实时价格
+        if self._poll_event is not None:
+            self._poll_event.cancel()
+            self._poll_event = None
+        for symbol in self._live:
+            symbol_registry.unregister(symbol, self._on_price)
+        self._live = []
+        from compute_engine import compute_engine
+        compute_engine.cancel(('watchlist', 'predict'))
+
+    def go_back(self, instance):
+        from mobile_features import vibrate
+
+        vibrate(0.05)
+        self.manager.current = 'main'
+
+    def reload(self, *args):
+        """按最新成交额重新选取和排序交易对"""
+        self._index = {}
+        self.poll()
+
+    # ---------- 数据获取 ----------
+
+    def poll(self, *args):
+        """后台请求全部交易对的24小时行情，上一次请求未完成时跳过"""
+        if self._task is not None and not self._task.done():
+            return
+        self._task = fetch_engine.submit(
+            binance_client.ticker_24hr, priority=BACKGROUND,
+            on_success=self._on_tickers,
+            on_error=self._on_tickers_error,
+            name='ticker_24hr'
+        )
+
+    def _on_tickers(self, tickers):
+        if not self._index:
+            self._load(tickers)
+        prices = {}
+        for symbol in self._index:
+            ticker = tickers.get(symbol)
+            if ticker is None:
+                continue
+            price, change, _ = ticker
+            if change > -1.0:
+                self._open[symbol] = price / (1.0 + change)
+            prices[symbol] = price
+            self._queue(symbol, price, change)
+        self._queue_predictions(prices)
+
+    def _on_tickers_error(self, e):
+        Logger.warning(f"WatchlistScreen: 获取行情失败 - {e}")
+        if not self._index:
+            self.title_label.text = '行情列表（加载失败）'
+
+    def _load(self, tickers):
+        """
+        选取交易对并生成全部数据行
+
+        已注册的交易对（已打开过预测界面、有K线和实时价格）排在最前，
+        其余按24小时成交额排序；只有这里会整体替换数据
+        """
+        registered = [s for s in symbol_registry.symbols if s in tickers]
+        others = sorted(
+            (s for s in tickers if s.endswith(QUOTE_ASSET) and s not in registered),
+            key=lambda s: tickers[s][2], reverse=True
+        )
+        symbols = (registered + others)[:self.limit]
+        data = []
+        for symbol in symbols:
+            price, change, _ = tickers[symbol]
+            text, color = format_change(change)
+            data.append({
+                'symbol': symbol,
+                'name': symbol[:-len(QUOTE_ASSET)],
+                'price': format_price(price),
+                'change': text,
+                'change_color': color,
+                'prediction': '--',
+            })
+        self._index = {symbol: i for i, symbol in enumerate(symbols)}
+        self._pending = {}
+        self.rv.data = data
+        self.title_label.text = f'行情列表（{len(symbols)}）'
+        if self.manager is not None and self.manager.current == self.name:
+            self._register_live()
+
+    def _register_live(self):
+        """已在注册表中的交易对跟随实时推送更新价格"""
+        for symbol in self._live:
+            symbol_registry.unregister(symbol, self._on_price)
+        registered = set(symbol_registry.symbols)
+        self._live = [s for s in self._index if s in registered]
+        for symbol in self._live:
+            symbol_registry.register(symbol, self._on_price)
+
+    def _on_price(self, symbol, price):
+        open_ = self._open.get(symbol)
+        change = price / open_ - 1.0 if open_ else None
+        self._queue(symbol, price, change)
+
+    def _queue_predictions(self, prices):
+        """有K线数据的交易对在计算线程中一次批量推理，写入60分钟上涨概率"""
+        from compute_engine import compute_engine
+        from prediction_engine import prediction_engine
+
+        symbols = [s for s in prices if prediction_engine.indicators.get(s)]
+        if not symbols:
+            return
+        # 新一轮行情取代尚未算完的上一轮
+        compute_engine.submit(
+            ('watchlist', 'predict'), prediction_engine.predict, symbols, prices,
+            priority=BACKGROUND,
+            on_success=self._on_predictions,
+            name='watchlist_predict'
+        )
+
+    def _on_predictions(self, result):
+        for row, symbol in enumerate(result['symbols']):
+            p_up = result['p_up'][row, -1]
+            self._update_row(symbol, {'prediction': f"⬆️{p_up:.0%}"})
+
+    # ---------- 批量写入 ----------
+
+    def _queue(self, symbol, price, change=None):
+        fields = {'price': format_price(price)}
+        if change is not None:
+            fields['change'], fields['change_color'] = format_change(change)
+        self._update_row(symbol, fields)
+
+    def _update_row(self, symbol, fields):
+        """合并一行的待写入字段，由ui_scheduler在下一帧（超出预算时顺延）写入"""
+        if symbol not in self._index:
+            return
+        self._pending.setdefault(symbol, {}).update(fields)
+        ui_scheduler.call(('watchlist', symbol), self._apply_row, symbol)
+
+    def _apply_row(self, symbol):
+        """
+        写入一行
+
+        数据项原地修改，不触发RecycleView整体刷新；只有正在显示（或刚滚出、
+        仍缓存着该行数据）的行控件需要同步文字，其余行滚动到时自然读到新数据
+        """
+        fields = self._pending.pop(symbol, None)
+        index = self._index.get(symbol)
+        data = self.rv.data
+        if not fields or index is None or index >= len(data):
+            return
+        item = data[index]
+        item.update(fields)
+        adapter = self.rv.view_adapter
+        view = adapter.get_visible_view(index) or adapter.dirty_views.get(WatchlistRow, {}).get(index)
+        if view is not None:
+            view.refresh_view_attrs(self.rv, index, item)